@@ -1,11 +1,19 @@
 import os
 import re
-import requests
 import logging
-from datetime import datetime
+from datetime import datetime, date, timedelta
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List, Tuple, Iterable, Set
+from zoneinfo import ZoneInfo
 import mimetypes
+import shutil
+import subprocess
+import threading
+import http_client
+import metadata_store
+import metrics
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
 
 try:
     import config as settings
@@ -13,7 +21,23 @@ except ImportError:
     logging.error("config.py bulunamadı. Varsayılan ayarlar kullanılıyor.")
     settings = type('obj', (object,), {'API_KEY': 'DEMO_KEY', 'SAVE_DIR': 'images'})()
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+APOD_API_URL = "https://api.nasa.gov/planetary/apod"
+# APOD arşivinin başladığı ilk tarih; API daha eskisini kabul etmez.
+APOD_FIRST_DATE = date(1995, 6, 16)
+# API yeni günü ABD Doğu saatine göre yayınlar.
+APOD_TIMEZONE = ZoneInfo("America/New_York")
+DEFAULT_BACKFILL_CHUNK_DAYS = 100
+DEFAULT_DOWNLOAD_WORKERS = 4
+DEFAULT_DOWNLOAD_PER_HOST = 4
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+# Sunucu başına eşzamanlı indirme semaforları; tüm indirme iş parçacıkları paylaşır.
+_host_slots: Dict[str, threading.BoundedSemaphore] = {}
+_host_slots_lock = threading.Lock()
+YOUTUBE_ID_PATTERN = re.compile(r"(?:youtube(?:-nocookie)?\.com/(?:embed/|watch\?v=|v/)|youtu\.be/)([\w-]{11})")
+VIDEO_EXTENSIONS = {".mp4", ".webm", ".mov", ".m4v", ".ogv"}
+DEFAULT_FFMPEG_BIN = "ffmpeg"
+DEFAULT_POSTER_FRAME_AT = 1.0
+FFMPEG_TIMEOUT = 120
 
 
 def sanitize_filename(filename: str) -> str:
@@ -53,20 +77,35 @@ def get_image_extension(url: str, response_headers: Dict[str, str]) -> str:
     return ".jpg"
 
 
-def fetch_apod() -> Optional[Dict[str, Any]]:
+def fetch_apod(date_str: Optional[str] = None) -> Optional[Dict[str, Any]]:
     """
     NASA APOD API'sinden günlük veriyi döner.
+    Tarih yerel meta veri deposunda varsa ağa hiç çıkılmaz.
     """
+    cache_key = date_str or current_apod_date().isoformat()
+    cached = metadata_store.get_record(cache_key)
+    if cached and cached.get("title") and not cached.get("missing"):
+        logging.info(f"APOD verisi yerel depodan alındı: {cache_key}")
+        metrics.inc(metrics.EVENTS, event="apod_cache_hit")
+        return cached
+
     if not settings.API_KEY or settings.API_KEY == 'DEMO_KEY':
         logging.warning("NASA API_KEY ayarlanmadı veya DEMO_KEY kullanılıyor.")
 
-    url = f"https://api.nasa.gov/planetary/apod?api_key={settings.API_KEY}"
+    # thumbs=True ile video günlerinde kapak görseli (thumbnail_url) de döner.
+    params = {"api_key": settings.API_KEY, "thumbs": "True"}
+    if date_str:
+        params["date"] = date_str
     try:
-        response = requests.get(url, timeout=30)
+        with metrics.timer("fetch"):
+            response = http_client.get(APOD_API_URL, endpoint="apod", params=params)
         response.raise_for_status()
+        metrics.inc(metrics.BYTES, len(response.content), direction="in", endpoint="apod")
         logging.info("APOD verisi alındı.")
-        return response.json()
-    except requests.RequestException as e:
+        data = response.json()
+        metadata_store.upsert_record(data)
+        return data
+    except http_client.RequestException as e:
         logging.error(f"APOD API hatası: {e}")
         return None
     except Exception as e:
@@ -74,38 +113,157 @@ def fetch_apod() -> Optional[Dict[str, Any]]:
         return None
 
 
+def _stream_to_file(image_url: str, part_path: Path) -> Dict[str, str]:
+    """
+    Görsel gövdesini sabit boyutlu parçalar halinde .part dosyasına yazar.
+    Yarım kalmış .part dosyası varsa HTTP Range isteğiyle kaldığı yerden devam eder.
+    Yanıt başlıklarını döner.
+    """
+    resume_from = part_path.stat().st_size if part_path.exists() else 0
+    headers = {"Range": f"bytes={resume_from}-"} if resume_from else {}
+    if resume_from:
+        logging.info(f"Yarım indirme devam ettiriliyor ({resume_from} bayt): {part_path.name}")
+        metrics.inc(metrics.EVENTS, event="download_resumed")
+
+    with http_client.get(image_url, endpoint="download", headers=headers, stream=True) as image_response:
+        if resume_from and image_response.status_code == 416:
+            # Sunucu aralığı kabul etmedi; yarım dosya geçersiz, baştan indirilir.
+            logging.warning(f"Devam isteği reddedildi, indirme baştan başlıyor: {part_path.name}")
+            metrics.inc(metrics.RETRIES, endpoint="download", reason="range_rejected")
+            part_path.unlink()
+            return _stream_to_file(image_url, part_path)
+        image_response.raise_for_status()
+        # 206 dışındaki başarılı yanıtlar tüm gövdeyi içerir; dosya baştan yazılır.
+        mode = "ab" if image_response.status_code == 206 else "wb"
+        with open(part_path, mode) as file:
+            for chunk in image_response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                if chunk:
+                    file.write(chunk)
+                    metrics.inc(metrics.BYTES, len(chunk), direction="in", endpoint="download")
+        return image_response.headers
+
+
+def _host_slot(url: str) -> threading.BoundedSemaphore:
+    """
+    Aynı sunucudan eşzamanlı indirme sayısını DOWNLOAD_PER_HOST ile sınırlayan semaforu döner.
+    """
+    host = urlparse(url).netloc
+    with _host_slots_lock:
+        if host not in _host_slots:
+            limit = getattr(settings, 'DOWNLOAD_PER_HOST', DEFAULT_DOWNLOAD_PER_HOST)
+            _host_slots[host] = threading.BoundedSemaphore(max(limit, 1))
+        return _host_slots[host]
+
+
+def poster_sources(data: Dict[str, Any]) -> List[str]:
+    """
+    Kaydın görsel kaynaklarını en ucuzdan pahalıya doğru sıralar.
+    Görsel günlerde hdurl/url; video günlerinde API'nin thumbnail_url'i ve YouTube kapak görselleri.
+    """
+    if data.get("media_type") == "image":
+        url = data.get("hdurl") or data.get("url")
+        return [url] if url else []
+    sources = [data["thumbnail_url"]] if data.get("thumbnail_url") else []
+    match = YOUTUBE_ID_PATTERN.search(data.get("url") or "")
+    if match:
+        # maxresdefault her videoda bulunmaz; hqdefault her zaman vardır.
+        sources += [f"https://img.youtube.com/vi/{match.group(1)}/{name}.jpg"
+                    for name in ("maxresdefault", "hqdefault")]
+    return sources
+
+
+def _ffmpeg_bin() -> Optional[str]:
+    configured = getattr(settings, 'FFMPEG_BIN', DEFAULT_FFMPEG_BIN)
+    return shutil.which(configured) if configured else None
+
+
+def _video_file_url(data: Dict[str, Any]) -> Optional[str]:
+    url = data.get("url") or ""
+    return url if Path(urlparse(url).path).suffix.lower() in VIDEO_EXTENSIONS else None
+
+
+def has_poster(data: Dict[str, Any]) -> bool:
+    """
+    Kayıt için indirilebilir ya da çıkarılabilir bir görsel olup olmadığını döner.
+    """
+    if data.get("missing"):
+        return False
+    return bool(poster_sources(data) or (_video_file_url(data) and _ffmpeg_bin()))
+
+
+def extract_poster_frame(video_url: str, output_path: Path) -> bool:
+    """
+    Doğrudan video dosyasından tek kare çıkarır. ffmpeg yalnızca gereken baytları
+    (HTTP Range ile) okur; videonun tamamı indirilmez.
+    """
+    ffmpeg = _ffmpeg_bin()
+    if not ffmpeg:
+        return False
+    frame_at = getattr(settings, 'POSTER_FRAME_AT', DEFAULT_POSTER_FRAME_AT)
+    command = [ffmpeg, "-hide_banner", "-loglevel", "error", "-y", "-ss", str(frame_at), "-i", video_url,
+               "-frames:v", "1", "-q:v", "2", str(output_path)]
+    try:
+        with metrics.timer("poster_frame"):
+            subprocess.run(command, check=True, capture_output=True, timeout=FFMPEG_TIMEOUT)
+    except (OSError, subprocess.SubprocessError) as e:
+        logging.error(f"Videodan kare çıkarılamadı ({video_url}): {e}")
+        output_path.unlink(missing_ok=True)
+        return False
+    return output_path.is_file() and output_path.stat().st_size > 0
+
+
 def save_image(data: Dict[str, Any]) -> Optional[str]:
     """
-    APOD verisinden görseli indirip kaydeder.
+    APOD verisinden görseli parça parça indirip kaydeder.
+    Video ve diğer medya günlerinde kapak görseli indirilir; bulunamazsa videodan kare çıkarılır.
     """
     if not data:
         logging.error("APOD verisi boş.")
         return None
 
-    image_url = data.get("hdurl") or data.get("url")
-    if not image_url:
+    sources = poster_sources(data)
+    video_url = _video_file_url(data) if data.get("media_type") != "image" else None
+    if not sources and not video_url:
         logging.error("Geçerli görsel URL'si bulunamadı.")
         return None
 
     title = data.get("title", "apod_image")
+    file_path = None
     try:
-        logging.info(f"Görsel indiriliyor: {image_url}")
-        image_response = requests.get(image_url, timeout=60)
-        image_response.raise_for_status()
         date_str = data.get("date", datetime.now().strftime("%Y-%m-%d"))
         base_filename = f"{date_str}_{title}"
         sanitized_base = sanitize_filename(base_filename)
-        extension = get_image_extension(image_url, image_response.headers)
-        file_name = f"{sanitized_base}{extension}"
         save_dir = Path(settings.SAVE_DIR)
         save_dir.mkdir(parents=True, exist_ok=True)
-        file_path = save_dir / file_name
-        logging.info(f"Görsel kaydediliyor: {file_path}")
-        with open(file_path, "wb") as file:
-            file.write(image_response.content)
-        logging.info("Görsel başarılı kaydedildi.")
+        part_path = save_dir / f"{sanitized_base}.part"
+
+        for index, image_url in enumerate(sources):
+            logging.info(f"Görsel indiriliyor: {image_url}")
+            try:
+                # Geri doldurmada indirme aşamasının çalışanları aynı sunucuya yüklenmesin diye sıra beklenir.
+                with _host_slot(image_url), metrics.timer("download"):
+                    response_headers = _stream_to_file(image_url, part_path)
+            except http_client.RequestException as e:
+                if index == len(sources) - 1 and not video_url:
+                    raise
+                # Kapak görseli adaylarından biri yoksa (ör. maxresdefault 404) sıradakine geçilir.
+                logging.warning(f"Kapak görseli alınamadı, sıradaki kaynak deneniyor: {e}")
+                part_path.unlink(missing_ok=True)
+                continue
+            extension = get_image_extension(image_url, response_headers)
+            file_path = save_dir / f"{sanitized_base}{extension}"
+            os.replace(part_path, file_path)
+            break
+        else:
+            logging.info(f"Kapak görseli videodan çıkarılıyor: {video_url}")
+            file_path = save_dir / f"{sanitized_base}.jpg"
+            if not extract_poster_frame(video_url, file_path):
+                return None
+            metrics.inc(metrics.EVENTS, event="poster_frame_extracted")
+        logging.info(f"Görsel kaydedildi: {file_path}")
+        metadata_store.record_file(date_str, str(file_path))
         return str(file_path)
-    except requests.RequestException as e:
+    except http_client.RequestException as e:
         logging.error(f"Görsel indirirken hata: {e}")
         return None
     except IOError as e:
@@ -116,18 +274,174 @@ def save_image(data: Dict[str, Any]) -> Optional[str]:
         return None
 
 
+def download_image(record: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Tek kaydın görselini indirir ve {"date", "url", "path", "error"} sonucunu döner.
+    """
+    sources = poster_sources(record)
+    url = sources[0] if sources else record.get("url")
+    result = {"date": record.get("date"), "url": url, "path": None, "error": None}
+    if not sources and not (record.get("media_type") != "image" and _video_file_url(record)):
+        result["error"] = "Görsel URL'si yok"
+        return result
+    try:
+        result["path"] = save_image(record)
+        if not result["path"]:
+            result["error"] = "İndirme başarısız"
+    except Exception as e:
+        result["error"] = str(e)
+    return result
+
+
+def download_images(records: List[Dict[str, Any]], max_workers: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    APOD kayıtlarının görsellerini sınırlı paralellikle indirir; sunucu başına sınır save_image'dadır.
+    Her kayıt için download_image sonucu, giriş sırasıyla döner.
+    """
+    if not records:
+        return []
+    max_workers = max_workers or getattr(settings, 'DOWNLOAD_WORKERS', DEFAULT_DOWNLOAD_WORKERS)
+    logging.info(f"{len(records)} görsel indirilecek ({max_workers} iş parçacığı).")
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(download_image, records))
+    succeeded = sum(1 for r in results if r["path"])
+    logging.info(f"Toplu indirme tamam: {succeeded}/{len(results)} başarılı.")
+    return results
+
+
+def current_apod_date() -> date:
+    """
+    API'nin şu an yayınladığı en güncel APOD tarihini döner.
+    """
+    return datetime.now(APOD_TIMEZONE).date()
+
+
+def fetch_apod_range(start_date: date, end_date: date) -> Optional[List[Dict[str, Any]]]:
+    """
+    start_date ile end_date (dahil) arasındaki APOD kayıtlarını tek istekte çeker.
+    """
+    params = {
+        "api_key": settings.API_KEY,
+        "start_date": start_date.isoformat(),
+        "end_date": end_date.isoformat(),
+        "thumbs": "True",
+    }
+    try:
+        with metrics.timer("fetch_range"):
+            response = http_client.get(APOD_API_URL, endpoint="apod_range", params=params)
+        response.raise_for_status()
+        metrics.inc(metrics.BYTES, len(response.content), direction="in", endpoint="apod_range")
+        records = response.json()
+        if isinstance(records, dict):
+            records = [records]
+        logging.info(f"APOD aralığı alındı: {start_date} - {end_date} ({len(records)} kayıt)")
+        return records
+    except http_client.RequestException as e:
+        logging.error(f"APOD aralık hatası ({start_date} - {end_date}): {e}")
+        return None
+    except ValueError as e:
+        logging.error(f"APOD aralık yanıtı çözümlenemedi: {e}")
+        return None
+
+
+def _daterange(start_date: date, end_date: date) -> Iterable[date]:
+    day = start_date
+    while day <= end_date:
+        yield day
+        day += timedelta(days=1)
+
+
+def missing_ranges(
+    start_date: date,
+    end_date: date,
+    known: Set[str],
+    chunk_days: int = DEFAULT_BACKFILL_CHUNK_DAYS
+) -> List[Tuple[date, date]]:
+    """
+    Yerelde olmayan tarihleri en fazla chunk_days uzunluğunda ardışık aralıklara böler.
+    """
+    ranges: List[Tuple[date, date]] = []
+    range_start: Optional[date] = None
+    previous: Optional[date] = None
+    for day in _daterange(start_date, end_date):
+        if day.isoformat() in known:
+            if range_start is not None:
+                ranges.append((range_start, previous))
+                range_start = None
+            continue
+        if range_start is None:
+            range_start = day
+        elif (day - range_start).days >= chunk_days:
+            ranges.append((range_start, previous))
+            range_start = day
+        previous = day
+    if range_start is not None:
+        ranges.append((range_start, previous))
+    return ranges
+
+
+def clamp_range(start_date: date, end_date: date) -> Optional[Tuple[date, date]]:
+    """
+    Aralığı API'nin kabul ettiği tarihlere daraltır; geçersizse None.
+    """
+    start_date = max(start_date, APOD_FIRST_DATE)
+    end_date = min(end_date, current_apod_date())
+    if start_date > end_date:
+        logging.error(f"Geçersiz tarih aralığı: {start_date} - {end_date}")
+        return None
+    return start_date, end_date
+
+
+def fetch_range_cached(
+    start_date: date,
+    end_date: date,
+    chunk_days: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """
+    Aralıktaki yerelde olmayan tarihleri toplu start_date/end_date sorgularıyla çeker ve
+    aralığın tüm kayıtlarını meta veri deposundan tarih sırasıyla döner.
+    """
+    chunk_days = chunk_days or getattr(settings, 'BACKFILL_CHUNK_DAYS', DEFAULT_BACKFILL_CHUNK_DAYS)
+    known = metadata_store.known_dates(start_date.isoformat(), end_date.isoformat())
+    for range_start, range_end in missing_ranges(start_date, end_date, known, chunk_days):
+        records = fetch_apod_range(range_start, range_end)
+        if records is None:
+            logging.error(f"Aralık atlandı, sonraki çalıştırmada tekrar denenecek: {range_start} - {range_end}")
+            continue
+        returned = set()
+        for record in records:
+            metadata_store.upsert_record(record)
+            returned.add(record.get("date"))
+        # Arşivdeki boşluklar (API'nin kayıt döndürmediği günler) tekrar sorgulanmasın diye işaretlenir.
+        # Bugünün kaydı henüz yayınlanmamış olabileceğinden yalnızca geçmiş günler işaretlenir.
+        gap_end = min(range_end, current_apod_date() - timedelta(days=1))
+        for day in _daterange(range_start, gap_end):
+            if day.isoformat() not in returned:
+                metadata_store.upsert_record({"date": day.isoformat(), "missing": True})
+    return metadata_store.records_between(start_date.isoformat(), end_date.isoformat())
+
+
+def chunk_range(start_date: date, end_date: date, chunk_days: Optional[int] = None) -> List[Tuple[date, date]]:
+    """
+    Aralığı en fazla chunk_days günlük ardışık parçalara böler.
+    """
+    chunk_days = chunk_days or getattr(settings, 'BACKFILL_CHUNK_DAYS', DEFAULT_BACKFILL_CHUNK_DAYS)
+    return missing_ranges(start_date, end_date, set(), chunk_days)
+
+
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
     logging.info("NASA APOD İndirici Başlatıldı...")
     apod_data = fetch_apod()
     if apod_data:
         logging.info(f"Başlık: {apod_data.get('title', 'N/A')}")
-        if apod_data.get("media_type") == "image":
+        if has_poster(apod_data):
             saved_path = save_image(apod_data)
             if saved_path:
                 print(f"Görsel kaydedildi: {saved_path}")
             else:
                 print("Görsel kaydedilemedi.")
         else:
-            print(f"Medya türü 'image' değil. Video: {apod_data.get('url')}")
+            print(f"Kayıt için görsel bulunamadı ({apod_data.get('media_type')}): {apod_data.get('url')}")
     else:
         print("APOD verisi alınamadı.")
@@ -0,0 +1,493 @@
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import argparse
+import platform
+import tempfile
+import threading
+import statistics
+import subprocess
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qs, urlparse
+
+PROJECT_DIR = Path(__file__).resolve().parent
+
+# "python main.py" başlangıcında yüklenmemesi gereken ağır bağımlılıklar; yalnızca ihtiyaç duyan aşamada yüklenir.
+LAZY_MODULES = ("PIL", "requests", "urllib3", "flask")
+DEFAULT_IMPORT_BUDGET_MS = 120.0
+DEFAULT_IMPORT_RUNS = 5
+DEFAULT_RUNS = 5
+# Ölçümün gerileme sayılması için ortanca sürenin taban çizgisini aşma oranı.
+DEFAULT_TOLERANCE = 0.25
+
+# Sentetik görsel kümesi: (ad, boyut) x format
+CORPUS_SIZES = (("small", (800, 600)), ("medium", (2400, 1600)), ("large", (6000, 4000)))
+QUICK_CORPUS_SIZES = CORPUS_SIZES[:2]
+CORPUS_FORMATS = (("JPEG", ".jpg"), ("PNG", ".png"), ("WEBP", ".webp"), ("TIFF", ".tiff"))
+# download_images ölçeklenmesi: sabit gecikmeli taklitte kayıt listesi farklı çalışan sayılarıyla indirilir.
+DOWNLOAD_SWEEP_WORKERS = (1, 2, 4, 8)
+DOWNLOAD_SWEEP_RECORDS = 16
+DOWNLOAD_SWEEP_LATENCY_MS = 100.0
+
+
+def parse_importtime(stderr: str) -> Dict[str, Dict[str, int]]:
+    """
+    -X importtime çıktısını {modül: {"self_us", "cumulative_us"}} sözlüğüne çevirir.
+    """
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|")
+            modules[name.strip()] = {"self_us": int(self_us), "cumulative_us": int(cumulative_us)}
+        except ValueError:
+            continue
+    return modules
+
+
+def bench_import_time(
+    module: str = "main",
+    runs: int = DEFAULT_IMPORT_RUNS,
+    budget_ms: float = DEFAULT_IMPORT_BUDGET_MS,
+    lazy_modules: Sequence[str] = LAZY_MODULES
+) -> Dict[str, Any]:
+    """
+    Modülün içe aktarma süresini ayrı süreçlerde -X importtime ile ölçer. Ortanca süre bütçeyi aşarsa
+    ya da başlangıçta yüklenmemesi gereken bir bağımlılık yüklenirse "ok" False olur.
+    """
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    samples: List[float] = []
+    loaded_lazy: List[str] = []
+    slowest: List[Dict[str, Any]] = []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=PROJECT_DIR, env=env, capture_output=True, text=True
+        )
+        modules = parse_importtime(result.stderr)
+        if module not in modules:
+            raise RuntimeError(f"{module} içe aktarılamadı:\n{result.stderr[-2000:]}")
+        samples.append(modules[module]["cumulative_us"] / 1000)
+        loaded_lazy = sorted({name.split(".")[0] for name in modules} & set(lazy_modules))
+        slowest = [
+            {"module": name, "cumulative_ms": round(times["cumulative_us"] / 1000, 2)}
+            for name, times in sorted(modules.items(), key=lambda item: item[1]["cumulative_us"], reverse=True)[:10]
+        ]
+    median_ms = statistics.median(samples)
+    return {
+        "benchmark": "import_time",
+        "module": module,
+        "runs": runs,
+        "median_ms": round(median_ms, 2),
+        "min_ms": round(min(samples), 2),
+        "budget_ms": budget_ms,
+        "eagerly_loaded": loaded_lazy,
+        "slowest": slowest,
+        "ok": median_ms <= budget_ms and not loaded_lazy,
+    }
+
+
+class StandIn:
+    """
+    NASA APOD ve Pushover API'lerinin yerel taklidi. /apod tek tarih ve aralık sorgularını,
+    /img/<ad> korpus dosyalarını (Range destekli), /push bildirimleri kota başlıklarıyla yanıtlar.
+    """
+
+    def __init__(self, image_dir: Path, latency_ms: float = 0.0):
+        self.image_dir = image_dir
+        self.latency = latency_ms / 1000
+        self.images: List[str] = []
+        self.requests = 0
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Başlık ve gövde ayrı yazıldığından Nagle + gecikmeli ACK her isteğe ~40 ms eklerdi.
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args) -> None:
+                pass
+
+            def _send(self, status: int, body: bytes, content_type: str = "application/json",
+                      headers: Optional[Dict[str, str]] = None) -> None:
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self) -> None:
+                stand_in.requests += 1
+                if stand_in.latency:
+                    time.sleep(stand_in.latency)
+                url = urlparse(self.path)
+                query = {key: values[0] for key, values in parse_qs(url.query).items()}
+                if url.path == "/apod":
+                    if "start_date" in query:
+                        start = date.fromisoformat(query["start_date"])
+                        end = date.fromisoformat(query["end_date"])
+                        records = [stand_in.record(start + timedelta(days=offset))
+                                   for offset in range((end - start).days + 1)]
+                        return self._send(200, json.dumps(records).encode())
+                    day = date.fromisoformat(query["date"]) if "date" in query else date.today()
+                    return self._send(200, json.dumps(stand_in.record(day)).encode())
+                if url.path.startswith("/img/"):
+                    path = stand_in.image_dir / Path(url.path).name
+                    if not path.is_file():
+                        return self._send(404, b"")
+                    body = path.read_bytes()
+                    content_type = {".jpg": "image/jpeg", ".png": "image/png", ".webp": "image/webp",
+                                    ".tiff": "image/tiff"}.get(path.suffix, "application/octet-stream")
+                    byte_range = self.headers.get("Range", "")
+                    if byte_range.startswith("bytes="):
+                        start = int(byte_range[6:].split("-")[0])
+                        if start >= len(body):
+                            return self._send(416, b"")
+                        return self._send(206, body[start:], content_type,
+                                          {"Content-Range": f"bytes {start}-{len(body) - 1}/{len(body)}"})
+                    return self._send(200, body, content_type)
+                self._send(404, b"")
+
+            def do_POST(self) -> None:
+                stand_in.requests += 1
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                reset = str(int(time.time()) + 3600)
+                self._send(200, b'{"status": 1}', headers={
+                    "X-Limit-App-Limit": "10000", "X-Limit-App-Remaining": "9999", "X-Limit-App-Reset": reset,
+                })
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def record(self, day: date) -> Dict[str, Any]:
+        name = self.images[day.toordinal() % len(self.images)] if self.images else "missing.jpg"
+        return {
+            "date": day.isoformat(),
+            "title": f"Benchmark {day.isoformat()}",
+            "explanation": "Sentetik ölçüm kaydı. " * 20,
+            "media_type": "image",
+            "url": f"{self.base_url}/img/{name}",
+            "hdurl": f"{self.base_url}/img/{name}",
+        }
+
+    def __enter__(self) -> "StandIn":
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def build_corpus(directory: Path, sizes=CORPUS_SIZES, formats=CORPUS_FORMATS) -> List[Dict[str, Any]]:
+    """
+    Çeşitli boyut ve formatlarda, gerçekçi sıkıştırma oranı için gradyan + gürültü içeren görseller üretir.
+    """
+    from PIL import Image, features
+
+    directory.mkdir(parents=True, exist_ok=True)
+    corpus = []
+    for size_name, size in sizes:
+        red = Image.linear_gradient("L").resize(size)
+        green = Image.effect_noise(size, 48)
+        blue = Image.radial_gradient("L").resize(size)
+        image = Image.merge("RGB", (red, green, blue))
+        for save_format, extension in formats:
+            if save_format == "WEBP" and not features.check("webp"):
+                continue
+            path = directory / f"{size_name}_{save_format.lower()}{extension}"
+            options = {"quality": 90} if save_format in ("JPEG", "WEBP") else {}
+            image.save(path, format=save_format, **options)
+            corpus.append({"name": path.name, "path": str(path), "size": size_name, "format": save_format,
+                           "megapixels": size[0] * size[1] / 1e6, "bytes": path.stat().st_size})
+    return corpus
+
+
+def measure(func: Callable[[int], Any], runs: int, warmup: int = 1) -> Dict[str, float]:
+    """
+    func(i) çağrısını warmup + runs kez çalıştırır; süre istatistiklerini (ms) döner.
+    """
+    for index in range(warmup):
+        func(-1 - index)
+    samples = []
+    for index in range(runs):
+        started = time.perf_counter()
+        func(index)
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        "runs": runs,
+        "median_ms": round(statistics.median(samples), 3),
+        "p95_ms": round(samples[min(int(len(samples) * 0.95), len(samples) - 1)], 3),
+        "min_ms": round(samples[0], 3),
+        "max_ms": round(samples[-1], 3),
+    }
+
+
+def _result(name: str, stats: Dict[str, float], **params: Any) -> Dict[str, Any]:
+    return {"benchmark": name, "params": params, **stats}
+
+
+def run_suite(runs: int = DEFAULT_RUNS, quick: bool = False, latency_ms: float = 0.0,
+              work_dir: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Tüm ölçümleri ağa çıkmadan, geçici bir SAVE_DIR altında çalıştırır.
+    Çalışma dizini verilmemişse geçici dizin oluşturulur ve ölçümlerden sonra silinir.
+    """
+    if work_dir:
+        return _run_suite(Path(work_dir), runs, quick, latency_ms)
+    root = Path(tempfile.mkdtemp(prefix="apod-bench-"))
+    try:
+        return _run_suite(root, runs, quick, latency_ms)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def _run_suite(root: Path, runs: int, quick: bool, latency_ms: float) -> Dict[str, Any]:
+    save_dir = root / "saved_images"
+    # Modüller ayarları içe aktarıldıkları anda okuduğundan ortam değişkenleri önce ayarlanır.
+    os.environ.update({
+        "SAVE_DIR": str(save_dir),
+        "METADATA_DB": str(root / "apod.sqlite3"),
+        "THUMB_DIR": str(save_dir / "thumbs"),
+        "NOTIFY_DIR": str(root / "notify"),
+        "METRICS_FILE": str(root / "last_run.json"),
+        "CONTENT_STORE_DIR": str(save_dir / ".store"),
+        "HTTP_RETRIES": "0",
+        # Çalışan taraması sunucu başına sınıra takılmasın.
+        "DOWNLOAD_PER_HOST": str(max(DOWNLOAD_SWEEP_WORKERS)),
+    })
+    for key in ("NASA_API_KEY", "PUSHOVER_USER_KEY", "PUSHOVER_APP_TOKEN"):
+        os.environ.setdefault(key, "benchmark")
+    import apod
+    import pushover
+    import metadata_store
+    import image_optimizer
+    from image_saver import LocalDirectoryBackend
+
+    corpus = build_corpus(root / "corpus", QUICK_CORPUS_SIZES if quick else CORPUS_SIZES)
+    results: List[Dict[str, Any]] = []
+    logging.info(f"Ölçüm korpusu: {len(corpus)} görsel, çalışma dizini {root}")
+
+    with StandIn(root / "corpus", latency_ms) as stand_in:
+        stand_in.images = [item["name"] for item in corpus]
+        apod.APOD_API_URL = f"{stand_in.base_url}/apod"
+        pushover.PUSHOVER_API_URL = f"{stand_in.base_url}/push"
+        first_day = date(2000, 1, 1)
+
+        # fetch_apod: her çalıştırmada farklı tarih (ağ), ardından aynı tarih (yerel depo)
+        stats = measure(lambda i: apod.fetch_apod((first_day + timedelta(days=i + 10)).isoformat()), runs)
+        results.append(_result("fetch_apod", stats, cache="miss", latency_ms=latency_ms))
+        stats = measure(lambda i: apod.fetch_apod(first_day.isoformat()), runs)
+        results.append(_result("fetch_apod", stats, cache="hit"))
+
+        # save_image: korpustaki her görsel yerel taklitten akış olarak indirilir
+        for offset, item in enumerate(corpus):
+            def download(i: int, item=item, offset=offset) -> None:
+                record = stand_in.record(first_day)
+                record.update(date=(first_day + timedelta(days=1000 * (offset + 1) + i)).isoformat(),
+                              hdurl=f"{stand_in.base_url}/img/{item['name']}")
+                if not apod.save_image(record):
+                    raise RuntimeError(f"İndirme başarısız: {item['name']}")
+            stats = measure(download, runs)
+            stats["mb_per_s"] = round(item["bytes"] / 1e6 / (stats["median_ms"] / 1000), 2)
+            results.append(_result("save_image", stats, size=item["size"], format=item["format"],
+                                   bytes=item["bytes"], latency_ms=latency_ms))
+
+        # Pushover: metin bildirimi ve ek bütçesine sığdırılmış görselle bildirim
+        def notify(i: int, attachment: Optional[str] = None) -> None:
+            status, error = pushover.deliver("Benchmark", "Sentetik bildirim", attachment)
+            if status != pushover.SENT:
+                raise RuntimeError(f"Bildirim başarısız: {error}")
+        results.append(_result("pushover_deliver", measure(notify, runs), attachment=None, latency_ms=latency_ms))
+        for item in corpus:
+            if item["format"] == "PNG":
+                stats = measure(lambda i, path=item["path"]: notify(i, path), runs)
+                results.append(_result("pushover_deliver", stats, attachment=item["name"], bytes=item["bytes"],
+                                       latency_ms=latency_ms))
+
+    # download_images: aynı kayıt listesi artan çalışan sayısıyla; gecikme baskın olduğunda ölçek doğrusala yakın olmalı
+    smallest = min((item for item in corpus if item["format"] == "JPEG"), key=lambda item: item["bytes"])
+    with StandIn(root / "corpus", DOWNLOAD_SWEEP_LATENCY_MS) as stand_in:
+        stand_in.images = [smallest["name"]]
+        serial_ms = None
+        for workers in DOWNLOAD_SWEEP_WORKERS:
+            def download_all(i: int, workers=workers) -> None:
+                first = date(2001, 1, 1) + timedelta(days=DOWNLOAD_SWEEP_RECORDS * (100 * workers + i + 1))
+                records = [stand_in.record(first + timedelta(days=n)) for n in range(DOWNLOAD_SWEEP_RECORDS)]
+                failed = [r["date"] for r in apod.download_images(records, max_workers=workers) if r["error"]]
+                if failed:
+                    raise RuntimeError(f"İndirme başarısız: {', '.join(failed)}")
+            stats = measure(download_all, runs)
+            serial_ms = serial_ms or stats["median_ms"]
+            stats["speedup"] = round(serial_ms / stats["median_ms"], 2)
+            results.append(_result("download_images", stats, workers=workers, records=DOWNLOAD_SWEEP_RECORDS,
+                                   bytes=smallest["bytes"], latency_ms=DOWNLOAD_SWEEP_LATENCY_MS))
+
+    # optimize_image: çözümleme + LANCZOS + JPEG kodlama
+    optimized_dir = root / "optimized"
+    optimized = []
+    for item in corpus:
+        stats = measure(lambda i, item=item: image_optimizer.optimize_image(item["path"], output_dir=str(optimized_dir)),
+                        runs)
+        stats["megapixels_per_s"] = round(item["megapixels"] / (stats["median_ms"] / 1000), 2)
+        results.append(_result("optimize_image", stats, size=item["size"], format=item["format"],
+                               megapixels=item["megapixels"]))
+        optimized.append(image_optimizer.optimized_output_path(item["path"], str(optimized_dir)))
+
+    # Depolama: save_to_smb ile aynı atomik/doğrulamalı kopyalama, mount gerektirmeyen yerel dizine
+    target_dir = root / "storage"
+    backend = LocalDirectoryBackend(str(target_dir))
+    for item in corpus:
+        source = item["path"]
+        def copy_fresh(i: int, source=source) -> None:
+            (target_dir / Path(source).name).unlink(missing_ok=True)
+            backend.save(source)
+        stats = measure(copy_fresh, runs)
+        results.append(_result("storage_copy", stats, size=item["size"], format=item["format"], bytes=item["bytes"],
+                               mode="fresh"))
+        stats = measure(lambda i, source=source: backend.save(source), runs)
+        results.append(_result("storage_copy", stats, size=item["size"], format=item["format"], bytes=item["bytes"],
+                               mode="identical"))
+
+    # flask_server: galeri dizini ve dosya sunumu (süreç içi test istemcisi)
+    for path in optimized:
+        shutil.copy(path, save_dir / path.name)
+    import flask_server
+    client = flask_server.app.test_client()
+    flask_server.gallery.refresh(force=True)
+    gallery_size = len(flask_server.gallery)
+    results.append(_result("flask_index", measure(lambda i: client.get("/"), runs), images=gallery_size))
+    served = optimized[0].name
+    results.append(_result("flask_serve", measure(lambda i: client.get(f"/images/{served}").close(), runs),
+                           conditional=False))
+    etag = client.get(f"/images/{served}").headers.get("ETag")
+    results.append(_result("flask_serve", measure(
+        lambda i: client.get(f"/images/{served}", headers={"If-None-Match": etag}), runs), conditional=True))
+    results.append(_result("flask_thumbnail", measure(lambda i: client.get(f"/thumbs/{served}").close(), runs)))
+    results.append(_result("flask_search", measure(lambda i: client.get("/search?q=sentetik"), runs)))
+
+    metadata_store.close()
+    return {"meta": environment_info(runs, quick, latency_ms), "results": results}
+
+
+def environment_info(runs: int, quick: bool, latency_ms: float) -> Dict[str, Any]:
+    try:
+        from PIL import __version__ as pillow_version
+    except ImportError:
+        pillow_version = None
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_DIR,
+                                capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "pillow": pillow_version,
+        "runs": runs,
+        "quick": quick,
+        "latency_ms": latency_ms,
+    }
+
+
+def _result_key(result: Dict[str, Any]) -> Tuple[str, str]:
+    return result["benchmark"], json.dumps(result["params"], sort_keys=True)
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float = DEFAULT_TOLERANCE) -> List[Dict[str, Any]]:
+    """
+    Ortanca süreleri taban çizgisiyle karşılaştırır; tolerance oranından fazla yavaşlayanları döner.
+    """
+    previous = {_result_key(result): result for result in baseline.get("results", [])}
+    regressions = []
+    for result in current["results"]:
+        before = previous.get(_result_key(result))
+        if not before or not before.get("median_ms"):
+            continue
+        ratio = result["median_ms"] / before["median_ms"]
+        result["baseline_median_ms"] = before["median_ms"]
+        result["ratio"] = round(ratio, 3)
+        if ratio > 1 + tolerance:
+            regressions.append(result)
+    return regressions
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="APOD otomasyonu performans ölçümleri")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    suite = commands.add_parser("suite", help="Ağa çıkmadan indirme, optimizasyon, depolama ve sunum ölçümleri.")
+    suite.add_argument("--runs", type=int, default=DEFAULT_RUNS, help="Ölçüm başına tekrar sayısı.")
+    suite.add_argument("--quick", action="store_true", help="Büyük (24 MP) görselleri atlar.")
+    suite.add_argument("--latency-ms", type=float, default=0.0, help="Yerel API taklidine eklenecek gecikme.")
+    suite.add_argument("--work-dir", help="Geçici dosyalar için dizin (varsayılan: sonunda silinen geçici dizin).")
+    suite.add_argument("--compare", metavar="JSON", help="Karşılaştırılacak önceki sonuç dosyası.")
+    suite.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                       help="Gerileme eşiği: ortanca süre bu oranda artarsa 1 ile çıkılır.")
+    suite.add_argument("--output", help="Sonuçların yazılacağı JSON dosyası (varsayılan: stdout).")
+
+    imports = commands.add_parser("import", help="-X importtime ile başlangıç süresi ve erken yüklenen bağımlılıklar.")
+    imports.add_argument("--module", default="main", help="İçe aktarma süresi ölçülecek modül.")
+    imports.add_argument("--runs", type=int, default=DEFAULT_IMPORT_RUNS, help="Tekrar sayısı (ortanca alınır).")
+    imports.add_argument("--budget-ms", type=float, default=DEFAULT_IMPORT_BUDGET_MS,
+                         help="İçe aktarma süresi için gerileme eşiği (ms).")
+    imports.add_argument("--allow", nargs="*", default=[], metavar="MODÜL",
+                         help="Başlangıçta yüklenmesine izin verilen ağır bağımlılıklar (ör. PIL).")
+    imports.add_argument("--output", help="Sonuçların yazılacağı JSON dosyası (varsayılan: stdout).")
+    return parser.parse_args(argv)
+
+
+def _emit(data: Dict[str, Any], output: Optional[str]) -> None:
+    text = json.dumps(data, indent=2, ensure_ascii=False)
+    if output:
+        Path(output).write_text(text, encoding="utf-8")
+    else:
+        print(text)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    args = parse_args(argv)
+    if args.command == "import":
+        lazy_modules = [name for name in LAZY_MODULES if name not in args.allow]
+        result = bench_import_time(args.module, runs=args.runs, budget_ms=args.budget_ms, lazy_modules=lazy_modules)
+        _emit(result, args.output)
+        if not result["ok"]:
+            logging.error(
+                f"İçe aktarma gerilemesi: {args.module} {result['median_ms']} ms (bütçe {args.budget_ms} ms), "
+                f"erken yüklenen: {', '.join(result['eagerly_loaded']) or '-'}"
+            )
+            return 1
+        return 0
+
+    # Ölçülen modüllerin adım adım logları sonuçları boğmasın diye yalnızca uyarılar gösterilir.
+    logging.getLogger().setLevel(logging.WARNING)
+    results = run_suite(runs=args.runs, quick=args.quick, latency_ms=args.latency_ms, work_dir=args.work_dir)
+    regressions = []
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        regressions = compare(results, baseline, args.tolerance)
+        results["regressions"] = [_result_key(result) for result in regressions]
+    _emit(results, args.output)
+    for result in regressions:
+        logging.error(f"Gerileme: {result['benchmark']} {result['params']} "
+                      f"{result['baseline_median_ms']} -> {result['median_ms']} ms (x{result['ratio']})")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,12 @@
 import os
-from dotenv import load_dotenv
 from pathlib import Path
 
 current_dir = Path(__file__).parent
 env_path = current_dir / '.env'
-load_dotenv(dotenv_path=env_path)
+if env_path.is_file():
+    # python-dotenv yalnızca .env dosyası varsa yüklenir; ortam değişkenleriyle çalışırken başlangıca eklenmez.
+    from dotenv import load_dotenv
+    load_dotenv(dotenv_path=env_path)
 
 # NASA API
 API_KEY = os.environ.get("NASA_API_KEY")
@@ -17,11 +19,56 @@ PUSHOVER_APP_TOKEN = os.environ.get("PUSHOVER_APP_TOKEN")
 _save_dir_str = os.environ.get("SAVE_DIR", "./saved_images")
 SAVE_DIR = str(Path(_save_dir_str).resolve())
 
+# Görsel işleme: tek bir görselin çözümlenmesi için bellek tavanı (MB)
+try:
+    IMAGE_MEMORY_LIMIT_MB = int(os.environ.get("IMAGE_MEMORY_LIMIT_MB", "512"))
+except ValueError:
+    IMAGE_MEMORY_LIMIT_MB = 512
+
+# Galeri küçük resimleri
+THUMB_DIR = os.environ.get("THUMB_DIR") or str(Path(SAVE_DIR) / "thumbs")
+
+# İçerik adresli depo (yinelenen dosyalar hardlink ile tek kopya tutulur)
+CONTENT_STORE_DIR = os.environ.get("CONTENT_STORE_DIR") or str(Path(SAVE_DIR) / ".store")
+
+# Bildirim eklerinin (bayt bütçesine sığdırılmış) önbelleği; varsayılan SAVE_DIR/notify
+NOTIFY_DIR = os.environ.get("NOTIFY_DIR") or str(Path(SAVE_DIR) / "notify")
+
+# Son çalıştırmanın JSON özeti (aşama süreleri, baytlar, tekrar denemeler); varsayılan SAVE_DIR/last_run.json
+METRICS_FILE = os.environ.get("METRICS_FILE") or str(Path(SAVE_DIR) / "last_run.json")
+
+# APOD meta veri deposu (SQLite); varsayılan SAVE_DIR/apod.sqlite3
+METADATA_DB = os.environ.get("METADATA_DB") or str(Path(SAVE_DIR) / "apod.sqlite3")
+
+# Pushover giden kuyruğu: yoklama aralığı, geri çekilme ve özet (digest) eşiği
+try:
+    PUSHOVER_QUEUE_INTERVAL = float(os.environ.get("PUSHOVER_QUEUE_INTERVAL", "30"))
+    PUSHOVER_RETRY_BASE = float(os.environ.get("PUSHOVER_RETRY_BASE", "30"))
+    PUSHOVER_RETRY_MAX = float(os.environ.get("PUSHOVER_RETRY_MAX", "3600"))
+    PUSHOVER_MAX_ATTEMPTS = int(os.environ.get("PUSHOVER_MAX_ATTEMPTS", "8"))
+    PUSHOVER_DIGEST_MIN = int(os.environ.get("PUSHOVER_DIGEST_MIN", "2"))
+except ValueError:
+    PUSHOVER_QUEUE_INTERVAL = 30
+    PUSHOVER_RETRY_BASE = 30
+    PUSHOVER_RETRY_MAX = 3600
+    PUSHOVER_MAX_ATTEMPTS = 8
+    PUSHOVER_DIGEST_MIN = 2
+
 # SMB/Windows Ayarları
 SMB_USER = os.environ.get("SMB_USER")
 SMB_PASSWORD = os.environ.get("SMB_PASSWORD")
 SMB_PATH = os.environ.get("SMB_PATH")
 SMB_MOUNT_POINT = os.environ.get("SMB_MOUNT_POINT", "/mnt/windows_share")
+try:
+    # Mount sağlık kontrolünün önbellekte tutulacağı süre (sn) ve kopyalama tampon boyutu (bayt)
+    SMB_HEALTH_TTL = float(os.environ.get("SMB_HEALTH_TTL", "60"))
+    SMB_COPY_BUFFER = int(os.environ.get("SMB_COPY_BUFFER", str(4 * 1024 * 1024)))
+except ValueError:
+    SMB_HEALTH_TTL = 60
+    SMB_COPY_BUFFER = 4 * 1024 * 1024
+
+# Optimize görsellerin kaydedileceği hedefler (virgülle ayrılmış): smb, smb:/mount/yolu, local:/dizin
+STORAGE_BACKENDS = os.environ.get("STORAGE_BACKENDS", "smb")
 
 # Flask Ayarları
 FLASK_HOST = os.environ.get("FLASK_HOST", "127.0.0.1")
@@ -34,6 +81,69 @@ FLASK_DEBUG = os.environ.get("FLASK_DEBUG", "False").lower() == 'true'
 LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
 DELETE_ORIGINAL_AFTER_PROCESSING = os.environ.get("DELETE_ORIGINAL_AFTER_PROCESSING", "False").lower() == 'true'
 
+# Arşiv geri doldurma: tek API isteğinde sorgulanacak en fazla gün sayısı
+try:
+    BACKFILL_CHUNK_DAYS = int(os.environ.get("BACKFILL_CHUNK_DAYS", "100"))
+except ValueError:
+    BACKFILL_CHUNK_DAYS = 100
+
+# Paylaşılan HTTP istemcisi (bağlantı havuzu ve yeniden deneme)
+try:
+    HTTP_POOL_SIZE = int(os.environ.get("HTTP_POOL_SIZE", "10"))
+    HTTP_RETRIES = int(os.environ.get("HTTP_RETRIES", "3"))
+    HTTP_BACKOFF_FACTOR = float(os.environ.get("HTTP_BACKOFF_FACTOR", "1.0"))
+    HTTP_CONNECT_TIMEOUT = float(os.environ.get("HTTP_CONNECT_TIMEOUT", "10"))
+    HTTP_READ_TIMEOUTS = {
+        "apod": float(os.environ.get("HTTP_TIMEOUT_APOD", "30")),
+        "apod_range": float(os.environ.get("HTTP_TIMEOUT_APOD_RANGE", "120")),
+        "download": float(os.environ.get("HTTP_TIMEOUT_DOWNLOAD", "60")),
+        "pushover": float(os.environ.get("HTTP_TIMEOUT_PUSHOVER", "30")),
+    }
+except ValueError:
+    HTTP_POOL_SIZE = 10
+    HTTP_RETRIES = 3
+    HTTP_BACKOFF_FACTOR = 1.0
+    HTTP_CONNECT_TIMEOUT = 10
+    HTTP_READ_TIMEOUTS = {"apod": 30, "apod_range": 120, "download": 60, "pushover": 30}
+
+# Servis (daemon) modu: python main.py --daemon
+DAEMON_RUN_AT = os.environ.get("DAEMON_RUN_AT", "06:30")
+try:
+    DAEMON_POLL_INTERVAL = float(os.environ.get("DAEMON_POLL_INTERVAL", "900"))
+    DAEMON_RETRY_BASE = float(os.environ.get("DAEMON_RETRY_BASE", "60"))
+    DAEMON_RETRY_MAX = float(os.environ.get("DAEMON_RETRY_MAX", "3600"))
+    DAEMON_MAX_ATTEMPTS = int(os.environ.get("DAEMON_MAX_ATTEMPTS", "8"))
+except ValueError:
+    DAEMON_POLL_INTERVAL = 900
+    DAEMON_RETRY_BASE = 60
+    DAEMON_RETRY_MAX = 3600
+    DAEMON_MAX_ATTEMPTS = 8
+
+# Video günleri: kapak görseli bulunamazsa ffmpeg ile videodan kare çıkarılır (boş bırakılırsa kapalı)
+FFMPEG_BIN = os.environ.get("FFMPEG_BIN", "ffmpeg")
+try:
+    POSTER_FRAME_AT = float(os.environ.get("POSTER_FRAME_AT", "1.0"))
+except ValueError:
+    POSTER_FRAME_AT = 1.0
+
+# Geri doldurmanın indirme aşaması: çalışan sayısı ve sunucu başına eşzamanlı indirme sınırı
+try:
+    DOWNLOAD_WORKERS = int(os.environ.get("DOWNLOAD_WORKERS", "4"))
+    DOWNLOAD_PER_HOST = int(os.environ.get("DOWNLOAD_PER_HOST", "4"))
+except ValueError:
+    DOWNLOAD_WORKERS = 4
+    DOWNLOAD_PER_HOST = 4
+
+# Geri doldurma pipeline'ı: aşama başına çalışan sayısı ve aşamalar arası kuyruk boyu
+try:
+    PIPELINE_OPTIMIZE_WORKERS = int(os.environ.get("PIPELINE_OPTIMIZE_WORKERS", "2"))
+    PIPELINE_SMB_WORKERS = int(os.environ.get("PIPELINE_SMB_WORKERS", "2"))
+    PIPELINE_QUEUE_SIZE = int(os.environ.get("PIPELINE_QUEUE_SIZE", "8"))
+except ValueError:
+    PIPELINE_OPTIMIZE_WORKERS = 2
+    PIPELINE_SMB_WORKERS = 2
+    PIPELINE_QUEUE_SIZE = 8
+
 # Kritik değişkenlerin kontrolü (opsiyonel)
 REQUIRED_VARS = [
     "NASA_API_KEY", "PUSHOVER_USER_KEY", "PUSHOVER_APP_TOKEN"
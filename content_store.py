@@ -0,0 +1,137 @@
+import os
+import hashlib
+import logging
+from pathlib import Path
+from typing import Optional, Tuple
+
+from metadata_store import hash_file
+from image_optimizer import optimize_image, optimized_output_path, optimization_key, DEFAULT_MAX_SIZE, DEFAULT_QUALITY
+
+try:
+    import config as settings
+except ImportError:
+    logging.error("config.py bulunamadı. Varsayılan ayarlar kullanılıyor.")
+    settings = type('obj', (object,), {'SAVE_DIR': 'saved_images'})()
+
+
+def store_dir() -> Path:
+    configured = getattr(settings, 'CONTENT_STORE_DIR', None)
+    return Path(configured) if configured else Path(settings.SAVE_DIR) / ".store"
+
+
+def object_path(digest: str) -> Path:
+    """
+    İçerik özetine karşılık gelen depo nesnesinin yolu (objects/ab/abcdef...).
+    """
+    return store_dir() / "objects" / digest[:2] / digest
+
+
+def _link_into_place(source: Path, target: Path) -> None:
+    """
+    target'ı source'a hardlink olarak atomik biçimde yerleştirir.
+    """
+    temp = target.with_name(f".{target.name}.link")
+    if temp.exists():
+        temp.unlink()
+    os.link(source, temp)
+    os.replace(temp, target)
+
+
+def _same_file(a: Path, b: Path) -> bool:
+    try:
+        return os.path.samefile(a, b)
+    except OSError:
+        return False
+
+
+def ingest(path: str, digest: Optional[str] = None) -> Optional[str]:
+    """
+    Dosyayı içerik adresli depoya alır. Aynı içerik zaten depodaysa dosya,
+    mevcut nesneye hardlink ile değiştirilir; böylece aynı baytlar diskte bir kez tutulur.
+    İçerik özetini döner; dosya bulunamazsa None.
+    """
+    file_path = Path(path)
+    if not file_path.is_file():
+        logging.error(f"Depoya alınacak dosya bulunamadı: {path}")
+        return None
+    digest = digest or hash_file(str(file_path))
+    target = object_path(digest)
+    try:
+        target.parent.mkdir(parents=True, exist_ok=True)
+        if not target.exists():
+            os.link(file_path, target)
+            logging.debug(f"Depoya eklendi: {digest[:12]} <- {file_path.name}")
+        elif not _same_file(file_path, target):
+            _link_into_place(target, file_path)
+            logging.info(f"Yinelenen içerik bağlandı: {file_path.name} -> {digest[:12]}")
+    except OSError as e:
+        # Farklı dosya sistemi vb. durumlarda dosya olduğu gibi bırakılır.
+        logging.warning(f"İçerik deposuna bağlanamadı ({file_path.name}): {e}")
+    return digest
+
+
+def remove(path: str) -> None:
+    """
+    Dosyayı siler; depo nesnesine başka bağlantı kalmadıysa nesneyi de siler.
+    """
+    file_path = Path(path)
+    if not file_path.exists():
+        return
+    digest = hash_file(str(file_path)) if file_path.stat().st_nlink > 1 else None
+    file_path.unlink()
+    if digest:
+        target = object_path(digest)
+        try:
+            if target.stat().st_nlink == 1:
+                target.unlink()
+                logging.info(f"Kullanılmayan depo nesnesi silindi: {digest[:12]}")
+        except OSError:
+            pass
+
+
+def _derived_key(source_digest: str, key: str) -> str:
+    return hashlib.sha256(f"{source_digest}:{key}".encode("utf-8")).hexdigest()
+
+
+def optimize_cached(
+    image_path: str,
+    output_dir: Optional[str] = None,
+    source_digest: Optional[str] = None,
+    max_size: Tuple[int, int] = DEFAULT_MAX_SIZE,
+    quality: int = DEFAULT_QUALITY,
+    suffix: str = "_optimized",
+    output_format: str = "JPEG"
+) -> Optional[str]:
+    """
+    optimize_image'ı içerik deposu üzerinden çalıştırır: aynı kaynak özeti ve ayarlarla
+    daha önce üretilmiş bir çıktı varsa görsel yeniden işlenmez, mevcut nesne bağlanır.
+    """
+    if not Path(image_path).is_file():
+        logging.error(f"Dosya bulunamadı: {image_path}")
+        return None
+    source_digest = source_digest or hash_file(image_path)
+    derived = store_dir() / "derived" / _derived_key(source_digest, optimization_key(max_size, quality, output_format, suffix))
+    output_path = optimized_output_path(image_path, output_dir, suffix, output_format)
+
+    if derived.is_file():
+        try:
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            if not _same_file(derived, output_path):
+                _link_into_place(derived, output_path)
+            logging.info(f"Optimizasyon atlandı, depodaki çıktı kullanıldı: {output_path.name}")
+            return str(output_path)
+        except OSError as e:
+            logging.warning(f"Depodaki çıktı bağlanamadı, yeniden optimize ediliyor: {e}")
+
+    optimized = optimize_image(image_path, output_dir=output_dir, max_size=max_size, quality=quality,
+                               suffix=suffix, output_format=output_format)
+    if not optimized:
+        return None
+    output_digest = ingest(optimized)
+    try:
+        derived.parent.mkdir(parents=True, exist_ok=True)
+        if output_digest and object_path(output_digest).is_file():
+            _link_into_place(object_path(output_digest), derived)
+    except OSError as e:
+        logging.warning(f"Türetilmiş çıktı depoya kaydedilemedi: {e}")
+    return optimized
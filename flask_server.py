@@ -1,8 +1,16 @@
 import os
+import time
 import logging
-from flask import Flask, send_from_directory, render_template_string, abort, url_for, request
+import threading
+from flask import Flask, send_from_directory, render_template_string, abort, url_for, request, g, Response, jsonify
 from pathlib import Path
 from werkzeug.exceptions import NotFound
+from werkzeug.utils import safe_join
+from markupsafe import Markup, escape
+from gallery_index import GalleryIndex, DATE_PREFIX
+import metadata_store
+import metrics
+from image_optimizer import create_thumbnail, thumbnail_name, DEFAULT_RENDITIONS
 
 try:
     import config as settings
@@ -22,6 +30,22 @@ IMAGE_DIR = Path(settings.SAVE_DIR).resolve()
 if not IMAGE_DIR.is_dir():
     logging.warning(f"Görsel dizini bulunamadı: {IMAGE_DIR}")
 
+DEFAULT_PER_PAGE = 50
+MAX_PER_PAGE = 200
+SEARCH_PER_PAGE = 20
+gallery = GalleryIndex(IMAGE_DIR)
+THUMB_DIR = Path(getattr(settings, 'THUMB_DIR', None) or IMAGE_DIR / "thumbs").resolve()
+
+# İndirilen tarihli APOD orijinalleri bir daha değişmez; istemciler bir yıl boyunca yeniden sormaz.
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+# Türetilmiş dosyalar (optimize çıktılar, küçük resimler, renditions) yerinde yeniden üretilebildiğinden
+# ve tarihsiz dosyalar her seferinde ETag ile doğrulanır.
+REVALIDATE_MAX_AGE = 0
+DERIVED_SUFFIXES = ("_optimized", "_notify") + tuple(f"_{name}" for name, _size in DEFAULT_RENDITIONS)
+# (yol, mtime, boyut) -> içerik özeti; özet yalnızca dosya değiştiğinde yeniden hesaplanır.
+_etag_cache = {}
+_etag_lock = threading.Lock()
+
 INDEX_HTML = """
 <!doctype html>
 <html>
@@ -34,22 +58,45 @@ INDEX_HTML = """
         a { text-decoration: none; color: #007bff; }
         a:hover { text-decoration: underline; }
         img { max-width: 150px; max-height: 100px; vertical-align: middle; margin-right: 1em; border: 1px solid #ddd; }
+        form { margin-bottom: 1.5em; }
+        .pager a, .pager span { margin-right: 1em; }
     </style>
 </head>
 <body>
     <h1>Kaydedilmiş NASA Görselleri</h1>
+    <form method="get" action="{{ url_for('index') }}">
+        <input type="text" name="q" value="{{ params.q or '' }}" placeholder="Başlık veya dosya adı">
+        <input type="date" name="from" value="{{ params['from'] or '' }}">
+        <input type="date" name="to" value="{{ params.to or '' }}">
+        <select name="sort">
+            {% for key, label in [('date', 'Tarih'), ('title', 'Başlık'), ('name', 'Dosya adı')] %}
+            <option value="{{ key }}" {% if params.sort == key %}selected{% endif %}>{{ label }}</option>
+            {% endfor %}
+        </select>
+        <select name="order">
+            <option value="desc" {% if params.order == 'desc' %}selected{% endif %}>Azalan</option>
+            <option value="asc" {% if params.order == 'asc' %}selected{% endif %}>Artan</option>
+        </select>
+        <button type="submit">Filtrele</button>
+        <a href="{{ url_for('search') }}">Açıklamalarda ara</a>
+    </form>
     {% if images %}
-        <p>{{ images|length }} adet görsel bulundu:</p>
+        <p>{{ total }} adet görsel bulundu (sayfa {{ page }}/{{ pages }}):</p>
         <ul>
             {% for image in images %}
             <li>
-                <a href="{{ url_for('serve_image', filename=image) }}" target="_blank">
-                    <img src="{{ url_for('serve_image', filename=image) }}" alt="{{ image }}" loading="lazy">
-                    {{ image }}
+                <a href="{{ url_for('serve_image', filename=image.name) }}" target="_blank">
+                    <img src="{{ url_for('serve_thumbnail', filename=image.name) }}" alt="{{ image.title or image.name }}" loading="lazy">
+                    {{ image.title or image.name }}
                 </a>
+                <small>{{ image.date }}</small>
             </li>
             {% endfor %}
         </ul>
+        <p class="pager">
+            {% if page > 1 %}<a href="{{ url_for('index', page=page - 1, **params) }}">&laquo; Önceki</a>{% endif %}
+            {% if page < pages %}<a href="{{ url_for('index', page=page + 1, **params) }}">Sonraki &raquo;</a>{% endif %}
+        </p>
     {% else %}
         <p>Dizin içinde görsel bulunamadı.</p>
     {% endif %}
@@ -58,22 +105,275 @@ INDEX_HTML = """
 </html>
 """
 
+SEARCH_HTML = """
+<!doctype html>
+<html>
+<head>
+    <title>APOD Arşivinde Ara</title>
+    <style>
+        body { font-family: sans-serif; margin: 2em; }
+        ul { list-style: none; padding: 0; }
+        li { margin-bottom: 1em; border-bottom: 1px solid #eee; padding-bottom: 1em; overflow: hidden; }
+        a { text-decoration: none; color: #007bff; }
+        a:hover { text-decoration: underline; }
+        img { float: left; max-width: 150px; max-height: 100px; margin-right: 1em; border: 1px solid #ddd; }
+        mark { background: #fff3a0; }
+        form { margin-bottom: 1.5em; }
+        .pager a { margin-right: 1em; }
+    </style>
+</head>
+<body>
+    <h1>APOD Arşivinde Ara</h1>
+    <form method="get" action="{{ url_for('search') }}">
+        <input type="search" name="q" value="{{ q }}" placeholder="Başlık veya açıklama" autofocus>
+        <button type="submit">Ara</button>
+        <a href="{{ url_for('index') }}">Galeri</a>
+    </form>
+    {% if q %}
+        <p>"{{ q }}" için {{ total }} sonuç ({{ elapsed_ms }} ms){% if total %}, sayfa {{ page }}/{{ pages }}{% endif %}:</p>
+        <ul>
+            {% for result in results %}
+            <li>
+                {% if result.image %}
+                <a href="{{ url_for('serve_image', filename=result.image) }}" target="_blank">
+                    <img src="{{ url_for('serve_thumbnail', filename=result.image) }}" alt="{{ result.title }}" loading="lazy">
+                </a>
+                {% endif %}
+                <strong>{{ result.title }}</strong> <small>{{ result.date }}{% if result.media_type != 'image' %} · {{ result.media_type }}{% endif %}</small>
+                <p>{{ result.snippet }}</p>
+            </li>
+            {% endfor %}
+        </ul>
+        <p class="pager">
+            {% if page > 1 %}<a href="{{ url_for('search', q=q, page=page - 1, **params) }}">&laquo; Önceki</a>{% endif %}
+            {% if page < pages %}<a href="{{ url_for('search', q=q, page=page + 1, **params) }}">Sonraki &raquo;</a>{% endif %}
+        </p>
+    {% endif %}
+</body>
+</html>
+"""
+
+def _content_etag(path: str) -> str:
+    """
+    Dosyanın içerik özetini döner. Özet mümkünse meta veri deposundan okunur.
+    """
+    stat = os.stat(path)
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    with _etag_lock:
+        cached = _etag_cache.get(key)
+    if cached:
+        return cached
+
+    digest = None
+    try:
+        record = metadata_store.find_by_filename(os.path.basename(path))
+    except Exception as e:
+        logging.debug(f"Meta veri deposu okunamadı: {e}")
+        record = None
+    if record:
+        for prefix, path_field, size_field in (("", "file_path", "file_size"),
+                                                ("optimized_", "optimized_path", "optimized_size")):
+            if record.get(path_field) == path and record.get(size_field) == stat.st_size:
+                digest = record.get(f"{prefix}sha256")
+                break
+    if not digest:
+        digest = metadata_store.hash_file(path)
+    with _etag_lock:
+        _etag_cache[key] = digest
+    return digest
+
+def _is_original(filename: str) -> bool:
+    """
+    Görsel dizininin kökündeki tarihli, türetilmemiş dosyalar indirilen orijinallerdir.
+    """
+    name = os.path.basename(filename)
+    return (name == filename and DATE_PREFIX.match(name) is not None
+            and not Path(name).stem.endswith(DERIVED_SUFFIXES))
+
+def _send_cached(directory: Path, filename: str, immutable: bool = False):
+    """
+    Dosyayı içerik özetli ETag ve önbellek başlıklarıyla sunar; If-None-Match eşleşirse 304 döner.
+    immutable=True yalnızca bir daha değişmeyecek dosyalar (indirilen orijinaller) için verilir.
+    """
+    path = safe_join(str(directory), filename)
+    if path is None or not os.path.isfile(path):
+        raise NotFound()
+    response = send_from_directory(
+        directory,
+        filename,
+        etag=_content_etag(path),
+        max_age=IMMUTABLE_MAX_AGE if immutable else REVALIDATE_MAX_AGE,
+        conditional=True,
+    )
+    response.cache_control.public = True
+    if immutable:
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.no_cache = True
+    return response
+
+@app.before_request
+def _start_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def _record_request(response):
+    started = getattr(g, "request_started", None)
+    if started is not None and request.endpoint != "serve_metrics":
+        metrics.observe(metrics.STAGE_SECONDS, time.perf_counter() - started,
+                        stage="serve", endpoint=request.endpoint or "unknown")
+        metrics.inc(metrics.EVENTS, event="http_response", status=response.status_code)
+        if response.content_length:
+            metrics.inc(metrics.BYTES, response.content_length, direction="out", endpoint=request.endpoint or "unknown")
+    return response
+
+def _last_run_gauges(summary: dict) -> str:
+    """
+    Son pipeline çalıştırmasının (main.py tarafından yazılan özet) durum göstergeleri.
+    """
+    return "\n".join([
+        "# HELP apod_last_run_timestamp_seconds Son çalıştırmanın bitiş zamanı",
+        "# TYPE apod_last_run_timestamp_seconds gauge",
+        f"apod_last_run_timestamp_seconds {summary.get('finished_ts', 0)}",
+        "# HELP apod_last_run_duration_seconds Son çalıştırmanın süresi",
+        "# TYPE apod_last_run_duration_seconds gauge",
+        f"apod_last_run_duration_seconds {summary.get('duration_s', 0)}",
+        "# HELP apod_last_run_success Son çalıştırma başarısız değilse 1",
+        "# TYPE apod_last_run_success gauge",
+        f"apod_last_run_success {0 if summary.get('status') == 'failed' else 1}",
+    ]) + "\n"
+
+@app.route('/metrics')
+def serve_metrics():
+    """
+    Web sunucusu (scope="server") ve son çalıştırma (scope="last_run") metrikleri, Prometheus metin biçiminde.
+    """
+    parts = [metrics.with_labels(metrics.snapshot(), scope="server")]
+    summary = metrics.load_summary()
+    if summary:
+        parts.append(metrics.with_labels(summary.get("metrics") or {}, scope="last_run"))
+    body = metrics.render_prometheus(metrics.combine(*parts))
+    if summary:
+        body = _last_run_gauges(summary) + body
+    return Response(body, mimetype="text/plain; version=0.0.4")
+
+@app.route('/metrics/last_run.json')
+def serve_run_summary():
+    summary = metrics.load_summary()
+    if summary is None:
+        abort(404, description="Henüz çalıştırma özeti yok.")
+    return jsonify(summary)
+
 @app.route('/images/<path:filename>')
 def serve_image(filename: str):
     try:
-        return send_from_directory(IMAGE_DIR, filename)
+        return _send_cached(IMAGE_DIR, filename, immutable=_is_original(filename))
     except NotFound:
         logging.warning(f"Dosya bulunamadı: {filename}")
         abort(404, description="Kaynak bulunamadı.")
 
+@app.route('/thumbs/<path:filename>')
+def serve_thumbnail(filename: str):
+    """
+    Galeri görselinin küçük resmini sunar; eski görseller için ilk istekte üretir.
+    """
+    thumb_file = thumbnail_name(filename)
+    if not (THUMB_DIR / thumb_file).is_file():
+        source = safe_join(str(IMAGE_DIR), filename)
+        if source is None or not os.path.isfile(source):
+            abort(404, description="Kaynak bulunamadı.")
+        if not create_thumbnail(source, str(THUMB_DIR)):
+            # Küçük resim üretilemezse tam görsele geri dönülür; sonraki istekte küçük resim
+            # üretilebileceğinden bu yanıt kalıcı olarak önbelleklenmez.
+            return _send_cached(IMAGE_DIR, filename)
+    try:
+        return _send_cached(THUMB_DIR, thumb_file)
+    except NotFound:
+        abort(404, description="Kaynak bulunamadı.")
+
 @app.route('/')
 def index():
-    image_files = []
-    if IMAGE_DIR.is_dir():
-        allowed = {".jpg", ".jpeg", ".png", ".gif"}
-        image_files = sorted([f.name for f in IMAGE_DIR.iterdir() if f.is_file() and f.suffix.lower() in allowed])
-        logging.info(f"{len(image_files)} görsel bulundu.")
-    return render_template_string(INDEX_HTML, images=image_files)
+    try:
+        page = max(int(request.args.get("page", 1)), 1)
+        per_page = min(max(int(request.args.get("per_page", DEFAULT_PER_PAGE)), 1), MAX_PER_PAGE)
+    except ValueError:
+        abort(400, description="Geçersiz sayfa parametresi.")
+    params = {
+        "q": request.args.get("q") or None,
+        "from": request.args.get("from") or None,
+        "to": request.args.get("to") or None,
+        "sort": request.args.get("sort", "date"),
+        "order": request.args.get("order", "desc"),
+    }
+    images, total = gallery.query(
+        page=page,
+        per_page=per_page,
+        sort=params["sort"],
+        descending=params["order"] != "asc",
+        search=params["q"],
+        date_from=params["from"],
+        date_to=params["to"],
+    )
+    pages = max((total + per_page - 1) // per_page, 1)
+    # Sayfalama bağlantılarında boş parametreler taşınmaz.
+    params = {key: value for key, value in params.items() if value}
+    if per_page != DEFAULT_PER_PAGE:
+        params["per_page"] = per_page
+    return render_template_string(INDEX_HTML, images=images, total=total, page=page, pages=pages, params=params)
+
+def _highlight(snippet: str) -> Markup:
+    """
+    Arama özetini HTML'e güvenli biçimde çevirir; yalnızca eşleşen terimler <mark> ile vurgulanır.
+    """
+    text = str(escape(snippet or ""))
+    return Markup(text.replace(metadata_store.HIGHLIGHT_START, "<mark>").replace(metadata_store.HIGHLIGHT_END, "</mark>"))
+
+def _result_image(record: dict):
+    """
+    Kaydın galeride sunulabilecek görselinin IMAGE_DIR'e göreli yolu; diske bakılmaz.
+    """
+    for field in ("file_path", "optimized_path"):
+        if record.get(field):
+            try:
+                return Path(record[field]).relative_to(IMAGE_DIR).as_posix()
+            except ValueError:
+                continue
+    return None
+
+@app.route('/search')
+def search():
+    """
+    Başlık ve açıklamalarda tam metin araması; alaka sırasına göre sayfalı sonuçlar.
+    format=json ile sonuçlar JSON olarak döner.
+    """
+    try:
+        page = max(int(request.args.get("page", 1)), 1)
+        per_page = min(max(int(request.args.get("per_page", SEARCH_PER_PAGE)), 1), MAX_PER_PAGE)
+    except ValueError:
+        abort(400, description="Geçersiz sayfa parametresi.")
+    q = (request.args.get("q") or "").strip()
+    started = time.perf_counter()
+    records, total = metadata_store.search_records(q, limit=per_page, offset=(page - 1) * per_page) if q else ([], 0)
+    elapsed_ms = round((time.perf_counter() - started) * 1000, 2)
+    results = [{
+        "date": record["date"],
+        "title": record["title"],
+        "media_type": record["media_type"],
+        "snippet": _highlight(record["snippet"]),
+        "image": _result_image(record),
+    } for record in records]
+    pages = max((total + per_page - 1) // per_page, 1)
+    if request.args.get("format") == "json":
+        for result in results:
+            result["snippet"] = str(result["snippet"])
+            image = result.pop("image")
+            result["image_url"] = url_for('serve_image', filename=image) if image else None
+            result["thumbnail_url"] = url_for('serve_thumbnail', filename=image) if image else None
+        return jsonify({"query": q, "total": total, "page": page, "pages": pages, "per_page": per_page,
+                        "elapsed_ms": elapsed_ms, "results": results})
+    params = {"per_page": per_page} if per_page != SEARCH_PER_PAGE else {}
+    return render_template_string(SEARCH_HTML, q=q, results=results, total=total, page=page, pages=pages,
+                                  elapsed_ms=elapsed_ms, params=params)
 
 @app.errorhandler(404)
 def page_not_found(e):
@@ -92,4 +392,5 @@ if __name__ == "__main__":
     port = settings.FLASK_PORT
     debug_mode = settings.FLASK_DEBUG
     logging.info(f"Flask sunucusu başlatılıyor: http://{host}:{port}")
+    gallery.start()
     app.run(host=host, port=port, debug=debug_mode)
@@ -0,0 +1,235 @@
+import os
+import re
+import time
+import logging
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+import metadata_store
+
+ALLOWED_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif"}
+SORT_KEYS = ("date", "title", "name")
+DEFAULT_CHECK_INTERVAL = 2.0
+DATE_PREFIX = re.compile(r"^(\d{4}-\d{2}-\d{2})_")
+
+
+class GalleryIndex:
+    """
+    Görsel dizininin bellek içi dizini. Arka plandaki izleyici, klasörün mtime değeri ya da meta veri
+    deposundaki liste sürümü değiştiğinde dizini yeniden oluşturup tek seferde değiştirir;
+    istekler yalnızca hazır dizini okur, taramaya girmez.
+    """
+
+    def __init__(self, image_dir: Path, check_interval: float = DEFAULT_CHECK_INTERVAL, use_store: bool = True):
+        self.image_dir = Path(image_dir)
+        self.check_interval = check_interval
+        self.use_store = use_store
+        self._lock = threading.Lock()
+        self._signature: Optional[Tuple] = None
+        self._watcher: Optional[threading.Thread] = None
+        self._watcher_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._ready = threading.Event()
+        # (sıralamaya göre listeler, tarih anahtarları) çifti tek seferde değiştirilir.
+        self._state: Tuple[Dict[str, List[Dict[str, Any]]], List[str]] = ({key: [] for key in SORT_KEYS}, [])
+
+    def _current_signature(self) -> Tuple:
+        # Veritabanı dosyasının mtime'ı her aşama/bildirim yazımında değişir; bunun yerine
+        # yalnızca başlık ve dosya değişince artan sayaç kullanılır.
+        try:
+            directory = self.image_dir.stat().st_mtime_ns
+        except OSError:
+            directory = None
+        version = None
+        if self.use_store:
+            try:
+                version = metadata_store.listing_version()
+            except Exception as e:
+                logging.warning(f"Meta veri deposu okunamadı: {e}")
+        return directory, version
+
+    def _load_titles(self) -> Dict[str, Dict[str, Any]]:
+        if not self.use_store:
+            return {}
+        try:
+            records = metadata_store.list_records(with_files=True)
+        except Exception as e:
+            logging.warning(f"Meta veri deposu okunamadı: {e}")
+            return {}
+        return {Path(r["file_path"]).name: r for r in records}
+
+    def _rebuild(self) -> None:
+        started = time.perf_counter()
+        titles = self._load_titles()
+        entries = []
+        if self.image_dir.is_dir():
+            with os.scandir(self.image_dir) as scanner:
+                for item in scanner:
+                    if not item.is_file() or os.path.splitext(item.name)[1].lower() not in ALLOWED_EXTENSIONS:
+                        continue
+                    stat = item.stat()
+                    record = titles.get(item.name, {})
+                    date_str = record.get("date") or _date_from_name(item.name) \
+                        or datetime.fromtimestamp(stat.st_mtime).strftime("%Y-%m-%d")
+                    title = record.get("title")
+                    entries.append({
+                        "name": item.name,
+                        "title": title,
+                        "date": date_str,
+                        "size": stat.st_size,
+                        "mtime": stat.st_mtime,
+                        "_search": f"{item.name} {title or ''}".lower(),
+                    })
+        by_date = sorted(entries, key=lambda e: (e["date"], e["name"]))
+        sorted_lists = {
+            "date": by_date,
+            "title": sorted(entries, key=lambda e: ((e["title"] or e["name"]).lower(), e["name"])),
+            "name": sorted(entries, key=lambda e: e["name"]),
+        }
+        self._state = (sorted_lists, [e["date"] for e in by_date])
+        elapsed = (time.perf_counter() - started) * 1000
+        logging.info(f"Galeri dizini yenilendi: {len(entries)} görsel, {elapsed:.1f} ms")
+
+    def refresh(self, force: bool = False) -> None:
+        """
+        Dizin değiştiyse bellek içi dizini yeniden oluşturur. İzleyici tarafından çağrılır;
+        testler ve ölçümler ilk dizini beklemeden kurmak için doğrudan da çağırabilir.
+        """
+        with self._lock:
+            signature = self._current_signature()
+            if force or signature != self._signature:
+                self._rebuild()
+                self._signature = signature
+        self._ready.set()
+
+    def _watch(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                logging.error(f"Galeri dizini yenilenemedi: {e}", exc_info=True)
+                self._ready.set()
+            self._stop_event.wait(self.check_interval)
+        metadata_store.close()
+
+    def start(self) -> None:
+        """
+        Değişiklikleri check_interval aralıklarla yoklayan arka plan izleyicisini bir kez başlatır.
+        """
+        if self._watcher is not None:
+            return
+        with self._watcher_lock:
+            if self._watcher is None:
+                self._stop_event.clear()
+                self._watcher = threading.Thread(target=self._watch, name="gallery-index", daemon=True)
+                self._watcher.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        with self._watcher_lock:
+            watcher, self._watcher = self._watcher, None
+        if watcher is not None:
+            self._stop_event.set()
+            watcher.join(timeout)
+
+    def __len__(self) -> int:
+        return len(self._state[1])
+
+    def query(
+        self,
+        page: int = 1,
+        per_page: int = 50,
+        sort: str = "date",
+        descending: bool = True,
+        search: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Sıralanmış, filtrelenmiş sayfayı ve toplam eşleşme sayısını döner.
+        """
+        self.start()
+        # Yalnızca süreç açılışındaki ilk dizin beklenir; sonraki değişiklikler arka planda işlenir.
+        self._ready.wait()
+        sorted_lists, date_keys = self._state
+        sort = sort if sort in SORT_KEYS else "date"
+        if sort == "date" and (date_from or date_to):
+            # Tarih sıralı listede aralık ikili aramayla bulunur.
+            low = bisect_left(date_keys, date_from) if date_from else 0
+            high = bisect_right(date_keys, date_to) if date_to else len(date_keys)
+            entries = sorted_lists["date"][low:high]
+        else:
+            entries = sorted_lists[sort]
+            if date_from or date_to:
+                entries = [e for e in entries
+                           if (not date_from or e["date"] >= date_from) and (not date_to or e["date"] <= date_to)]
+        if search:
+            needle = search.lower()
+            entries = [e for e in entries if needle in e["_search"]]
+
+        total = len(entries)
+        page = max(page, 1)
+        start = (page - 1) * per_page
+        if descending:
+            # Ters kopya yerine uçtan dilimlenir.
+            stop_index = total - start
+            page_entries = entries[max(stop_index - per_page, 0):max(stop_index, 0)][::-1]
+        else:
+            page_entries = entries[start:start + per_page]
+        return page_entries, total
+
+
+def _date_from_name(name: str) -> Optional[str]:
+    match = DATE_PREFIX.match(name)
+    return match.group(1) if match else None
+
+
+def benchmark(counts=(1000, 10000, 100000), queries: int = 200) -> List[Dict[str, Any]]:
+    """
+    Verilen dosya sayıları için dizin oluşturma ve sayfa sorgusu gecikmesini ölçer.
+    """
+    import tempfile
+    from datetime import date, timedelta
+
+    results = []
+    for count in counts:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            start_day = date(1995, 6, 16)
+            for i in range(count):
+                day = start_day + timedelta(days=i % 20000)
+                Path(temp_dir, f"{day.isoformat()}_Image_{i}.jpg").touch()
+            index = GalleryIndex(Path(temp_dir), use_store=False)
+
+            started = time.perf_counter()
+            index.refresh(force=True)
+            build_ms = (time.perf_counter() - started) * 1000
+
+            started = time.perf_counter()
+            for i in range(queries):
+                index.query(page=(i % 10) + 1, per_page=50)
+            page_ms = (time.perf_counter() - started) * 1000 / queries
+
+            started = time.perf_counter()
+            for _ in range(queries):
+                index.query(per_page=50, search="image_9")
+            search_ms = (time.perf_counter() - started) * 1000 / queries
+
+            results.append({
+                "files": count,
+                "build_ms": round(build_ms, 2),
+                "page_query_ms": round(page_ms, 4),
+                "filtered_query_ms": round(search_ms, 3),
+            })
+            index.stop()
+    return results
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    print("Galeri Dizini Kıyaslaması Başlatıldı...")
+    logging.getLogger().setLevel(logging.WARNING)
+    for row in benchmark():
+        print(f"{row['files']:>7} dosya: oluşturma {row['build_ms']} ms, "
+              f"sayfa {row['page_query_ms']} ms, filtreli {row['filtered_query_ms']} ms")
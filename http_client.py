@@ -0,0 +1,126 @@
+import logging
+import random
+import threading
+from typing import TYPE_CHECKING, Optional, Tuple
+
+import metrics
+
+if TYPE_CHECKING:
+    import requests
+    from urllib3.util.retry import Retry
+
+try:
+    import config as settings
+except ImportError:
+    logging.error("config.py bulunamadı. Varsayılan ayarlar kullanılıyor.")
+    settings = type('obj', (object,), {})()
+
+DEFAULT_CONNECT_TIMEOUT = 10
+# Uç nokta başına okuma zaman aşımı (saniye)
+DEFAULT_READ_TIMEOUTS = {
+    "apod": 30,
+    "apod_range": 120,
+    "download": 60,
+    "pushover": 30,
+}
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF_FACTOR = 1.0
+DEFAULT_BACKOFF_JITTER = 0.5
+DEFAULT_POOL_SIZE = 10
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# requests/urllib3 yüklemesi ~100 ms sürer; ağa çıkılmayan çalıştırmalarda hiç yüklenmez.
+_session: Optional["requests.Session"] = None
+_session_lock = threading.Lock()
+# Ağ hatası sınıfları ilk erişimde requests'ten alınır: http_client.RequestException vb.
+_LAZY_EXCEPTIONS = {"RequestException", "ConnectionError", "Timeout", "HTTPError"}
+
+
+def __getattr__(name: str):
+    if name in _LAZY_EXCEPTIONS:
+        import requests
+        return getattr(requests.exceptions, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _build_retry() -> "Retry":
+    """
+    Üstel geri çekilme ve rastgele sapma (jitter) ile yeniden deneme politikası.
+    POST gibi idempotent olmayan istekler yalnızca bağlantı kurulamadığında tekrarlanır.
+    Her yeniden deneme nedeniyle (HTTP durum kodu ya da hata türü) birlikte metriklere işlenir.
+    """
+    from urllib3.util.retry import Retry
+
+    class _CountingRetry(Retry):
+        def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+            reason = str(response.status) if response is not None else type(error).__name__
+            metrics.inc(metrics.RETRIES, endpoint="http", reason=reason)
+            return super().increment(method, url, response, error, _pool, _stacktrace)
+
+        def get_backoff_time(self) -> float:
+            # backoff_jitter yalnızca urllib3>=2'de var; sapma burada eklenerek 1.26 ile de çalışır.
+            backoff = super().get_backoff_time()
+            return backoff + random.uniform(0, DEFAULT_BACKOFF_JITTER) if backoff > 0 else backoff
+
+    return _CountingRetry(
+        total=getattr(settings, 'HTTP_RETRIES', DEFAULT_RETRIES),
+        backoff_factor=getattr(settings, 'HTTP_BACKOFF_FACTOR', DEFAULT_BACKOFF_FACTOR),
+        status_forcelist=RETRY_STATUS_CODES,
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+
+
+def get_session() -> "requests.Session":
+    """
+    apod, pushover ve indirmelerin paylaştığı bağlantı havuzlu oturumu döner.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+
+                pool_size = getattr(settings, 'HTTP_POOL_SIZE', DEFAULT_POOL_SIZE)
+                adapter = HTTPAdapter(
+                    pool_connections=pool_size,
+                    pool_maxsize=pool_size,
+                    max_retries=_build_retry(),
+                )
+                session = requests.Session()
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+                logging.debug(f"HTTP oturumu oluşturuldu (havuz: {pool_size}).")
+    return _session
+
+
+def close_session() -> None:
+    """
+    Paylaşılan oturumu ve havuzdaki bağlantıları kapatır.
+    """
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def timeout_for(endpoint: str) -> Tuple[float, float]:
+    """
+    Uç nokta için (bağlantı, okuma) zaman aşımı çiftini döner.
+    """
+    read_timeouts = getattr(settings, 'HTTP_READ_TIMEOUTS', None) or DEFAULT_READ_TIMEOUTS
+    read_timeout = read_timeouts.get(endpoint, DEFAULT_READ_TIMEOUTS.get(endpoint, 30))
+    return getattr(settings, 'HTTP_CONNECT_TIMEOUT', DEFAULT_CONNECT_TIMEOUT), read_timeout
+
+
+def get(url: str, endpoint: str, **kwargs) -> "requests.Response":
+    kwargs.setdefault("timeout", timeout_for(endpoint))
+    return get_session().get(url, **kwargs)
+
+
+def post(url: str, endpoint: str, **kwargs) -> "requests.Response":
+    kwargs.setdefault("timeout", timeout_for(endpoint))
+    return get_session().post(url, **kwargs)
@@ -1,19 +1,261 @@
+import io
 import os
+import json
+import time
 import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
-from typing import Tuple, Optional
+from typing import Tuple, Optional, Dict, List, Sequence, Iterator, Any
 
 try:
-    from PIL import Image, UnidentifiedImageError
+    from PIL import Image, UnidentifiedImageError, features
 except ImportError:
     logging.error("Pillow kütüphanesi yüklenemedi. Lütfen 'pip install Pillow' komutunu çalıştırın.")
     Image = None
     UnidentifiedImageError = None
+    features = None
+else:
+    # Pillow'un piksel sayısına dayalı bomba kontrolü yerine _load_bounded içindeki bellek tavanı uygulanır.
+    Image.MAX_IMAGE_PIXELS = None
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+try:
+    import config as settings
+except ImportError:
+    settings = None
+
+import metrics
 
 DEFAULT_MAX_SIZE = (1920, 1080)
 DEFAULT_QUALITY = 85
+THUMBNAIL_SIZE = (300, 200)
+THUMBNAIL_QUALITY = 75
+# Bildirim eki: bayt bütçesine sığan en yüksek kaliteli JPEG aranır.
+NOTIFICATION_MAX_BYTES = int(2.6 * 1024 * 1024)
+NOTIFICATION_MAX_SIZE = (2048, 2048)
+NOTIFICATION_QUALITY_RANGE = (40, 90)
+NOTIFICATION_MAX_ROUNDS = 6
+# (ad, en büyük boyut) çiftleri; create_renditions büyükten küçüğe sırayla üretir.
+DEFAULT_RENDITIONS = (
+    ("4k", (3840, 2160)),
+    ("1080p", (1920, 1080)),
+    ("mobile", (1280, 720)),
+    ("thumb", THUMBNAIL_SIZE),
+)
+DEFAULT_MEMORY_LIMIT_MB = 512
+# Çözümleme başına bayt (bant başına); listede olmayan modlar 1 bayt kabul edilir.
+MODE_BYTES_PER_BAND = {"I;16": 2, "I;16B": 2, "I;16L": 2, "I": 4, "F": 4}
+# Bantlar halinde okunabilen ham (sıkıştırılmamış) veri için piksel başına bayt.
+RAW_BYTES_PER_PIXEL = {"L": 1, "P": 1, "LA": 2, "RGB": 3, "RGBA": 4, "RGBX": 4, "CMYK": 4, "I;16": 2, "I;16B": 2}
+ALPHA_MODES = ("LA", "RGBA")
+# Image.reduce'un desteklemediği modlar küçültmeden önce bu modlara çevrilir.
+REDUCE_MODES = {"P": "RGBA", "1": "L", "I;16": "I", "I;16B": "I", "I;16L": "I"}
+# RGBA/LA küçültmesinde tek seferde işlenen bant boyutu.
+REDUCE_BAND_BYTES = 8 * 1024 * 1024
+SOURCE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".bmp", ".tiff", ".tif", ".webp"}
+OPTIMIZE_MANIFEST = ".optimize_manifest.json"
+FORMAT_EXTENSIONS = {"JPEG": ".jpg", "WEBP": ".webp", "AVIF": ".avif", "PNG": ".png"}
+
+def _flatten_to_rgb(img: "Image.Image") -> "Image.Image":
+    """
+    Saydam ya da paletli görseli beyaz arka plan üzerine RGB olarak düzleştirir.
+    """
+    if img.mode in ('RGBA', 'LA', 'P'):
+        background = Image.new("RGB", img.size, (255, 255, 255))
+        background.paste(img, mask=img.split()[-1] if img.mode in ('RGBA', 'LA') else None)
+        return background
+    return img
+
+def _fit_size(size: Tuple[int, int], max_size: Tuple[int, int]) -> Tuple[int, int]:
+    """
+    En-boy oranını koruyarak max_size içine sığan boyutu döner; büyütme yapmaz.
+    """
+    width, height = size
+    scale = min(max_size[0] / width, max_size[1] / height, 1.0)
+    return max(round(width * scale), 1), max(round(height * scale), 1)
+
+def _reduce_factor(size: Tuple[int, int], target: Tuple[int, int]) -> int:
+    return max(int(min(size[0] / target[0], size[1] / target[1])), 1)
+
+def _reduced_size(size: Tuple[int, int], factor: int) -> Tuple[int, int]:
+    return -(-size[0] // factor), -(-size[1] // factor)
+
+def _reduce(img: "Image.Image", factor: int) -> "Image.Image":
+    """
+    Image.reduce ile aynı sonucu verir. Pillow RGBA/LA görselleri küçültmeden önce tam boyutlu
+    önçarpımlı bir kopyaya çevirdiğinden bu modlarda satırlar küçültme katına hizalı bantlar halinde işlenir.
+    """
+    if img.mode not in ALPHA_MODES:
+        return img.reduce(factor)
+    canvas = Image.new(img.mode, _reduced_size(img.size, factor))
+    band_rows = max(REDUCE_BAND_BYTES // _decoded_bytes(img.mode, (img.width, 1)) // factor, 1) * factor
+    for y in range(0, img.height, band_rows):
+        band = img.crop((0, y, img.width, min(y + band_rows, img.height))).reduce(factor)
+        canvas.paste(band, (0, y // factor))
+        del band
+    return canvas
+
+def _downscale(img: "Image.Image", target: Tuple[int, int]) -> "Image.Image":
+    """
+    Önce Image.reduce ile tam sayı katında ucuzca küçültür, ardından LANCZOS ile hedefe indirir.
+    """
+    if img.size == target:
+        return img
+    if img.mode in REDUCE_MODES:
+        img = img.convert(REDUCE_MODES[img.mode])
+    factor = _reduce_factor(img.size, target)
+    if factor >= 2:
+        img = _reduce(img, factor)
+    if img.size != target:
+        img = img.resize(target, Image.Resampling.LANCZOS)
+    return img
+
+def _memory_limit_bytes() -> int:
+    limit_mb = getattr(settings, 'IMAGE_MEMORY_LIMIT_MB', None) or DEFAULT_MEMORY_LIMIT_MB
+    return int(limit_mb) * 1024 * 1024
+
+def _decoded_bytes(mode: str, size: Tuple[int, int]) -> int:
+    """
+    Görsel tamamen çözümlendiğinde kaplayacağı yaklaşık bellek.
+    """
+    try:
+        bands = Image.getmodebands(mode)
+    except (KeyError, ValueError):
+        bands = 4
+    return size[0] * size[1] * bands * MODE_BYTES_PER_BAND.get(mode, 1)
+
+def _working_bytes(mode: str, size: Tuple[int, int], target: Tuple[int, int]) -> int:
+    """
+    Çözümlenen görselden hedef boyutta düzleştirilmiş çıktıya kadar tüm hattın tepe bellek tahmini:
+    çözümlenen görsel her adımda bellekte kalır; üstüne mod dönüşümü, reduce çıktısı ve
+    LANCZOS'un (RGBA/LA için önçarpımlı kopyası dahil) ara tamponları eklenir.
+    """
+    decoded = _decoded_bytes(mode, size)
+    if size == target:
+        return decoded + _decoded_bytes("RGB", target)
+    working_mode = REDUCE_MODES.get(mode, mode)
+    converted = _decoded_bytes(working_mode, size) if working_mode != mode else 0
+    factor = _reduce_factor(size, target)
+    source_size = _reduced_size(size, factor) if factor >= 2 else size
+    reduced = _decoded_bytes(working_mode, source_size) if factor >= 2 else 0
+    if factor >= 2 and working_mode in ALPHA_MODES:
+        reduced += 2 * REDUCE_BAND_BYTES
+    resize = (_decoded_bytes(working_mode, (target[0], source_size[1]))
+              + _decoded_bytes(working_mode, target) + _decoded_bytes("RGB", target))
+    if working_mode in ALPHA_MODES:
+        resize += _decoded_bytes(working_mode, source_size)
+    # reduce sonrası dönüştürülmüş kopya bırakılır; resize yalnızca küçültülmüş görselle birlikte yaşar.
+    source = converted if factor < 2 else reduced
+    return decoded + max(converted + reduced, source + resize)
+
+def _raw_strips(img: "Image.Image") -> Optional[Tuple[str, int, List[Tuple[int, int, int]]]]:
+    """
+    Görsel tüm satırları kapsayan, aynı ham düzene sahip sıkıştırılmamış şeritlerden oluşuyorsa
+    (ham mod, satır adımı, [(üst, alt, dosya ofseti)]) döner; aksi halde None.
+    """
+    width, height = img.size
+    if not img.tile or not getattr(img, "filename", None):
+        return None
+    layouts = set()
+    strips = []
+    # Karo girdileri: (kodek, (x0, y0, x1, y1), dosya ofseti, (ham mod, satır adımı, yön))
+    for codec, extents, offset, args in img.tile:
+        args = args if isinstance(args, tuple) else (args,)
+        if (codec != "raw" or extents[0] != 0 or extents[2] != width
+                or len(args) < 3 or args[0] not in RAW_BYTES_PER_PIXEL or args[2] != 1):
+            return None
+        layouts.add((args[0], args[1] or width * RAW_BYTES_PER_PIXEL[args[0]]))
+        strips.append((extents[1], extents[3], offset))
+    strips.sort()
+    contiguous = all(previous[1] == current[0] for previous, current in zip(strips, strips[1:]))
+    if len(layouts) != 1 or not contiguous or strips[0][0] != 0 or strips[-1][1] != height:
+        return None
+    rawmode, stride = layouts.pop()
+    return rawmode, stride, strips
+
+def _read_rows(file, strips: List[Tuple[int, int, int]], stride: int, start: int, end: int) -> bytes:
+    """
+    [start, end) satırlarını, şerit sınırlarından bağımsız olarak dosyadan okur.
+    """
+    chunks = []
+    for top, bottom, offset in strips:
+        if bottom <= start or top >= end:
+            continue
+        first, last = max(start, top), min(end, bottom)
+        file.seek(offset + (first - top) * stride)
+        chunks.append(file.read((last - first) * stride))
+    return b"".join(chunks)
+
+def _decode_raw_in_bands(img: "Image.Image", target: Tuple[int, int], memory_limit: int) -> Optional["Image.Image"]:
+    """
+    Sıkıştırılmamış şerit düzenindeki görseli (ör. ham TIFF) küçültme katına hizalı satır bantları
+    halinde okur, her bandı Image.reduce ile küçültüp tek tuvale yapıştırır. Tam görsel hiçbir zaman
+    belleğe alınmaz. Düzen desteklenmiyorsa ya da tuval ve bantlar sınıra sığmıyorsa None döner.
+    """
+    layout = _raw_strips(img)
+    if layout is None:
+        return None
+    rawmode, stride, strips = layout
+    width, height = img.size
+    factor = _reduce_factor(img.size, target)
+    canvas_size = _reduced_size(img.size, factor)
+    canvas_bytes = _decoded_bytes(img.mode, canvas_size)
+    # Tuvalin sonraki küçültmesi de sınıra sığmalıdır; kalan bütçe bant başına okunan bayt, bant görseli,
+    # (RGBA/LA için) önçarpımlı kopyası ve küçültülmüş hali arasında paylaşılır.
+    band_budget = (memory_limit - canvas_bytes) // 4
+    band_rows = (band_budget // stride // factor) * factor
+    if _working_bytes(img.mode, canvas_size, target) > memory_limit or band_rows < factor:
+        logging.warning(f"Bantlı okuma bellek sınırına sığmıyor: {img.size} -> {canvas_size} (1/{factor})")
+        return None
+
+    canvas = Image.new(img.mode, canvas_size)
+    with open(img.filename, "rb") as file:
+        for y in range(0, height, band_rows):
+            rows = min(band_rows, height - y)
+            data = _read_rows(file, strips, stride, y, y + rows)
+            band = Image.frombytes(img.mode, (width, rows), data, "raw", rawmode, stride, 1)
+            del data
+            if factor > 1:
+                band = band.reduce(factor)
+            canvas.paste(band, (0, y // factor))
+            del band
+    logging.info(f"Büyük görsel bantlar halinde okundu: {img.size} -> {canvas.size} (1/{factor})")
+    return canvas
+
+def _load_bounded(img: "Image.Image", target: Tuple[int, int], memory_limit: Optional[int] = None) -> "Image.Image":
+    """
+    Görseli bellek tavanını aşmadan, hedef boyuta yetecek en küçük çözünürlükte yükler:
+    JPEG'de draft (çözümlemede ölçekleme), ham şeritli formatlarda bant bant okuma.
+    Tavan, yalnızca çözümlemeye değil küçültme hattının tamamına uygulanır; aşılıyorsa MemoryError fırlatır.
+    """
+    memory_limit = memory_limit or _memory_limit_bytes()
+    source_format = img.format or "?"
+    img.draft(None, target)
+    needed = _working_bytes(img.mode, img.size, target)
+    if needed <= memory_limit:
+        img.load()
+        metrics.inc(metrics.DECODE_MEGAPIXELS, img.width * img.height / 1e6, format=source_format)
+        return img
+    banded = _decode_raw_in_bands(img, target, memory_limit)
+    if banded is not None:
+        metrics.inc(metrics.DECODE_MEGAPIXELS, img.width * img.height / 1e6, format=source_format)
+        return banded
+    raise MemoryError(
+        f"Görsel işleme {needed // (1024 * 1024)} MB gerektiriyor; "
+        f"sınır {memory_limit // (1024 * 1024)} MB ({img.format} {img.mode} {img.size})"
+    )
+
+def optimized_output_path(
+    image_path: str,
+    output_dir: Optional[str] = None,
+    suffix: str = "_optimized",
+    output_format: str = "JPEG"
+) -> Path:
+    """
+    optimize_image'ın verilen ayarlarla yazacağı çıktı dosyasının yolu.
+    """
+    input_path = Path(image_path)
+    output_extension = ".jpg" if output_format.upper() == "JPEG" else f".{output_format.lower()}"
+    return (Path(output_dir) if output_dir else input_path.parent) / f"{input_path.stem}{suffix}{output_extension}"
 
 def optimize_image(
     image_path: str,
@@ -42,26 +284,22 @@ def optimize_image(
         logging.error(f"Çıktı dizini oluşturulamadı: {e}")
         return None
 
-    output_filename_base = f"{input_path.stem}{suffix}"
-    output_extension = ".jpg" if output_format.upper() == "JPEG" else f".{output_format.lower()}"
-    output_path = output_path_dir / f"{output_filename_base}{output_extension}"
+    output_path = optimized_output_path(image_path, str(output_path_dir), suffix, output_format)
 
     try:
         logging.info(f"Optimizasyon: {input_path.name} -> {output_path.name}")
-        with Image.open(input_path) as img:
-            original_size = img.size
-            img.thumbnail(max_size, Image.Resampling.LANCZOS)
+        with Image.open(input_path) as source:
+            original_size = source.size
+            with metrics.timer("decode"):
+                img = _load_bounded(source, _fit_size(source.size, max_size))
+            with metrics.timer("resize"):
+                img = _downscale(img, _fit_size(img.size, max_size))
             logging.info(f"Boyut {original_size} -> {img.size}")
             save_options = {"optimize": True}
             save_format = output_format.upper()
 
             if save_format == 'JPEG':
-                if img.mode in ('RGBA', 'LA', 'P'):
-                    background = Image.new("RGB", img.size, (255, 255, 255))
-                    background.paste(img, mask=img.split()[-1] if img.mode in ('RGBA', 'LA') else None)
-                    img_to_save = background
-                else:
-                    img_to_save = img
+                img_to_save = _flatten_to_rgb(img)
                 save_options.update({"quality": quality, "progressive": True, "subsampling": 0})
             elif save_format == 'PNG':
                 save_options["compress_level"] = 6
@@ -69,17 +307,395 @@ def optimize_image(
             else:
                 img_to_save = img
 
-            img_to_save.save(output_path, format=save_format, **save_options)
+            # Geçici dosyaya yazılıp yerine taşınır; çıktı içerik deposuna hardlink ise depo nesnesi bozulmaz.
+            temp_path = output_path.with_name(f".{output_path.name}.tmp")
+            with metrics.timer("encode"):
+                img_to_save.save(temp_path, format=save_format, **save_options)
+            os.replace(temp_path, output_path)
+            metrics.inc(metrics.BYTES, output_path.stat().st_size, direction="out", endpoint="optimize")
             logging.info(f"Optimizasyon tamam: {output_path}")
             return str(output_path)
     except (FileNotFoundError, UnidentifiedImageError) as e:
         logging.error(f"Optimizasyon hatası: {e}")
         return None
+    except MemoryError as e:
+        logging.error(f"Optimizasyon bellek sınırını aşıyor: {e}")
+        return None
     except Exception as e:
         logging.error(f"Beklenmedik hata: {e}", exc_info=True)
         return None
 
+def thumbnail_format() -> str:
+    """
+    Pillow WebP destekliyorsa WEBP, aksi halde JPEG döner.
+    """
+    if features is not None and features.check("webp"):
+        return "WEBP"
+    return "JPEG"
+
+def thumbnail_name(image_name: str) -> str:
+    """
+    Galeri görseline karşılık gelen küçük resim dosyasının adı.
+    """
+    extension = ".webp" if thumbnail_format() == "WEBP" else ".jpg"
+    return f"{Path(image_name).stem}{extension}"
+
+def create_thumbnail(
+    image_path: str,
+    thumb_dir: str,
+    name: Optional[str] = None,
+    size: Tuple[int, int] = THUMBNAIL_SIZE,
+    quality: int = THUMBNAIL_QUALITY
+) -> Optional[str]:
+    """
+    Galeri için küçük bir önizleme oluşturur. Güncel bir küçük resim zaten varsa onu döner.
+    name verilirse küçük resim bu galeri adına göre adlandırılır (örn. optimize çıktıdan üretilirken).
+    """
+    if Image is None:
+        logging.error("Pillow yüklü değil.")
+        return None
+
+    input_path = Path(image_path)
+    if not input_path.is_file():
+        logging.error(f"Dosya bulunamadı: {image_path}")
+        return None
+
+    output_dir = Path(thumb_dir)
+    output_path = output_dir / thumbnail_name(name or input_path.name)
+    try:
+        if output_path.is_file() and output_path.stat().st_mtime >= input_path.stat().st_mtime:
+            return str(output_path)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        save_format = thumbnail_format()
+        with metrics.timer("thumbnail"), Image.open(input_path) as source:
+            img = _load_bounded(source, _fit_size(source.size, size))
+            img = _downscale(img, _fit_size(img.size, size))
+            if img.mode not in ("RGB", "RGBA") or (save_format == "JPEG" and img.mode == "RGBA"):
+                img = img.convert("RGB")
+            temp_path = output_path.with_name(f".{output_path.name}.tmp")
+            img.save(temp_path, format=save_format, quality=quality, optimize=True)
+        os.replace(temp_path, output_path)
+        logging.info(f"Küçük resim oluşturuldu: {output_path}")
+        return str(output_path)
+    except (OSError, UnidentifiedImageError, MemoryError) as e:
+        logging.error(f"Küçük resim oluşturulamadı ({input_path.name}): {e}")
+        return None
+
+def _encode_jpeg(img: "Image.Image", quality: int) -> bytes:
+    buffer = io.BytesIO()
+    img.save(buffer, format="JPEG", quality=quality, optimize=True, progressive=True)
+    return buffer.getvalue()
+
+def _best_quality_under(img: "Image.Image", max_bytes: int, min_quality: int,
+                        max_quality: int) -> Optional[Tuple[bytes, int]]:
+    """
+    Bütçeye sığan en yüksek JPEG kalitesini ikili aramayla bulur; en düşük kalite bile sığmazsa None.
+    """
+    data = _encode_jpeg(img, max_quality)
+    if len(data) <= max_bytes:
+        return data, max_quality
+    best = None
+    low, high = min_quality, max_quality - 1
+    while low <= high:
+        quality = (low + high) // 2
+        data = _encode_jpeg(img, quality)
+        if len(data) <= max_bytes:
+            best = (data, quality)
+            low = quality + 1
+        else:
+            high = quality - 1
+    return best
+
+def notification_rendition(
+    image_path: str,
+    output_dir: str,
+    max_bytes: int = NOTIFICATION_MAX_BYTES,
+    max_size: Tuple[int, int] = NOTIFICATION_MAX_SIZE,
+    quality_range: Tuple[int, int] = NOTIFICATION_QUALITY_RANGE
+) -> Optional[str]:
+    """
+    Bildirim eki için max_bytes bütçesine sığan en iyi JPEG'i üretir: önce kalite ikili aramayla,
+    en düşük kalite de sığmazsa boyut bayt oranına göre küçültülerek aranır. Görsel bir kez çözülür.
+    Kaynak zaten bütçeye ve boyuta uygun bir JPEG ise olduğu gibi döner; üretilen çıktı önbelleğe
+    alınır ve kaynak değişmedikçe yeniden kullanılır.
+    """
+    if Image is None:
+        logging.error("Pillow yüklü değil.")
+        return None
+
+    input_path = Path(image_path)
+    if not input_path.is_file():
+        logging.error(f"Dosya bulunamadı: {image_path}")
+        return None
+
+    output_path = Path(output_dir) / f"{input_path.stem}_notify.jpg"
+    try:
+        source_stat = input_path.stat()
+        if output_path.is_file():
+            cached = output_path.stat()
+            if cached.st_mtime >= source_stat.st_mtime and cached.st_size <= max_bytes:
+                return str(output_path)
+
+        with Image.open(input_path) as source:
+            fits_as_is = (source.format == "JPEG" and source_stat.st_size <= max_bytes
+                          and _fit_size(source.size, max_size) == source.size)
+            if fits_as_is:
+                return str(input_path)
+            img = _load_bounded(source, _fit_size(source.size, max_size))
+            img = _downscale(img, _fit_size(img.size, max_size))
+            img = _flatten_to_rgb(img)
+            if img.mode != "RGB":
+                img = img.convert("RGB")
+
+        min_quality, max_quality = quality_range
+        for _ in range(NOTIFICATION_MAX_ROUNDS):
+            result = _best_quality_under(img, max_bytes, min_quality, max_quality)
+            if result:
+                data, quality = result
+                output_path.parent.mkdir(parents=True, exist_ok=True)
+                temp_path = output_path.with_name(f".{output_path.name}.tmp")
+                temp_path.write_bytes(data)
+                os.replace(temp_path, output_path)
+                logging.info(f"Bildirim görseli hazırlandı: {output_path.name} "
+                             f"({img.width}x{img.height}, kalite {quality}, {len(data) / 1024:.0f} KB)")
+                return str(output_path)
+            # En düşük kalitedeki boyuta göre ölçek tahmin edilir (bayt ~ piksel sayısı).
+            smallest = len(_encode_jpeg(img, min_quality))
+            scale = min((max_bytes / smallest) ** 0.5 * 0.95, 0.9)
+            img = _downscale(img, (max(int(img.width * scale), 1), max(int(img.height * scale), 1)))
+        logging.error(f"Bildirim görseli {max_bytes} bayta sığdırılamadı: {input_path.name}")
+        return None
+    except (OSError, UnidentifiedImageError, MemoryError) as e:
+        logging.error(f"Bildirim görseli oluşturulamadı ({input_path.name}): {e}")
+        return None
+
+def available_formats() -> List[str]:
+    """
+    Kurulu Pillow'un yazabildiği rendition formatları (JPEG her zaman, WEBP/AVIF destek varsa).
+    """
+    formats = ["JPEG"]
+    if features is not None:
+        for name in ("WEBP", "AVIF"):
+            try:
+                if features.check(name.lower()):
+                    formats.append(name)
+            except ValueError:
+                continue
+    return formats
+
+def _save_options(save_format: str, quality: int) -> Dict[str, object]:
+    if save_format == "JPEG":
+        return {"quality": quality, "optimize": True, "progressive": True, "subsampling": 0}
+    if save_format == "WEBP":
+        return {"quality": quality, "method": 4}
+    if save_format == "AVIF":
+        return {"quality": quality}
+    return {"optimize": True}
+
+def create_renditions(
+    image_path: str,
+    output_dir: Optional[str] = None,
+    renditions: Sequence[Tuple[str, Tuple[int, int]]] = DEFAULT_RENDITIONS,
+    formats: Optional[Sequence[str]] = None,
+    quality: int = DEFAULT_QUALITY
+) -> Optional[Dict[str, Dict[str, str]]]:
+    """
+    Kaynağı bir kez çözümleyip istenen tüm boyut ve formatlarda çıktı üretir.
+    Her boyut bir öncekinden (büyükten küçüğe) türetilir. {ad: {format: yol}} döner.
+    """
+    if Image is None:
+        logging.error("Pillow yüklü değil.")
+        return None
+
+    input_path = Path(image_path)
+    if not input_path.is_file():
+        logging.error(f"Dosya bulunamadı: {image_path}")
+        return None
+
+    supported = available_formats()
+    formats = [f.upper() for f in (formats or supported)]
+    unsupported = [f for f in formats if f not in supported]
+    if unsupported:
+        logging.warning(f"Desteklenmeyen formatlar atlanıyor: {', '.join(unsupported)}")
+        formats = [f for f in formats if f in supported]
+
+    output_path_dir = Path(output_dir) if output_dir else input_path.parent
+    ordered = sorted(renditions, key=lambda r: r[1][0] * r[1][1], reverse=True)
+    results: Dict[str, Dict[str, str]] = {}
+    try:
+        output_path_dir.mkdir(parents=True, exist_ok=True)
+        with Image.open(input_path) as source:
+            original_size = source.size
+            # En büyük hedefe yetecek ölçekte, bellek tavanı içinde çözümlenir.
+            # Düzleştirme, tam boyutlu bir kopya oluşturmamak için ilk küçültmeden sonra yapılır.
+            current = _load_bounded(source, _fit_size(source.size, ordered[0][1]))
+            current = _flatten_to_rgb(_downscale(current, _fit_size(current.size, ordered[0][1])))
+            if current.mode not in ("RGB", "L"):
+                current = current.convert("RGB")
+            logging.info(f"Rendition kaynağı: {input_path.name} {original_size} -> çözümlenen {current.size}")
+
+            for name, max_size in ordered:
+                current = _downscale(current, _fit_size(current.size, max_size))
+                results[name] = {}
+                for save_format in formats:
+                    output_path = output_path_dir / f"{input_path.stem}_{name}{FORMAT_EXTENSIONS[save_format]}"
+                    current.save(output_path, format=save_format, **_save_options(save_format, quality))
+                    results[name][save_format] = str(output_path)
+                logging.info(f"Rendition '{name}': {current.size} ({', '.join(formats)})")
+        return results
+    except (OSError, UnidentifiedImageError, MemoryError) as e:
+        logging.error(f"Rendition hatası ({input_path.name}): {e}")
+        return None
+
+def benchmark_renditions(
+    source_size: Tuple[int, int] = (6000, 4000),
+    renditions: Sequence[Tuple[str, Tuple[int, int]]] = DEFAULT_RENDITIONS,
+    repeat: int = 3
+) -> Dict[str, float]:
+    """
+    create_renditions ile her boyut için ayrı optimize_image çağrısını (JPEG) karşılaştırır.
+    """
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        source_path = Path(temp_dir) / "bench_source.jpg"
+        gradient = Image.linear_gradient("L").resize(source_size)
+        Image.merge("RGB", (gradient, gradient.transpose(Image.Transpose.ROTATE_90).resize(source_size),
+                            gradient)).save(source_path, quality=92)
+        timings = {"separate_s": float("inf"), "renditions_s": float("inf")}
+        previous_level = logging.getLogger().level
+        logging.getLogger().setLevel(logging.WARNING)
+        try:
+            for _ in range(repeat):
+                started = time.perf_counter()
+                for name, max_size in renditions:
+                    optimize_image(str(source_path), output_dir=temp_dir, max_size=max_size, suffix=f"_sep_{name}")
+                timings["separate_s"] = min(timings["separate_s"], time.perf_counter() - started)
+
+                started = time.perf_counter()
+                create_renditions(str(source_path), output_dir=temp_dir, renditions=renditions, formats=["JPEG"])
+                timings["renditions_s"] = min(timings["renditions_s"], time.perf_counter() - started)
+        finally:
+            logging.getLogger().setLevel(previous_level)
+    timings["speedup"] = timings["separate_s"] / timings["renditions_s"]
+    return timings
+
+def optimization_key(max_size: Tuple[int, int], quality: int, output_format: str, suffix: str) -> str:
+    return f"{max_size[0]}x{max_size[1]}:q{quality}:{output_format.upper()}:{suffix}"
+
+def _load_manifest(path: Path) -> Dict[str, Dict[str, Any]]:
+    try:
+        with open(path, encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+def _save_manifest(path: Path, manifest: Dict[str, Dict[str, Any]]) -> None:
+    temp = path.with_name(f"{path.name}.tmp")
+    with open(temp, "w", encoding="utf-8") as file:
+        json.dump(manifest, file, ensure_ascii=False, indent=1)
+    os.replace(temp, path)
+
+def _batch_job(
+    source: str,
+    output_dir: str,
+    previous: Optional[Dict[str, Any]],
+    settings_key: str,
+    options: Dict[str, Any]
+) -> Dict[str, Any]:
+    """
+    Süreç havuzunda çalışan tek dosya işi. Kaynak ve ayarlar değişmemişse çıktıyı yeniden üretmez.
+    """
+    from metadata_store import hash_file
+
+    stat = os.stat(source)
+    result = {"source": source, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "settings": settings_key}
+    output = previous.get("output") if previous else None
+    current = bool(previous and output and previous.get("settings") == settings_key
+                   and os.path.isfile(os.path.join(output_dir, output)))
+    if current and previous.get("size") == stat.st_size and previous.get("mtime_ns") == stat.st_mtime_ns:
+        return {**result, "sha256": previous.get("sha256"), "output": output, "status": "skipped"}
+
+    result["sha256"] = hash_file(source)
+    if current and previous.get("sha256") == result["sha256"]:
+        return {**result, "output": output, "status": "skipped"}
+
+    optimized = optimize_image(source, output_dir=output_dir, **options)
+    if not optimized:
+        return {**result, "output": None, "status": "failed"}
+    return {**result, "output": os.path.basename(optimized), "status": "optimized"}
+
+def batch_optimize(
+    source_dir: str,
+    output_dir: Optional[str] = None,
+    workers: Optional[int] = None,
+    max_size: Tuple[int, int] = DEFAULT_MAX_SIZE,
+    quality: int = DEFAULT_QUALITY,
+    suffix: str = "_optimized",
+    output_format: str = "JPEG",
+    force: bool = False
+) -> Iterator[Dict[str, Any]]:
+    """
+    Arşivdeki tüm görselleri süreç havuzunda yeniden optimize eder ve ilerlemeyi adım adım döner.
+    Kaynak özeti ve ayarları manifest ile aynı olan dosyalar atlanır.
+    """
+    source_path = Path(source_dir)
+    output_path_dir = Path(output_dir) if output_dir else source_path / "optimized"
+    output_path_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = output_path_dir / OPTIMIZE_MANIFEST
+    manifest = {} if force else _load_manifest(manifest_path)
+
+    sources = sorted(p for p in source_path.iterdir() if p.is_file() and p.suffix.lower() in SOURCE_EXTENSIONS)
+    total = len(sources)
+    settings_key = optimization_key(max_size, quality, output_format, suffix)
+    options = {"max_size": max_size, "quality": quality, "suffix": suffix, "output_format": output_format}
+    workers = workers or os.cpu_count() or 1
+    logging.info(f"Toplu optimizasyon: {total} görsel, {workers} süreç.")
+
+    done = 0
+    counts = {"optimized": 0, "skipped": 0, "failed": 0}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(_batch_job, str(p), str(output_path_dir), manifest.get(p.name), settings_key, options)
+            for p in sources
+        ]
+        try:
+            for future in as_completed(futures):
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logging.error(f"Toplu optimizasyon işi çöktü: {e}")
+                    result = {"source": None, "status": "failed"}
+                done += 1
+                counts[result["status"]] += 1
+                if result["status"] != "failed":
+                    manifest[Path(result["source"]).name] = {
+                        key: result[key] for key in ("sha256", "size", "mtime_ns", "settings", "output")
+                    }
+                # Yarıda kesilirse tamamlanan işler kaybolmasın diye manifest aralıklarla yazılır.
+                if done % 50 == 0:
+                    _save_manifest(manifest_path, manifest)
+                yield {**result, "done": done, "total": total}
+        finally:
+            _save_manifest(manifest_path, manifest)
+    logging.info(f"Toplu optimizasyon tamam: {counts['optimized']} üretildi, "
+                 f"{counts['skipped']} güncel, {counts['failed']} hatalı.")
+
+def get_image_size(image_path: str) -> Optional[Tuple[int, int]]:
+    """
+    Görselin çözünürlüğünü yalnızca başlığını okuyarak döner.
+    """
+    if Image is None:
+        return None
+    try:
+        with Image.open(image_path) as img:
+            return img.size
+    except (OSError, UnidentifiedImageError) as e:
+        logging.warning(f"Görsel boyutu okunamadı ({image_path}): {e}")
+        return None
+
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
     print("Görsel Optimizasyon Testi Başlatıldı...")
     if Image is None:
         print("Pillow yüklü değil.")
@@ -94,3 +710,6 @@ if __name__ == "__main__":
         optimized_path = optimize_image(str(test_image_path), output_dir=str(optimized_dir))
         if optimized_path:
             print(f"Optimize edilmiş dosya: {optimized_path}")
+        timings = benchmark_renditions()
+        print(f"Ayrı optimize_image çağrıları: {timings['separate_s']:.2f} s, "
+              f"create_renditions: {timings['renditions_s']:.2f} s ({timings['speedup']:.1f}x)")
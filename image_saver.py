@@ -1,51 +1,289 @@
 import shutil
 import os
+import time
 import logging
+import threading
+from abc import ABC, abstractmethod
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Iterable, List, Optional
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+from metadata_store import hash_file
+import metrics
+
 try:
     import config as settings
 except ImportError:
     logging.error("config.py bulunamadı. Varsayılan ayarlar kullanılıyor.")
     settings = type('obj', (object,), {'SMB_MOUNT_POINT': '/mnt/windows_share'})()
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+DEFAULT_HEALTH_TTL = 60
+DEFAULT_COPY_BUFFER = 4 * 1024 * 1024
+TEMP_SUFFIX = ".part"
+
+# mount noktası -> son başarılı kontrol zamanı; her kopyada ismount/erişim kontrolü tekrarlanmaz.
+_health_cache = {}
+_health_lock = threading.Lock()
+
 
-def save_to_smb(image_path: str) -> Optional[str]:
+def check_mount(mount_point: Path, force: bool = False, require_mount: bool = True) -> bool:
     """
-    Görseli önceden mount edilmiş SMB paylaşımına kopyalar.
+    Mount noktasının var, bağlı ve yazılabilir olduğunu kontrol eder (require_mount=False ise
+    bağlı olma şartı aranmaz). Başarılı sonuç SMB_HEALTH_TTL saniye önbellekte tutulur.
     """
-    source_path = Path(image_path)
-    mount_point = Path(settings.SMB_MOUNT_POINT)
-
-    if not source_path.is_file():
-        logging.error(f"Kaynak dosya bulunamadı: {source_path}")
-        return None
+    ttl = getattr(settings, 'SMB_HEALTH_TTL', DEFAULT_HEALTH_TTL)
+    key = str(mount_point)
+    now = time.monotonic()
+    with _health_lock:
+        checked = _health_cache.get(key)
+    if not force and checked and now - checked < ttl:
+        return True
 
     if not mount_point.exists() or not mount_point.is_dir():
         logging.error(f"SMB mount noktası hatalı: {mount_point}")
-        return None
-
-    if os.name == 'posix' and not os.path.ismount(str(mount_point)):
+        return False
+    if require_mount and os.name == 'posix' and not os.path.ismount(key):
         logging.error(f"SMB paylaşımı mount edilmemiş: {mount_point}")
-        return None
-    if not os.access(str(mount_point), os.W_OK):
+        return False
+    if not os.access(key, os.W_OK):
         logging.error(f"Yazma izni yok: {mount_point}")
-        return None
+        return False
+    with _health_lock:
+        _health_cache[key] = now
+    return True
 
-    destination_path = mount_point / source_path.name
+
+def invalidate_mount_cache() -> None:
+    with _health_lock:
+        _health_cache.clear()
+
+
+def _copy_data(source, target, size: int) -> None:
+    """
+    Veriyi çekirdek içinde (copy_file_range, sonra sendfile) kopyalar; desteklenmezse
+    büyük tamponlu okuma/yazmaya geri döner.
+    """
+    source_fd, target_fd = source.fileno(), target.fileno()
+    copied = 0
+    for name in ("copy_file_range", "sendfile"):
+        func = getattr(os, name, None)
+        if func is None:
+            continue
+        try:
+            while copied < size:
+                if name == "copy_file_range":
+                    sent = func(source_fd, target_fd, size - copied)
+                else:
+                    sent = func(target_fd, source_fd, copied, size - copied)
+                if sent == 0:
+                    break
+                copied += sent
+            if copied >= size:
+                return
+        except OSError as e:
+            # CIFS vb. dosya sistemleri bu çağrıları desteklemeyebilir; kalan kısım sonraki yöntemle kopyalanır.
+            logging.debug(f"{name} kullanılamadı ({e}); başka yöntem deneniyor.")
+        source.seek(copied)
+        target.seek(copied)
+    shutil.copyfileobj(source, target, getattr(settings, 'SMB_COPY_BUFFER', DEFAULT_COPY_BUFFER))
+
+
+def _fsync_dir(directory: Path) -> None:
+    try:
+        fd = os.open(str(directory), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _already_copied(source_path: Path, destination_path: Path, digest: Optional[str]) -> bool:
+    """
+    Hedefte aynı boyutta ve aynı içerik özetine sahip dosya varsa True.
+    """
+    try:
+        if destination_path.stat().st_size != source_path.stat().st_size:
+            return False
+    except OSError:
+        return False
+    return hash_file(str(destination_path)) == (digest or hash_file(str(source_path)))
+
+
+def _transfer(source_path: Path, destination_path: Path, digest: Optional[str] = None) -> Optional[str]:
+    if _already_copied(source_path, destination_path, digest):
+        logging.info(f"Hedefte aynı dosya mevcut, kopyalama atlandı: {destination_path}")
+        metrics.inc(metrics.EVENTS, event="storage_skipped_identical")
+        return str(destination_path)
+
+    # Windows istemcileri yarım dosyayı görmesin diye geçici adla yazılıp atomik olarak yeniden adlandırılır.
+    temp_path = destination_path.with_name(f".{destination_path.name}{TEMP_SUFFIX}")
     try:
         logging.info(f"Kopyalama: {source_path.name} -> {destination_path}")
-        shutil.copy(source_path, destination_path)
+        size = source_path.stat().st_size
+        with metrics.timer("storage_copy"):
+            with open(source_path, "rb") as source, open(temp_path, "wb") as target:
+                _copy_data(source, target, size)
+                target.flush()
+                os.fsync(target.fileno())
+            os.replace(temp_path, destination_path)
+            _fsync_dir(destination_path.parent)
+        metrics.inc(metrics.BYTES, size, direction="out", endpoint="storage")
         logging.info(f"Kopyalama başarılı: {destination_path}")
         return str(destination_path)
     except Exception as e:
         logging.error(f"Kopyalama hatası: {e}", exc_info=True)
+        try:
+            temp_path.unlink()
+        except OSError:
+            pass
         return None
 
+
+class StorageBackend(ABC):
+    """
+    Optimize edilmiş görsellerin kaydedileceği hedef. Alt sınıflar save() metodunu uygular;
+    uygulamayan bir hedef ilk yüklemede değil, oluşturulurken hata verir.
+    """
+
+    name = "storage"
+
+    @abstractmethod
+    def save(self, image_path: str, digest: Optional[str] = None) -> Optional[str]:
+        """
+        Görseli hedefe kaydeder; başarılıysa hedefteki yolu, değilse None döner.
+        """
+
+    def save_many(self, image_paths: Iterable[str]) -> Dict[str, Optional[str]]:
+        return {path: self.save(path) for path in image_paths}
+
+
+class LocalDirectoryBackend(StorageBackend):
+    """
+    Yerel (ya da herhangi bir bağlı) dizine atomik ve doğrulamalı kopyalama yapar.
+    """
+
+    require_mount = False
+
+    def __init__(self, directory: str, name: Optional[str] = None):
+        self.directory = Path(directory)
+        self.name = name or f"local:{directory}"
+
+    def _ready(self, force: bool = False) -> bool:
+        if not self.require_mount:
+            try:
+                self.directory.mkdir(parents=True, exist_ok=True)
+            except OSError as e:
+                logging.error(f"Hedef dizin oluşturulamadı: {self.directory}: {e}")
+                return False
+        return check_mount(self.directory, force=force, require_mount=self.require_mount)
+
+    def save(self, image_path: str, digest: Optional[str] = None) -> Optional[str]:
+        source_path = Path(image_path)
+        if not source_path.is_file():
+            logging.error(f"Kaynak dosya bulunamadı: {source_path}")
+            return None
+        if not self._ready():
+            return None
+        result = _transfer(source_path, self.directory / source_path.name, digest)
+        if result is None:
+            # Bağlantı kopmuş olabilir; sonraki çağrı hedefi yeniden kontrol eder.
+            invalidate_mount_cache()
+        return result
+
+    def save_many(self, image_paths: Iterable[str]) -> Dict[str, Optional[str]]:
+        """
+        Birden çok dosyayı tek hedef kontrolüyle sırayla kopyalar.
+        Kaynak yolu -> hedef yolu (başarısızsa None) sözlüğü döner.
+        """
+        paths = list(image_paths)
+        if not self._ready(force=True):
+            return {path: None for path in paths}
+        results = {}
+        for path in paths:
+            source_path = Path(path)
+            if not source_path.is_file():
+                logging.error(f"Kaynak dosya bulunamadı: {source_path}")
+                results[path] = None
+                continue
+            results[path] = _transfer(source_path, self.directory / source_path.name)
+        copied = sum(1 for result in results.values() if result)
+        logging.info(f"Toplu kopyalama ({self.name}): {copied}/{len(paths)} dosya tamam.")
+        return results
+
+
+class MountBackend(LocalDirectoryBackend):
+    """
+    Önceden mount edilmiş SMB paylaşımı; dizinin gerçekten bağlı olması şartı aranır.
+    """
+
+    require_mount = True
+
+    def __init__(self, mount_point: Optional[str] = None, name: str = "smb"):
+        super().__init__(mount_point or settings.SMB_MOUNT_POINT, name=name)
+
+
+def parse_backends(spec: str) -> List[StorageBackend]:
+    """
+    "smb,local:/yedek/apod" biçimindeki hedef listesini çözümler.
+    smb (isteğe bağlı smb:/mount/yolu) ve local:/dizin desteklenir.
+    """
+    backends = []
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        kind, _, path = item.partition(":")
+        if kind == "smb":
+            backends.append(MountBackend(path or None, name=item))
+        elif kind == "local" and path:
+            backends.append(LocalDirectoryBackend(path, name=item))
+        else:
+            raise ValueError(f"Bilinmeyen depolama hedefi: {item}")
+    return backends
+
+
+def get_backends() -> List[StorageBackend]:
+    return parse_backends(getattr(settings, 'STORAGE_BACKENDS', None) or "smb")
+
+
+def save_to_backends(
+    image_path: str,
+    backends: Optional[List[StorageBackend]] = None,
+    digest: Optional[str] = None
+) -> Dict[str, Optional[str]]:
+    """
+    Görseli tüm hedeflere aynı anda kopyalar. Hedef adı -> kaydedilen yol (başarısızsa None) döner.
+    """
+    backends = get_backends() if backends is None else backends
+    if len(backends) == 1:
+        return {backends[0].name: backends[0].save(image_path, digest)}
+    with ThreadPoolExecutor(max_workers=len(backends) or 1) as executor:
+        futures = {backend.name: executor.submit(backend.save, image_path, digest) for backend in backends}
+        results = {}
+        for name, future in futures.items():
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                logging.error(f"Depolama hedefi hatası ({name}): {e}", exc_info=True)
+                results[name] = None
+    return results
+
+
+def save_to_smb(image_path: str, digest: Optional[str] = None) -> Optional[str]:
+    """
+    Görseli önceden mount edilmiş SMB paylaşımına kopyalar. Dosya geçici adla yazılır, fsync
+    edilip yerine taşınır; hedefte aynı içerik zaten varsa kopyalama atlanır.
+    """
+    return MountBackend().save(image_path, digest)
+
+
+def save_many_to_smb(image_paths: Iterable[str]) -> Dict[str, Optional[str]]:
+    return MountBackend().save_many(image_paths)
+
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
     print("SMB Kaydedici Testi Başlatıldı...")
     logging.info(f"SMB mount noktası: {settings.SMB_MOUNT_POINT}")
     test_dir = Path("test_smb_source")
@@ -1,13 +1,22 @@
 import os
 import logging
 import sys
+import time
+import argparse
+import threading
+from datetime import date
+from typing import Optional
 
 try:
     import config as settings
     import apod
-    from image_optimizer import optimize_image
-    from image_saver import save_to_smb
+    import metadata_store
+    from image_saver import save_to_backends
     import pushover
+    import http_client
+    import scheduler
+    import metrics
+    from pipeline import Stage, StagedPipeline
 except ImportError as e:
     logging.basicConfig(level=logging.ERROR)
     logging.error(f"Gerekli modül bulunamadı: {e}. Bağımlılıkları kontrol edin.")
@@ -19,72 +28,432 @@ logging.basicConfig(level=log_level, format=log_format)
 logging.info("="*20 + " İşlem Başlatıldı " + "="*20)
 
 
-def main():
+def _record_image_files(date_str: str, original_path: str, optimized_path: str) -> None:
+    """
+    Orijinal ve optimize görselin boyut/çözünürlük bilgilerini meta veri deposuna yazar.
+    """
+    from image_optimizer import get_image_size
+
+    try:
+        for path, optimized in ((original_path, False), (optimized_path, True)):
+            size = get_image_size(path)
+            dimensions = {"width": size[0], "height": size[1]} if size else {}
+            metadata_store.record_file(date_str, path, optimized=optimized, **dimensions)
+    except Exception as e:
+        logging.warning(f"Meta veri deposu güncellenemedi: {e}")
+
+
+STAGES = ("download", "optimize", "thumbnail", "smb", "notify", "cleanup")
+# Optimize çıktısı değişince yeniden üretilmesi gereken aşamalar.
+OPTIMIZE_DEPENDENTS = ("thumbnail", "smb")
+
+
+def _stage_current(stages: dict, stage: str) -> bool:
+    """
+    Aşama tamamlanmış ve ürettiği dosya hâlâ yerindeyse güncel kabul edilir.
+    """
+    entry = stages.get(stage)
+    if not entry or entry["status"] != "done":
+        return False
+    output = entry.get("output")
+    if output and not os.path.exists(output):
+        # Orijinal, temizlik aşamasında bilerek silinmiş olabilir.
+        return stage == "download" and _stage_current(stages, "cleanup")
+    return True
+
+
+def _begin(apod_data: dict):
+    """
+    Kaydın işleme bağlamını hazırlar; yapılacak aşama yoksa None döner.
+    """
+    date_str = apod_data["date"]
+    stages = metadata_store.get_stages(date_str)
+    delete_original = settings.DELETE_ORIGINAL_AFTER_PROCESSING
+    pending = [stage for stage in STAGES if not _stage_current(stages, stage)
+               and (stage != "cleanup" or delete_original)]
+    if not pending:
+        logging.info(f"{date_str} için tüm aşamalar zaten tamamlanmış.")
+        return None
+    logging.info(f"{date_str} için bekleyen aşamalar: {', '.join(pending)}")
+    return {
+        "record": apod_data,
+        "date": date_str,
+        "stages": stages,
+        "pending": pending,
+        "ran": set(),
+        "original": (stages.get("download") or {}).get("output"),
+        "optimized": (stages.get("optimize") or {}).get("output"),
+    }
+
+
+def _finish(ctx: dict, stage: str, output=None) -> None:
+    metadata_store.set_stage(ctx["date"], stage, "done", output)
+    ctx["stages"][stage] = {"status": "done", "output": output}
+    ctx["ran"].add(stage)
+
+
+def _fail(ctx: dict, stage: str, message: str) -> None:
+    logging.error(f"{ctx['date']}: {message}")
+    metadata_store.set_stage(ctx["date"], stage, "failed")
+    return None
+
+
+def stage_download(ctx: dict):
+    original_image_path = ctx["original"]
+    if "download" in ctx["pending"] or ("optimize" in ctx["pending"]
+                                        and not (original_image_path and os.path.exists(original_image_path))):
+        logging.info("2. Görsel indiriliyor..." if ctx["record"].get("media_type") == "image"
+                     else "2. Kapak görseli alınıyor...")
+        result = apod.download_image(ctx["record"])
+        ctx["download"] = result
+        if not result["path"]:
+            return _fail(ctx, "download", f"Görsel indirilemedi: {result['error']}")
+        original_image_path = result["path"]
+        logging.info(f"Orijinal görsel: {original_image_path}")
+        ctx["original"] = original_image_path
+        _finish(ctx, "download", original_image_path)
+    return ctx
+
+
+def stage_optimize(ctx: dict):
+    # Pillow ve içerik deposu yalnızca optimize edilecek bir görsel olduğunda yüklenir;
+    # görsel olmayan ya da zaten işlenmiş günlerde başlangıç süresine eklenmez.
+    import content_store
+    from image_optimizer import create_thumbnail
+
+    date_str, original_image_path = ctx["date"], ctx["original"]
+    if "optimize" in ctx["pending"] or "download" in ctx["ran"]:
+        # Aynı içerik daha önce indirildiyse dosya depodaki tek kopyaya bağlanır.
+        stored = metadata_store.get_record(date_str) or {}
+        source_digest = content_store.ingest(original_image_path, digest=stored.get("sha256"))
+
+        logging.info("3. Görsel optimize ediliyor...")
+        optimized_output_dir = os.path.join(settings.SAVE_DIR, "optimized")
+        optimized_image_path = content_store.optimize_cached(
+            original_image_path, output_dir=optimized_output_dir, source_digest=source_digest
+        )
+        if not optimized_image_path:
+            return _fail(ctx, "optimize", "Görsel optimizasyonu başarısız.")
+        logging.info(f"Optimizasyon tamam: {optimized_image_path}")
+        _record_image_files(date_str, original_image_path, optimized_image_path)
+        ctx["optimized"] = optimized_image_path
+        _finish(ctx, "optimize", optimized_image_path)
+
+    if "thumbnail" in ctx["pending"] or "optimize" in ctx["ran"]:
+        # Galeri önizlemesi küçük olan optimize çıktıdan, orijinal dosyanın adıyla üretilir.
+        thumbnail_path = create_thumbnail(
+            ctx["optimized"], settings.THUMB_DIR, name=os.path.basename(original_image_path)
+        )
+        if thumbnail_path:
+            _finish(ctx, "thumbnail", thumbnail_path)
+        else:
+            logging.warning("Küçük resim oluşturulamadı; galeri ilk istekte üretecek.")
+    return ctx
+
+
+def stage_smb(ctx: dict):
+    if "smb" in ctx["pending"] or "optimize" in ctx["ran"]:
+        logging.info("4. Depolama hedeflerine kaydediliyor...")
+        stored = metadata_store.get_record(ctx["date"]) or {}
+        digest = stored.get("optimized_sha256") if stored.get("optimized_path") == ctx["optimized"] else None
+        results = save_to_backends(ctx["optimized"], digest=digest)
+        failed = [name for name, path in results.items() if not path]
+        if not results or failed:
+            return _fail(ctx, "smb", f"Depolama kaydı başarısız: {', '.join(failed) or 'hedef yok'}")
+        for name, path in results.items():
+            logging.info(f"Kayıt tamam ({name}): {path}")
+        _finish(ctx, "smb", next(iter(results.values())))
+    return ctx
+
+
+def stage_notify(ctx: dict):
+    # Bildirim kalıcı kuyruğa eklenir; gönderim, kota ve tekrar denemeler kuyruk işçisine bırakılır.
+    if "notify" in ctx["pending"]:
+        logging.info("5. Pushover bildirimi kuyruğa ekleniyor...")
+        apod_data = ctx["record"]
+        message = (apod_data.get('explanation') or '')[:150] + "..."
+        if apod_data.get("media_type") != "image" and apod_data.get("url"):
+            # Ek yalnızca kapak görseli; videonun kendisi bağlantıyla açılır.
+            message += f"\n{apod_data['url']}"
+        try:
+            pushover.queue_notification(
+                key=ctx["date"],
+                title=f"Yeni APOD: {apod_data.get('title', 'Başlıksız APOD')}",
+                message=message,
+                attachment_path=ctx["optimized"]
+            )
+            _finish(ctx, "notify")
+        except Exception as e:
+            logging.error(f"Pushover bildirimi kuyruğa eklenemedi: {e}", exc_info=True)
+            metadata_store.set_stage(ctx["date"], "notify", "failed")
+        logging.info("6. E-posta gönderimi atlandı (SMTP bağlantısı devre dışı).")
+    return ctx
+
+
+def stage_cleanup(ctx: dict):
+    original_image_path = ctx["original"]
+    if settings.DELETE_ORIGINAL_AFTER_PROCESSING and ("cleanup" in ctx["pending"] or "download" in ctx["ran"]) \
+            and original_image_path and os.path.exists(original_image_path):
+        try:
+            logging.info(f"Orijinal görsel siliniyor: {original_image_path}")
+            import content_store
+            content_store.remove(original_image_path)
+            metadata_store.update_files(ctx["date"], file_path=None)
+            _finish(ctx, "cleanup")
+            logging.info("Orijinal görsel silindi.")
+        except OSError as e:
+            logging.error(f"Görsel silme hatası: {e}")
+    return ctx
+
+
+PIPELINE_STEPS = (
+    ("download", stage_download),
+    ("optimize", stage_optimize),
+    ("smb", stage_smb),
+    ("notify", stage_notify),
+    ("cleanup", stage_cleanup),
+)
+
+
+def process_record(apod_data: dict) -> bool:
+    """
+    Tek bir APOD kaydını aşama aşama işler. Her aşamanın durumu meta veri deposuna yazılır;
+    yeniden çalıştırmada yalnızca eksik ya da eskimiş aşamalar yapılır.
+    """
+    ctx = _begin(apod_data)
+    if ctx is None:
+        return True
+    for name, step in PIPELINE_STEPS:
+        with metrics.timer(name, level="pipeline"):
+            result = step(ctx)
+        if result is None:
+            return False
+    return True
+
+
+def run_today() -> str:
+    """
+    Günün APOD'unu işler ve zamanlayıcı durumunu döner (done/pending/failed).
+    """
     logging.info("1. NASA APOD verisi çekiliyor...")
+    expected_date = apod.current_apod_date().isoformat()
     apod_data = apod.fetch_apod()
     if not apod_data:
         logging.error("APOD verisi alınamadı.")
-        sys.exit(1)
+        return scheduler.FAILED
 
     media_type = apod_data.get("media_type")
     apod_title = apod_data.get("title", "Başlıksız APOD")
     logging.info(f"APOD: '{apod_title}' - Tür: {media_type}")
 
-    if media_type != "image":
-        logging.info("APOD görsel değil. İşlem sonlandırılıyor.")
-        sys.exit(0)
+    if not apod.has_poster(apod_data):
+        # Meta veri fetch_apod tarafından zaten kaydedildi; arşivde tarih boş kalmaz.
+        logging.info(f"APOD için kapak görseli bulunamadı ({media_type}); yalnızca meta veri kaydedildi.")
+        status = scheduler.DONE
+    else:
+        status = scheduler.DONE if process_record(apod_data) else scheduler.FAILED
+    if status == scheduler.DONE and apod_data.get("date") != expected_date:
+        # API günün kaydını henüz yayınlamadı; dünkü kayıt döndü.
+        logging.info(f"{expected_date} tarihli APOD henüz yayınlanmamış.")
+        status = scheduler.PENDING
+    return status
 
-    logging.info("2. Görsel indiriliyor...")
-    original_image_path = apod.save_image(apod_data)
-    if not original_image_path:
-        logging.error("Görsel indirilemedi.")
-        sys.exit(1)
-    logging.info(f"Orijinal görsel: {original_image_path}")
 
-    logging.info("3. Görsel optimize ediliyor...")
-    optimized_output_dir = os.path.join(settings.SAVE_DIR, "optimized")
-    optimized_image_path = optimize_image(original_image_path, output_dir=optimized_output_dir)
-    if not optimized_image_path:
-        logging.error("Görsel optimizasyonu başarısız.")
-        sys.exit(1)
-    logging.info(f"Optimizasyon tamam: {optimized_image_path}")
+def main() -> int:
+    started = time.time()
+    status = run_today()
+    # Tek seferlik çalıştırmada kuyruk süreç bitmeden boşaltılır; gönderilemeyenler sonraki çalıştırmaya kalır.
+    pushover.drain_queue()
+    metrics.write_summary(status, started, mode="daily")
+    logging.info("="*20 + " İşlem Tamamlandı " + "="*20)
+    return 1 if status == scheduler.FAILED else 0
 
-    logging.info("4. SMB paylaşımına kaydediliyor...")
-    smb_image_path = save_to_smb(optimized_image_path)
-    if not smb_image_path:
-        logging.error("SMB kaydı başarısız.")
-        sys.exit(1)
-    logging.info(f"SMB kaydı tamam: {smb_image_path}")
 
-    logging.info("5. Pushover bildirimi gönderiliyor...")
+def run_daemon() -> int:
+    """
+    Süreç içi zamanlayıcıyla sürekli çalışır; SIGTERM/SIGINT ile temiz biçimde durur.
+    """
+    stop_event = threading.Event()
+    scheduler.install_signal_handlers(stop_event)
+    worker = pushover.NotificationWorker()
+    worker.start()
+
+    def job() -> str:
+        started = time.time()
+        status = run_today()
+        worker.wake()
+        # Servis modunda metrikler süreç boyunca birikir; özet her çalıştırmada güncellenir.
+        metrics.write_summary(status, started, mode="daemon")
+        return status
+
     try:
-        pushover_success = pushover.send_pushover_notification(
-            title=f"Yeni APOD: {apod_title}",
-            message=apod_data.get('explanation', '')[:150] + "...",
-            attachment_path=optimized_image_path
-        )
-        if pushover_success:
-            logging.info("Pushover bildirimi gönderildi.")
-        else:
-            logging.warning("Pushover bildirimi başarısız.")
+        scheduler.run_daemon(job, stop_event=stop_event)
+    finally:
+        worker.stop(timeout=60)
+        http_client.close_session()
+        metadata_store.close()
+    return 0
+
+def run_backfill(start: str, end: str, notify: bool = False) -> int:
+    """
+    Tarih aralığını aşamalı pipeline ile işler: çekme, indirme, optimizasyon, SMB ve bildirim
+    aşamaları farklı kayıtlar üzerinde aynı anda çalışır. Aşama başına çalışan sayısı ayarlardan okunur.
+    """
+    try:
+        start_date = date.fromisoformat(start)
+        end_date = date.fromisoformat(end)
+    except ValueError as e:
+        logging.error(f"Geçersiz tarih (YYYY-AA-GG bekleniyor): {e}")
+        return 1
+    clamped = apod.clamp_range(start_date, end_date)
+    if not clamped:
+        return 1
+    logging.info(f"Arşiv geri doldurma: {clamped[0]} - {clamped[1]}")
+    started = time.time()
+
+    def fetch(chunk):
+        records = apod.fetch_range_cached(*chunk)
+        contexts = [_begin(record) for record in records if apod.has_poster(record)]
+        return [ctx for ctx in contexts if ctx]
+
+    # İndirme aşamasından geçen her kaydın {date, url, path, error} sonucu; list.append iş parçacığı güvenlidir.
+    downloads = []
+
+    def download(ctx):
+        result = stage_download(ctx)
+        if "download" in ctx:
+            downloads.append(ctx["download"])
+        return result
+
+    def notify_and_cleanup(ctx):
+        if notify:
+            stage_notify(ctx)
+        return stage_cleanup(ctx)
+
+    stages = [
+        Stage("fetch", fetch, workers=1, fan_out=True),
+        Stage("download", download,
+              workers=getattr(settings, 'DOWNLOAD_WORKERS', apod.DEFAULT_DOWNLOAD_WORKERS)),
+        Stage("optimize", stage_optimize, workers=getattr(settings, 'PIPELINE_OPTIMIZE_WORKERS', 2)),
+        Stage("storage", stage_smb, workers=getattr(settings, 'PIPELINE_SMB_WORKERS', 2)),
+        Stage("notify", notify_and_cleanup, workers=1),
+    ]
+    pipeline = StagedPipeline(stages, queue_size=getattr(settings, 'PIPELINE_QUEUE_SIZE', 8))
+    worker = pushover.NotificationWorker() if notify else None
+    if worker:
+        worker.start()
+    try:
+        results = pipeline.run(apod.chunk_range(*clamped))
+    finally:
+        if worker:
+            worker.stop(timeout=60)
+            pushover.drain_queue()
+    pipeline.log_stats()
+    failed = sum(stage.dropped for stage in stages[1:])
+    failed_downloads = sorted((r for r in downloads if r["error"]), key=lambda r: r["date"])
+    for r in failed_downloads:
+        logging.warning(f"{r['date']}: {r['url']} indirilemedi ({r['error']}); sonraki çalıştırmada tekrar denenecek.")
+    logging.info(f"Geri doldurma tamam: {len(results)} kayıt işlendi, {failed} kayıt başarısız.")
+    metrics.write_summary(scheduler.FAILED if failed else scheduler.DONE, started, mode="backfill",
+                          start=str(clamped[0]), end=str(clamped[1]), pipeline=pipeline.stats(),
+                          downloads={"done": len(downloads) - len(failed_downloads),
+                                     "failed": [r["date"] for r in failed_downloads]})
+    return 1 if failed else 0
+
+
+def _record_reoptimized(source: str, optimized_path: str) -> Optional[str]:
+    """
+    Yeniden üretilen optimize çıktıyı kayda işler ve küçük resim ile depolama aşamalarını bayat
+    işaretler; yeniden üretim yarıda kalırsa sonraki çalıştırma bunları tekrar dener.
+    Kaydın tarihini (dosya adı tarihli değilse None) döner.
+    """
+    from gallery_index import DATE_PREFIX
+    from image_optimizer import get_image_size
+
+    match = DATE_PREFIX.match(os.path.basename(source))
+    if not match:
+        return None
+    date_str = match.group(1)
+    try:
+        size = get_image_size(optimized_path)
+        dimensions = {"width": size[0], "height": size[1]} if size else {}
+        metadata_store.record_file(date_str, optimized_path, optimized=True, **dimensions)
+        metadata_store.set_stage(date_str, "optimize", "done", optimized_path)
+        for stage in OPTIMIZE_DEPENDENTS:
+            metadata_store.set_stage(date_str, stage, "stale")
     except Exception as e:
-        logging.error(f"Pushover bildirimi hatası: {e}", exc_info=True)
+        logging.warning(f"{date_str}: meta veri deposu güncellenemedi: {e}")
+        return None
+    return date_str
 
-    logging.info("6. E-posta gönderimi atlandı (SMTP bağlantısı devre dışı).")
 
-    if settings.DELETE_ORIGINAL_AFTER_PROCESSING and os.path.exists(original_image_path):
-        try:
-            logging.info(f"Orijinal görsel siliniyor: {original_image_path}")
-            os.remove(original_image_path)
-            logging.info("Orijinal görsel silindi.")
-        except OSError as e:
-            logging.error(f"Görsel silme hatası: {e}")
+def _refresh_dependents(date_str: str, source: str) -> bool:
+    """
+    Yeniden optimize edilen günün küçük resmini ve depolama kopyasını yeni çıktıdan üretir.
+    Günlük çalıştırma yalnızca bugünün kaydına baktığından bu iş burada yapılır.
+    """
+    ctx = _begin(metadata_store.get_record(date_str) or {"date": date_str})
+    if ctx is None:
+        return True
+    # İndirme, bildirim gibi diğer eksik aşamalar bu komutun işi değildir.
+    ctx["pending"] = [stage for stage in ctx["pending"] if stage in OPTIMIZE_DEPENDENTS]
+    ctx["original"] = source
+    for name, step in (("optimize", stage_optimize), ("smb", stage_smb)):
+        with metrics.timer(name, level="pipeline"):
+            if step(ctx) is None:
+                return False
+    return True
+
+
+def run_reoptimize(workers=None, force: bool = False) -> int:
+    from image_optimizer import batch_optimize
+
+    optimized_output_dir = os.path.join(settings.SAVE_DIR, "optimized")
+    failed = 0
+    for progress in batch_optimize(settings.SAVE_DIR, output_dir=optimized_output_dir, workers=workers, force=force):
+        if progress["status"] == "failed":
+            failed += 1
+        elif progress["status"] == "optimized":
+            date_str = _record_reoptimized(progress["source"],
+                                           os.path.join(optimized_output_dir, progress["output"]))
+            if date_str and not _refresh_dependents(date_str, progress["source"]):
+                failed += 1
+        logging.info(f"[{progress['done']}/{progress['total']}] {progress['status']}: "
+                     f"{os.path.basename(progress['source'] or '?')}")
+    return 1 if failed else 0
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="NASA APOD otomasyonu")
+    parser.add_argument(
+        "--backfill", nargs=2, metavar=("BASLANGIC", "BITIS"),
+        help="Tarih aralığındaki arşivi toplu olarak indirir (YYYY-AA-GG YYYY-AA-GG)."
+    )
+    parser.add_argument(
+        "--reoptimize", action="store_true",
+        help="Arşivdeki tüm görselleri güncel ayarlarla paralel olarak yeniden optimize eder; "
+             "değişen günlerin küçük resmini ve depolama kopyasını da yeniler."
+    )
+    parser.add_argument(
+        "--daemon", action="store_true",
+        help="Cron yerine sürekli çalışır; yeni APOD'u DAEMON_RUN_AT saatinde yoklar ve hataları tekrar dener."
+    )
+    parser.add_argument("--notify", action="store_true", help="--backfill: işlenen her gün için Pushover bildirimi gönderir.")
+    parser.add_argument("--workers", type=int, default=None, help="--reoptimize için süreç sayısı (varsayılan: CPU sayısı).")
+    parser.add_argument("--force", action="store_true", help="--reoptimize: güncel çıktıları da yeniden üretir.")
+    return parser.parse_args(argv)
 
-    logging.info("="*20 + " İşlem Tamamlandı " + "="*20)
 
 if __name__ == "__main__":
+    args = parse_args()
     try:
-        main()
+        if args.backfill:
+            sys.exit(run_backfill(*args.backfill, notify=args.notify))
+        if args.reoptimize:
+            sys.exit(run_reoptimize(args.workers, args.force))
+        if args.daemon:
+            sys.exit(run_daemon())
+        sys.exit(main())
     except Exception as e:
         logging.critical(f"Kritik hata: {e}", exc_info=True)
         sys.exit(1)
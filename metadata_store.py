@@ -0,0 +1,498 @@
+import os
+import re
+import sqlite3
+import hashlib
+import logging
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Optional, List, Set, Tuple
+
+try:
+    import config as settings
+except ImportError:
+    logging.error("config.py bulunamadı. Varsayılan ayarlar kullanılıyor.")
+    settings = type('obj', (object,), {'SAVE_DIR': 'saved_images'})()
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# API'den gelen alanlar; kayıt güncellenirken yalnızca bunlar üzerine yazılır.
+API_FIELDS = ("title", "explanation", "media_type", "url", "hdurl", "thumbnail_url", "copyright")
+# Pipeline aşamalarının doldurduğu dosya alanları.
+FILE_FIELDS = (
+    "file_path", "file_size", "sha256", "width", "height",
+    "optimized_path", "optimized_size", "optimized_sha256", "optimized_width", "optimized_height",
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS apod (
+    date TEXT PRIMARY KEY,
+    title TEXT,
+    explanation TEXT,
+    media_type TEXT,
+    url TEXT,
+    hdurl TEXT,
+    thumbnail_url TEXT,
+    copyright TEXT,
+    missing INTEGER NOT NULL DEFAULT 0,
+    file_path TEXT,
+    file_size INTEGER,
+    sha256 TEXT,
+    width INTEGER,
+    height INTEGER,
+    optimized_path TEXT,
+    optimized_size INTEGER,
+    optimized_sha256 TEXT,
+    optimized_width INTEGER,
+    optimized_height INTEGER,
+    updated_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS stages (
+    date TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    status TEXT NOT NULL,
+    output TEXT,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (date, stage)
+);
+CREATE TABLE IF NOT EXISTS notifications (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    key TEXT NOT NULL UNIQUE,
+    title TEXT NOT NULL,
+    message TEXT NOT NULL,
+    attachment_path TEXT,
+    status TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL DEFAULT 0,
+    last_error TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS notifications_due ON notifications (status, next_attempt_at);
+-- Galerinin gösterdiği alanlar (başlık, dosya, eksik işareti) her değiştiğinde artan sayaç.
+CREATE TABLE IF NOT EXISTS listing_version (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    version INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO listing_version (id, version) VALUES (1, 0);
+CREATE TRIGGER IF NOT EXISTS listing_version_insert AFTER INSERT ON apod BEGIN
+    UPDATE listing_version SET version = version + 1 WHERE id = 1;
+END;
+CREATE TRIGGER IF NOT EXISTS listing_version_update AFTER UPDATE OF title, file_path, missing ON apod
+WHEN old.title IS NOT new.title OR old.file_path IS NOT new.file_path OR old.missing IS NOT new.missing BEGIN
+    UPDATE listing_version SET version = version + 1 WHERE id = 1;
+END;
+CREATE TRIGGER IF NOT EXISTS listing_version_delete AFTER DELETE ON apod BEGIN
+    UPDATE listing_version SET version = version + 1 WHERE id = 1;
+END;
+"""
+
+# Başlık ve açıklamalar için tam metin dizini. Satır kimliği tarihten türetilir (2024-03-07 -> 20240307);
+# böylece güncelleme ve silme tablo taramadan rowid ile yapılır ve VACUUM sonrası da değişmez.
+SEARCH_ROWID = "CAST(replace({}.date, '-', '') AS INTEGER)"
+SEARCH_SCHEMA = f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS apod_fts USING fts5(
+    title, explanation, tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS apod_fts_insert AFTER INSERT ON apod
+WHEN new.title IS NOT NULL AND new.missing = 0 BEGIN
+    INSERT INTO apod_fts (rowid, title, explanation) VALUES ({SEARCH_ROWID.format('new')}, new.title, new.explanation);
+END;
+CREATE TRIGGER IF NOT EXISTS apod_fts_update AFTER UPDATE OF title, explanation, missing ON apod
+WHEN old.title IS NOT new.title OR old.explanation IS NOT new.explanation OR old.missing IS NOT new.missing BEGIN
+    DELETE FROM apod_fts WHERE rowid = {SEARCH_ROWID.format('old')};
+    INSERT INTO apod_fts (rowid, title, explanation)
+    SELECT {SEARCH_ROWID.format('new')}, new.title, new.explanation WHERE new.title IS NOT NULL AND new.missing = 0;
+END;
+CREATE TRIGGER IF NOT EXISTS apod_fts_delete AFTER DELETE ON apod BEGIN
+    DELETE FROM apod_fts WHERE rowid = {SEARCH_ROWID.format('old')};
+END;
+"""
+# bm25 ağırlıkları: başlıktaki eşleşme açıklamadakinden daha değerli.
+SEARCH_WEIGHTS = (5.0, 1.0)
+SNIPPET_TOKENS = 24
+# Vurgulanan terimleri çevreleyen işaretler; HTML'e çevirme işi sunucuya bırakılır.
+HIGHLIGHT_START = "\x02"
+HIGHLIGHT_END = "\x03"
+SEARCH_TERM = re.compile(r"\w+", re.UNICODE)
+
+_local = threading.local()
+# Tam metin dizini kurulamayan (FTS5 içermeyen SQLite) veritabanları; aramada LIKE'a düşülür.
+_no_fts: Set[str] = set()
+
+
+def default_db_path() -> Path:
+    db_path = getattr(settings, 'METADATA_DB', None)
+    return Path(db_path) if db_path else Path(settings.SAVE_DIR) / "apod.sqlite3"
+
+
+def _connect(db_path: Optional[str] = None) -> sqlite3.Connection:
+    """
+    İş parçacığı başına tek bir bağlantı açar ve şemayı hazırlar.
+    """
+    path = str(Path(db_path) if db_path else default_db_path())
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+    conn = connections.get(path)
+    if conn is None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        # WAL modu, pipeline yazarken web sunucusunun okumasını engellemez.
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA)
+        _prepare_search(conn, path)
+        connections[path] = conn
+    return conn
+
+
+def _prepare_search(conn: sqlite3.Connection, path: str) -> None:
+    """
+    Tam metin dizinini hazırlar; dizin yeni oluşturulduysa mevcut kayıtlarla bir kez doldurur.
+    """
+    try:
+        with conn:
+            conn.executescript(SEARCH_SCHEMA)
+            if conn.execute("SELECT 1 FROM apod_fts LIMIT 1").fetchone() is None:
+                conn.execute(
+                    f"INSERT INTO apod_fts (rowid, title, explanation) SELECT {SEARCH_ROWID.format('apod')}, "
+                    "title, explanation FROM apod WHERE title IS NOT NULL AND missing=0"
+                )
+    except sqlite3.OperationalError as e:
+        if path not in _no_fts:
+            logging.warning(f"Tam metin dizini kullanılamıyor, arama yavaş yoldan yapılacak: {e}")
+            _no_fts.add(path)
+
+
+def close(db_path: Optional[str] = None) -> None:
+    """
+    Bu iş parçacığına ait bağlantıyı kapatır.
+    """
+    path = str(Path(db_path) if db_path else default_db_path())
+    connections = getattr(_local, "connections", {})
+    conn = connections.pop(path, None)
+    if conn is not None:
+        conn.close()
+
+
+def hash_file(path: str) -> str:
+    """
+    Dosyanın SHA-256 özetini bellek kullanmadan parça parça hesaplar.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def upsert_record(record: Dict[str, Any], db_path: Optional[str] = None) -> None:
+    """
+    API kaydını ekler ya da günceller; dosya alanlarına dokunmaz.
+    """
+    date_str = record.get("date")
+    if not date_str:
+        return
+    values = [record.get(field) for field in API_FIELDS]
+    missing = 1 if record.get("missing") else 0
+    now = datetime.now().isoformat(timespec="seconds")
+    columns = ", ".join(API_FIELDS)
+    placeholders = ", ".join("?" for _ in API_FIELDS)
+    updates = ", ".join(f"{field}=excluded.{field}" for field in API_FIELDS)
+    conn = _connect(db_path)
+    with conn:
+        conn.execute(
+            f"INSERT INTO apod (date, {columns}, missing, updated_at) VALUES (?, {placeholders}, ?, ?) "
+            f"ON CONFLICT(date) DO UPDATE SET {updates}, missing=excluded.missing, updated_at=excluded.updated_at",
+            [date_str, *values, missing, now],
+        )
+
+
+def update_files(date_str: str, db_path: Optional[str] = None, **fields: Any) -> None:
+    """
+    Bir tarihin dosya bilgilerini (yol, boyut, özet, çözünürlük) günceller.
+    """
+    unknown = set(fields) - set(FILE_FIELDS)
+    if unknown:
+        raise ValueError(f"Bilinmeyen alan(lar): {', '.join(sorted(unknown))}")
+    if not fields:
+        return
+    assignments = ", ".join(f"{field}=?" for field in fields)
+    now = datetime.now().isoformat(timespec="seconds")
+    conn = _connect(db_path)
+    with conn:
+        conn.execute(
+            "INSERT INTO apod (date, updated_at) VALUES (?, ?) ON CONFLICT(date) DO NOTHING",
+            (date_str, now),
+        )
+        conn.execute(
+            f"UPDATE apod SET {assignments}, updated_at=? WHERE date=?",
+            [*fields.values(), now, date_str],
+        )
+
+
+def record_file(
+    date_str: str,
+    path: str,
+    optimized: bool = False,
+    db_path: Optional[str] = None,
+    **dimensions: Any
+) -> None:
+    """
+    Dosyanın yolunu, boyutunu ve içerik özetini kayda işler.
+    optimized=True ise optimize edilmiş çıktının alanları doldurulur.
+    """
+    prefix = "optimized_" if optimized else ""
+    fields = {
+        "optimized_path" if optimized else "file_path": str(path),
+        "optimized_size" if optimized else "file_size": os.path.getsize(path),
+        f"{prefix}sha256": hash_file(path),
+    }
+    fields.update({f"{prefix}{key}": value for key, value in dimensions.items()})
+    update_files(date_str, db_path=db_path, **fields)
+
+
+def get_record(date_str: str, db_path: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Tarihe ait kaydı sözlük olarak döner; yoksa None.
+    """
+    row = _connect(db_path).execute("SELECT * FROM apod WHERE date=?", (date_str,)).fetchone()
+    return dict(row) if row else None
+
+
+def known_dates(start: str, end: str, db_path: Optional[str] = None) -> Set[str]:
+    """
+    Aralıktaki (dahil) kayıtlı tarihlerin kümesini döner.
+    """
+    rows = _connect(db_path).execute(
+        "SELECT date FROM apod WHERE date BETWEEN ? AND ? AND (title IS NOT NULL OR missing=1)",
+        (start, end),
+    )
+    return {row["date"] for row in rows}
+
+
+def records_between(start: str, end: str, db_path: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Aralıktaki (dahil) eksik olmayan kayıtları tarih sırasıyla döner.
+    """
+    rows = _connect(db_path).execute(
+        "SELECT * FROM apod WHERE date BETWEEN ? AND ? AND missing=0 AND title IS NOT NULL ORDER BY date",
+        (start, end),
+    )
+    return [dict(row) for row in rows]
+
+
+def list_records(
+    with_files: bool = False,
+    limit: Optional[int] = None,
+    offset: int = 0,
+    newest_first: bool = True,
+    db_path: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    Kayıtları tarihe göre sıralı döner. with_files=True ise yalnızca dosyası olanlar.
+    """
+    query = "SELECT * FROM apod WHERE missing=0"
+    if with_files:
+        query += " AND file_path IS NOT NULL"
+    query += f" ORDER BY date {'DESC' if newest_first else 'ASC'}"
+    params: List[Any] = []
+    if limit is not None:
+        query += " LIMIT ? OFFSET ?"
+        params += [limit, offset]
+    return [dict(row) for row in _connect(db_path).execute(query, params)]
+
+
+def listing_version(db_path: Optional[str] = None) -> int:
+    """
+    Galeri listesini etkileyen değişikliklerin sayacı; aşama ve bildirim yazımlarında değişmez.
+    """
+    row = _connect(db_path).execute("SELECT version FROM listing_version WHERE id = 1").fetchone()
+    return row[0] if row else 0
+
+
+def find_by_filename(file_name: str, db_path: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Dosya adı tarih önekiyle başladığından kayıt tarih anahtarıyla bulunur.
+    """
+    date_str = file_name[:10]
+    record = get_record(date_str, db_path=db_path)
+    if not record:
+        return None
+    for field in ("file_path", "optimized_path"):
+        if record.get(field) and Path(record[field]).name == file_name:
+            return record
+    return None
+
+
+def _match_query(text: str) -> Optional[str]:
+    """
+    Kullanıcı sorgusunu güvenli bir FTS5 ifadesine çevirir: her kelime önek olarak aranır, hepsi eşleşmelidir.
+    """
+    terms = SEARCH_TERM.findall(text)
+    return " ".join(f'"{term}"*' for term in terms) if terms else None
+
+
+def search_records(
+    text: str,
+    limit: int = 20,
+    offset: int = 0,
+    db_path: Optional[str] = None
+) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Başlık ve açıklamalarda tam metin araması yapar; (alaka sırasıyla sonuçlar, toplam eşleşme) döner.
+    Sonuçlardaki snippet alanında eşleşen terimler HIGHLIGHT_START/HIGHLIGHT_END ile işaretlidir.
+    """
+    match = _match_query(text)
+    if not match:
+        return [], 0
+    conn = _connect(db_path)
+    path = str(Path(db_path) if db_path else default_db_path())
+    if path in _no_fts:
+        return _search_like(conn, SEARCH_TERM.findall(text), limit, offset)
+    total = conn.execute("SELECT COUNT(*) FROM apod_fts WHERE apod_fts MATCH ?", (match,)).fetchone()[0]
+    if not total:
+        return [], 0
+    # Sıralama ve özet yalnızca dizinde yapılır; kayıtlar ardından birincil anahtarla alınır.
+    # Dizinle apod tablosunu tek sorguda birleştirmek sıralamayı bir kat yavaşlatıyor.
+    hits = conn.execute(
+        "SELECT rowid, snippet(apod_fts, 1, ?, ?, '…', ?) AS snippet, bm25(apod_fts, ?, ?) AS score "
+        "FROM apod_fts WHERE apod_fts MATCH ? ORDER BY score LIMIT ? OFFSET ?",
+        (HIGHLIGHT_START, HIGHLIGHT_END, SNIPPET_TOKENS, *SEARCH_WEIGHTS, match, limit, offset),
+    ).fetchall()
+    dates = {f"{hit['rowid'] // 10000:04d}-{hit['rowid'] // 100 % 100:02d}-{hit['rowid'] % 100:02d}": hit
+             for hit in hits}
+    placeholders = ", ".join("?" for _ in dates)
+    records = {row["date"]: dict(row) for row in
+               conn.execute(f"SELECT * FROM apod WHERE date IN ({placeholders})", list(dates))}
+    results = []
+    for date_str, hit in dates.items():
+        if date_str in records:
+            results.append({**records[date_str], "snippet": hit["snippet"], "score": hit["score"]})
+    return results, total
+
+
+def _search_like(conn: sqlite3.Connection, terms: List[str], limit: int, offset: int) -> Tuple[List[Dict[str, Any]], int]:
+    condition = " AND ".join("(title LIKE ? OR explanation LIKE ?)" for _ in terms)
+    params: List[Any] = [value for term in terms for value in (f"%{term}%", f"%{term}%")]
+    where = f"FROM apod WHERE missing=0 AND title IS NOT NULL AND {condition}"
+    total = conn.execute(f"SELECT COUNT(*) {where}", params).fetchone()[0]
+    rows = conn.execute(
+        f"SELECT *, substr(explanation, 1, 200) AS snippet {where} ORDER BY date DESC LIMIT ? OFFSET ?",
+        [*params, limit, offset],
+    )
+    return [dict(row) for row in rows], total
+
+
+def set_stage(date_str: str, stage: str, status: str, output: Optional[str] = None,
+              db_path: Optional[str] = None) -> None:
+    """
+    Bir tarihin pipeline aşamasının durumunu (done/failed/stale) ve ürettiği çıktıyı kaydeder.
+    """
+    now = datetime.now().isoformat(timespec="seconds")
+    conn = _connect(db_path)
+    with conn:
+        conn.execute(
+            "INSERT INTO stages (date, stage, status, output, updated_at) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(date, stage) DO UPDATE SET status=excluded.status, output=excluded.output, "
+            "updated_at=excluded.updated_at",
+            (date_str, stage, status, output, now),
+        )
+
+
+def get_stages(date_str: str, db_path: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Tarihin aşama durumlarını {aşama: {status, output, updated_at}} olarak döner.
+    """
+    rows = _connect(db_path).execute(
+        "SELECT stage, status, output, updated_at FROM stages WHERE date=?", (date_str,)
+    )
+    return {row["stage"]: {"status": row["status"], "output": row["output"], "updated_at": row["updated_at"]}
+            for row in rows}
+
+
+def enqueue_notification(key: str, title: str, message: str, attachment_path: Optional[str] = None,
+                         db_path: Optional[str] = None) -> bool:
+    """
+    Bildirimi giden kuyruğuna ekler. Aynı anahtarla daha önce eklenmişse tekrar eklenmez (False).
+    """
+    now = datetime.now().isoformat(timespec="seconds")
+    conn = _connect(db_path)
+    with conn:
+        cursor = conn.execute(
+            "INSERT INTO notifications (key, title, message, attachment_path, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(key) DO NOTHING",
+            (key, title, message, attachment_path, now, now),
+        )
+    return cursor.rowcount > 0
+
+
+def claim_notifications(now: float, lease: float, limit: Optional[int] = None,
+                        db_path: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Gönderim zamanı gelmiş bildirimleri eklenme sırasıyla 'sending' olarak işaretleyip döner.
+    Seçim ve işaretleme tek yazma işleminde yapıldığından aynı öğeyi iki boşaltıcı birden alamaz.
+    lease saniye içinde sonuçlanmayan gönderim (ör. süreç çöktü) yeniden alınabilir.
+    """
+    query = ("SELECT * FROM notifications WHERE status IN ('queued', 'sending') AND next_attempt_at <= ? "
+             "ORDER BY id")
+    params: List[Any] = [now]
+    if limit is not None:
+        query += " LIMIT ?"
+        params.append(limit)
+    conn = _connect(db_path)
+    with conn:
+        conn.execute("BEGIN IMMEDIATE")
+        rows = [dict(row) for row in conn.execute(query, params)]
+        if rows:
+            placeholders = ", ".join("?" for _ in rows)
+            conn.execute(
+                f"UPDATE notifications SET status='sending', next_attempt_at=?, updated_at=? "
+                f"WHERE id IN ({placeholders})",
+                [now + lease, datetime.now().isoformat(timespec="seconds"), *(row["id"] for row in rows)],
+            )
+    return rows
+
+
+def update_notifications(ids: List[int], status: str, next_attempt_at: float = 0,
+                         error: Optional[str] = None, db_path: Optional[str] = None) -> None:
+    """
+    Bildirimlerin durumunu (sent/queued/failed) günceller; queued ve failed deneme sayısını artırır.
+    """
+    if not ids:
+        return
+    now = datetime.now().isoformat(timespec="seconds")
+    increment = 0 if status == "sent" else 1
+    placeholders = ", ".join("?" for _ in ids)
+    conn = _connect(db_path)
+    with conn:
+        conn.execute(
+            f"UPDATE notifications SET status=?, attempts=attempts+?, next_attempt_at=?, last_error=?, "
+            f"updated_at=? WHERE id IN ({placeholders})",
+            [status, increment, next_attempt_at, error, now, *ids],
+        )
+
+
+def release_notifications(ids: List[int], db_path: Optional[str] = None) -> None:
+    """
+    Alınmış ama gönderilmemiş bildirimleri deneme sayısını artırmadan kuyruğa geri bırakır.
+    """
+    if not ids:
+        return
+    placeholders = ", ".join("?" for _ in ids)
+    conn = _connect(db_path)
+    with conn:
+        conn.execute(
+            f"UPDATE notifications SET status='queued', next_attempt_at=0, updated_at=? "
+            f"WHERE id IN ({placeholders}) AND status='sending'",
+            [datetime.now().isoformat(timespec="seconds"), *ids],
+        )
+
+
+def pending_notifications(db_path: Optional[str] = None) -> int:
+    row = _connect(db_path).execute(
+        "SELECT COUNT(*) FROM notifications WHERE status IN ('queued', 'sending')"
+    ).fetchone()
+    return row[0]
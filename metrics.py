@@ -0,0 +1,193 @@
+import os
+import json
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import config as settings
+except ImportError:
+    logging.error("config.py bulunamadı. Varsayılan ayarlar kullanılıyor.")
+    settings = type('obj', (object,), {'SAVE_DIR': 'saved_images'})()
+
+METRIC_PREFIX = "apod_"
+
+# Metrik adları; etiketler (stage, direction, endpoint...) çağrı yerinde verilir.
+STAGE_SECONDS = "stage_duration_seconds"
+BYTES = "bytes_total"
+RETRIES = "retries_total"
+DECODE_MEGAPIXELS = "decode_megapixels_total"
+EVENTS = "events_total"
+
+HELP = {
+    STAGE_SECONDS: "Aşama süreleri (saniye)",
+    BYTES: "Taşınan bayt miktarı",
+    RETRIES: "Yeniden deneme sayısı",
+    DECODE_MEGAPIXELS: "Çözülen görsel piksel sayısı (megapiksel)",
+    EVENTS: "Sayılan olaylar (atlanan kopya, önbellek isabeti vb.)",
+}
+
+_Key = Tuple[str, Tuple[Tuple[str, str], ...]]
+_counters: Dict[_Key, float] = {}
+# (ad, etiketler) -> [adet, toplam, en büyük]
+_timings: Dict[_Key, List[float]] = {}
+_lock = threading.Lock()
+
+
+def _key(name: str, labels: Dict[str, Any]) -> _Key:
+    return name, tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def inc(name: str, value: float = 1, **labels: Any) -> None:
+    """
+    Sayaç metriğini value kadar artırır.
+    """
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def observe(name: str, seconds: float, **labels: Any) -> None:
+    """
+    Süre ölçümünü kaydeder (adet, toplam ve en büyük değer tutulur).
+    """
+    key = _key(name, labels)
+    with _lock:
+        entry = _timings.setdefault(key, [0, 0.0, 0.0])
+        entry[0] += 1
+        entry[1] += seconds
+        entry[2] = max(entry[2], seconds)
+
+
+@contextmanager
+def timer(stage: str, **labels: Any) -> Iterator[None]:
+    """
+    Bloğun süresini stage_duration_seconds{stage=...} olarak kaydeder.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(STAGE_SECONDS, time.perf_counter() - started, stage=stage, **labels)
+
+
+def snapshot() -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Metriklerin JSON'a yazılabilir kopyasını döner.
+    """
+    with _lock:
+        counters = [{"name": name, "labels": dict(labels), "value": value}
+                    for (name, labels), value in sorted(_counters.items())]
+        timings = [{"name": name, "labels": dict(labels), "count": int(entry[0]),
+                    "sum": round(entry[1], 6), "max": round(entry[2], 6)}
+                   for (name, labels), entry in sorted(_timings.items())]
+    return {"counters": counters, "timings": timings}
+
+
+def reset() -> None:
+    with _lock:
+        _counters.clear()
+        _timings.clear()
+
+
+def summary_path() -> Path:
+    configured = getattr(settings, 'METRICS_FILE', None)
+    return Path(configured) if configured else Path(settings.SAVE_DIR) / "last_run.json"
+
+
+def write_summary(status: str, started_at: float, **extra: Any) -> Optional[str]:
+    """
+    Çalıştırmanın özetini (durum, süre, metrikler) JSON olarak atomik biçimde yazar.
+    """
+    path = summary_path()
+    finished_at = time.time()
+    data = {
+        "status": status,
+        "started_at": datetime.fromtimestamp(started_at).isoformat(timespec="seconds"),
+        "finished_at": datetime.fromtimestamp(finished_at).isoformat(timespec="seconds"),
+        "finished_ts": finished_at,
+        "duration_s": round(finished_at - started_at, 3),
+        **extra,
+        "metrics": snapshot(),
+    }
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(f".{path.name}.tmp")
+        temp_path.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
+        os.replace(temp_path, path)
+        return str(path)
+    except OSError as e:
+        logging.warning(f"Çalıştırma özeti yazılamadı: {e}")
+        return None
+
+
+def load_summary() -> Optional[Dict[str, Any]]:
+    try:
+        return json.loads(summary_path().read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def with_labels(data: Dict[str, List[Dict[str, Any]]], **labels: Any) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Anlık görüntüdeki her metriğe ek etiketler ekler (ör. scope="last_run").
+    """
+    return {kind: [{**item, "labels": {**item["labels"], **labels}} for item in items]
+            for kind, items in data.items()}
+
+
+def combine(*parts: Dict[str, List[Dict[str, Any]]]) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Birden çok anlık görüntüyü birleştirir; aynı adlı metrikler Prometheus çıktısında yan yana kalır.
+    """
+    combined: Dict[str, List[Dict[str, Any]]] = {"counters": [], "timings": []}
+    for part in parts:
+        for kind in combined:
+            combined[kind].extend(part.get(kind, []))
+    for items in combined.values():
+        items.sort(key=lambda item: item["name"])
+    return combined
+
+
+def _labels_text(labels: Dict[str, Any]) -> str:
+    if not labels:
+        return ""
+    pairs = []
+    for key, value in sorted(labels.items()):
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{key}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def render_prometheus(data: Dict[str, List[Dict[str, Any]]]) -> str:
+    """
+    snapshot() çıktısını Prometheus metin biçimine çevirir.
+    """
+    lines = []
+    seen = set()
+
+    def header(name: str, kind: str, base: str) -> None:
+        if name not in seen:
+            seen.add(name)
+            lines.append(f"# HELP {name} {HELP.get(base, base)}")
+            lines.append(f"# TYPE {name} {kind}")
+
+    for counter in data.get("counters", []):
+        name = METRIC_PREFIX + counter["name"]
+        header(name, "counter", counter["name"])
+        lines.append(f"{name}{_labels_text(counter['labels'])} {counter['value']}")
+    for timing in data.get("timings", []):
+        name = METRIC_PREFIX + timing["name"]
+        header(name, "summary", timing["name"])
+        labels = _labels_text(timing["labels"])
+        lines.append(f"{name}_count{labels} {timing['count']}")
+        lines.append(f"{name}_sum{labels} {timing['sum']}")
+    for timing in data.get("timings", []):
+        name = f"{METRIC_PREFIX}{timing['name']}_max"
+        header(name, "gauge", timing["name"])
+        lines.append(f"{name}{_labels_text(timing['labels'])} {timing['max']}")
+    return "\n".join(lines) + "\n"
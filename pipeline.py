@@ -0,0 +1,160 @@
+import time
+import queue
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterable, List
+
+import metrics
+
+DEFAULT_QUEUE_SIZE = 8
+DEFAULT_REPORT_INTERVAL = 10.0
+_STOP = object()
+
+
+class Stage:
+    """
+    Pipeline aşaması. func bir öğe alır ve sonraki aşamaya gidecek öğeyi döner;
+    None dönerse öğe düşürülür (başarısız/atlandı). fan_out=True ise func bir liste döner
+    ve listedeki her öğe ayrı ayrı iletilir.
+    """
+
+    def __init__(self, name: str, func: Callable[[Any], Any], workers: int = 1, fan_out: bool = False):
+        self.name = name
+        self.func = func
+        self.workers = max(workers, 1)
+        self.fan_out = fan_out
+        self.processed = 0
+        self.emitted = 0
+        self.dropped = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+        self.max_queue_depth = 0
+        self._lock = threading.Lock()
+
+    def record(self, elapsed: float, emitted: int, error: bool = False) -> None:
+        metrics.observe(metrics.STAGE_SECONDS, elapsed, stage=self.name, level="pipeline")
+        with self._lock:
+            self.processed += 1
+            self.busy_seconds += elapsed
+            self.emitted += emitted
+            if emitted == 0:
+                self.dropped += 1
+            if error:
+                self.errors += 1
+
+    def stats(self, wall_seconds: float) -> Dict[str, Any]:
+        return {
+            "stage": self.name,
+            "workers": self.workers,
+            "processed": self.processed,
+            "emitted": self.emitted,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "busy_s": round(self.busy_seconds, 3),
+            # Çalışan başına doluluk ~1 ise darboğaz bu aşamadır.
+            "utilization": round(self.busy_seconds / (wall_seconds * self.workers), 3) if wall_seconds else 0.0,
+            "items_per_s": round(self.processed / wall_seconds, 3) if wall_seconds else 0.0,
+            "max_queue_depth": self.max_queue_depth,
+        }
+
+
+class StagedPipeline:
+    """
+    Aşamalar arasında sınırlı kuyruklar bulunan üretici/tüketici pipeline'ı.
+    Kuyruk dolduğunda önceki aşama bekler (geri basınç); böylece ağ, CPU ve disk aşamaları
+    farklı öğeler üzerinde aynı anda çalışır.
+    """
+
+    def __init__(self, stages: List[Stage], queue_size: int = DEFAULT_QUEUE_SIZE,
+                 report_interval: float = DEFAULT_REPORT_INTERVAL):
+        if not stages:
+            raise ValueError("En az bir aşama gerekli.")
+        self.stages = stages
+        self.queues = [queue.Queue(maxsize=queue_size) for _ in stages]
+        self.report_interval = report_interval
+        self.results: List[Any] = []
+        self.wall_seconds = 0.0
+        self._results_lock = threading.Lock()
+        self._last_report = time.monotonic()
+
+    def _worker(self, index: int) -> None:
+        stage = self.stages[index]
+        inbox = self.queues[index]
+        outbox = self.queues[index + 1] if index + 1 < len(self.stages) else None
+        while True:
+            item = inbox.get()
+            if item is _STOP:
+                break
+            started = time.perf_counter()
+            error = False
+            try:
+                output = stage.func(item)
+            except Exception as e:
+                logging.error(f"'{stage.name}' aşamasında hata: {e}", exc_info=True)
+                output, error = None, True
+            outputs = (output or []) if stage.fan_out else ([] if output is None else [output])
+            stage.record(time.perf_counter() - started, len(outputs), error)
+            for result in outputs:
+                if outbox is not None:
+                    outbox.put(result)
+                else:
+                    with self._results_lock:
+                        self.results.append(result)
+
+    def _observe(self) -> None:
+        for stage, inbox in zip(self.stages, self.queues):
+            stage.max_queue_depth = max(stage.max_queue_depth, inbox.qsize())
+
+    def _reporter(self, done: threading.Event) -> None:
+        while not done.wait(0.1):
+            self._observe()
+            now = time.monotonic()
+            if now - self._last_report >= self.report_interval:
+                self._last_report = now
+                depths = ", ".join(f"{s.name}={q.qsize()}/{s.processed}" for s, q in zip(self.stages, self.queues))
+                logging.info(f"Pipeline kuyruk/işlenen: {depths}")
+
+    def run(self, items: Iterable[Any]) -> List[Any]:
+        """
+        Öğeleri pipeline'dan geçirir ve son aşamadan çıkanları döner.
+        """
+        started = time.perf_counter()
+        self._last_report = time.monotonic()
+        done = threading.Event()
+        reporter = threading.Thread(target=self._reporter, args=(done,), daemon=True)
+        reporter.start()
+
+        threads: List[List[threading.Thread]] = []
+        for index, stage in enumerate(self.stages):
+            stage_threads = [
+                threading.Thread(target=self._worker, args=(index,), name=f"{stage.name}-{n}", daemon=True)
+                for n in range(stage.workers)
+            ]
+            for thread in stage_threads:
+                thread.start()
+            threads.append(stage_threads)
+
+        for item in items:
+            self.queues[0].put(item)
+        # Her aşama bittiğinde sonraki aşamanın tüm çalışanlarına durdurma işareti gönderilir.
+        for index, stage_threads in enumerate(threads):
+            for _ in stage_threads:
+                self.queues[index].put(_STOP)
+            for thread in stage_threads:
+                thread.join()
+
+        done.set()
+        reporter.join()
+        self.wall_seconds = time.perf_counter() - started
+        return self.results
+
+    def stats(self) -> List[Dict[str, Any]]:
+        return [stage.stats(self.wall_seconds) for stage in self.stages]
+
+    def log_stats(self) -> None:
+        for row in self.stats():
+            logging.info(
+                f"Aşama '{row['stage']}' ({row['workers']} çalışan): {row['processed']} işlendi, "
+                f"{row['dropped']} düşürüldü, {row['items_per_s']} öğe/sn, doluluk {row['utilization']:.0%}, "
+                f"en fazla kuyruk {row['max_queue_depth']}"
+            )
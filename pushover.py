@@ -1,39 +1,102 @@
-import requests
+import os
+import time
+import random
 import logging
+import threading
 import mimetypes
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, List, Optional, Tuple
+
+import http_client
+import metadata_store
+import metrics
 
 try:
     import config as settings
     if not hasattr(settings, 'PUSHOVER_APP_TOKEN') or not hasattr(settings, 'PUSHOVER_USER_KEY'):
         raise ImportError("Pushover ayarları eksik.")
 except ImportError as e:
-    logging.basicConfig(level=logging.ERROR)
     logging.error(f"Pushover ayarları yüklenemedi: {e}")
     settings = None
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-
 PUSHOVER_API_URL = "https://api.pushover.net/1/messages.json"
+ATTACHMENT_LIMIT = int(2.6 * 1024 * 1024)
+IMAGE_CONTENT_TYPES = {"image/jpeg", "image/png", "image/gif", "image/webp", "image/bmp", "image/tiff"}
+MESSAGE_LIMIT = 1024
 
-def send_pushover_notification(
+# Gönderim sonuçları
+SENT = "sent"
+RETRY = "retry"      # Geçici hata (ağ, 429, 5xx); kuyrukta geri çekilmeyle tekrar denenir.
+FAILED = "failed"    # Kalıcı hata (geçersiz anahtar, eksik ek vb.)
+
+DEFAULT_QUEUE_INTERVAL = 30
+DEFAULT_RETRY_BASE = 30
+DEFAULT_RETRY_MAX = 3600
+DEFAULT_MAX_ATTEMPTS = 8
+DEFAULT_DIGEST_MIN = 2
+# Alınan öğenin gönderimi bu süre içinde sonuçlanmazsa başka bir boşaltıcı yeniden alabilir (saniye).
+SEND_LEASE = 600
+
+# Son yanıttaki X-Limit-App-* başlıkları; kota bittiğinde sıfırlanma zamanına kadar gönderim yapılmaz.
+_rate_limit: Dict[str, Optional[float]] = {"limit": None, "remaining": None, "reset": None}
+_rate_lock = threading.Lock()
+
+
+def _update_rate_limit(headers) -> None:
+    values = {}
+    for key, header in (("limit", "X-Limit-App-Limit"), ("remaining", "X-Limit-App-Remaining"),
+                        ("reset", "X-Limit-App-Reset")):
+        try:
+            values[key] = float(headers[header])
+        except (KeyError, TypeError, ValueError):
+            continue
+    if not values:
+        return
+    with _rate_lock:
+        _rate_limit.update(values)
+    remaining, limit = values.get("remaining"), values.get("limit")
+    if remaining is not None and limit and remaining < limit * 0.05:
+        logging.warning(f"Pushover aylık kotası azalıyor: {remaining:.0f}/{limit:.0f} kaldı.")
+
+
+def rate_limit_status() -> Dict[str, Optional[float]]:
+    with _rate_lock:
+        return dict(_rate_limit)
+
+
+def blocked_until(now: Optional[float] = None) -> Optional[float]:
+    """
+    Kota tükenmişse gönderimin yeniden mümkün olacağı zamanı (epoch), değilse None döner.
+    """
+    now = now or time.time()
+    with _rate_lock:
+        remaining, reset = _rate_limit["remaining"], _rate_limit["reset"]
+    if remaining is not None and remaining <= 0 and reset and reset > now:
+        return reset
+    return None
+
+
+def notification_dir() -> str:
+    configured = getattr(settings, 'NOTIFY_DIR', None)
+    return configured or str(Path(getattr(settings, 'SAVE_DIR', 'saved_images')) / "notify")
+
+
+def deliver(
     title: str,
     message: str,
     attachment_path: Optional[str] = None
-) -> bool:
+) -> Tuple[str, Optional[str]]:
     """
-    Pushover API'si ile bildirim gönderir. İsteğe bağlı ek dosya gönderilebilir.
+    Bildirimi tek istekle gönderir; (SENT/RETRY/FAILED, hata metni) döner.
     """
     if settings is None:
-        logging.error("Pushover ayarları eksik; bildirim gönderilemiyor.")
-        return False
+        return FAILED, "Pushover ayarları eksik"
 
     payload = {
         "token": settings.PUSHOVER_APP_TOKEN,
         "user": settings.PUSHOVER_USER_KEY,
         "title": title,
-        "message": message
+        "message": message[:MESSAGE_LIMIT]
     }
 
     files_to_send = None
@@ -43,14 +106,21 @@ def send_pushover_notification(
         if attachment_path:
             attachment_file = Path(attachment_path)
             if not attachment_file.is_file():
-                logging.error(f"Pushover eki bulunamadı: {attachment_path}")
-                return False
-
-            file_size = attachment_file.stat().st_size
-            if file_size > 2.6 * 1024 * 1024:
-                logging.warning(f"Eki dosya boyutu limiti aşıyor: {attachment_path}")
+                return FAILED, f"Pushover eki bulunamadı: {attachment_path}"
 
             content_type, _ = mimetypes.guess_type(attachment_file.name)
+            if content_type in IMAGE_CONTENT_TYPES:
+                # Ek, tek yüklemede kabul edilecek şekilde bütçeye sığdırılır (sonuç önbelleklenir).
+                # Pillow yalnızca gerçekten ek gönderilirken yüklenir.
+                from image_optimizer import notification_rendition
+                with metrics.timer("notify_rendition"):
+                    fitted = notification_rendition(str(attachment_file), notification_dir(), max_bytes=ATTACHMENT_LIMIT)
+                if fitted:
+                    attachment_file = Path(fitted)
+                    content_type = "image/jpeg"
+            if attachment_file.stat().st_size > ATTACHMENT_LIMIT:
+                return FAILED, f"Eki dosya boyutu limiti aşıyor: {attachment_file}"
+
             if not content_type:
                 content_type = 'application/octet-stream'
                 logging.warning(f"İçerik türü tahmin edilemedi; varsayılan '{content_type}' kullanılıyor.")
@@ -58,22 +128,172 @@ def send_pushover_notification(
             file_handle = open(attachment_file, "rb")
             files_to_send = {"attachment": (attachment_file.name, file_handle, content_type)}
 
-        response = requests.post(PUSHOVER_API_URL, data=payload, files=files_to_send, timeout=30)
+        with metrics.timer("notify_request"):
+            response = http_client.post(PUSHOVER_API_URL, endpoint="pushover", data=payload, files=files_to_send)
+        if file_handle:
+            metrics.inc(metrics.BYTES, attachment_file.stat().st_size, direction="out", endpoint="pushover")
+        _update_rate_limit(response.headers)
         if response.status_code == 200 and response.json().get("status") == 1:
-            logging.info("Pushover bildirimi gönderildi.")
-            return True
-        else:
-            logging.error(f"Pushover API hatası: {response.text}")
-            return False
+            return SENT, None
+        error = f"Pushover API hatası ({response.status_code}): {response.text[:500]}"
+        if response.status_code == 429 or response.status_code >= 500:
+            return RETRY, error
+        return FAILED, error
+    except (http_client.ConnectionError, http_client.Timeout) as e:
+        return RETRY, f"Pushover bağlantı hatası: {e}"
     except Exception as e:
         logging.error(f"Pushover bildirimi hatası: {e}", exc_info=True)
-        return False
+        return FAILED, str(e)
     finally:
         if file_handle:
             file_handle.close()
             logging.debug("Ek dosyası kapatıldı.")
 
+
+def send_pushover_notification(
+    title: str,
+    message: str,
+    attachment_path: Optional[str] = None
+) -> bool:
+    """
+    Pushover API'si ile bildirimi hemen (eşzamanlı) gönderir. İsteğe bağlı ek dosya gönderilebilir.
+    """
+    if settings is None:
+        logging.error("Pushover ayarları eksik; bildirim gönderilemiyor.")
+        return False
+    status, error = deliver(title, message, attachment_path)
+    if status == SENT:
+        logging.info("Pushover bildirimi gönderildi.")
+        return True
+    logging.error(error)
+    return False
+
+
+def queue_notification(
+    key: str,
+    title: str,
+    message: str,
+    attachment_path: Optional[str] = None
+) -> bool:
+    """
+    Bildirimi kalıcı giden kuyruğuna ekler; gönderimi drain_queue/NotificationWorker yapar.
+    Aynı anahtar (ör. APOD tarihi) ikinci kez eklenmez.
+    """
+    added = metadata_store.enqueue_notification(key, title, message, attachment_path)
+    if added:
+        logging.info(f"Bildirim kuyruğa eklendi: {key}")
+    else:
+        logging.debug(f"Bildirim zaten kuyrukta: {key}")
+    return added
+
+
+def _compose(batch: List[Dict[str, Any]]) -> Tuple[str, str, Optional[str]]:
+    """
+    Tek bildirim olduğu gibi, birden fazlası tek bir özet bildirim olarak gönderilir.
+    Özette en yeni kaydın eki kullanılır.
+    """
+    if len(batch) == 1:
+        item = batch[0]
+        return item["title"], item["message"], item["attachment_path"]
+    ordered = sorted(batch, key=lambda item: item["key"], reverse=True)
+    # Tüm başlıklarda ortak olan "Yeni APOD: " gibi önek özet satırlarında tekrarlanmaz.
+    prefix = os.path.commonprefix([item["title"] for item in ordered])
+    prefix = prefix[:prefix.rfind(": ") + 2] if ": " in prefix else ""
+    lines = []
+    for index, item in enumerate(ordered):
+        line = f"• {item['key']} - {item['title'][len(prefix):]}"
+        rest = len(ordered) - index
+        if len("\n".join(lines + [line])) > MESSAGE_LIMIT - 40:
+            lines.append(f"... ve {rest} kayıt daha")
+            break
+        lines.append(line)
+    attachment = next((item["attachment_path"] for item in ordered if item["attachment_path"]), None)
+    return f"{len(batch)} yeni APOD", "\n".join(lines), attachment
+
+
+def drain_queue() -> int:
+    """
+    Zamanı gelmiş kuyruk öğelerini gönderir ve gönderilen öğe sayısını döner.
+    PUSHOVER_DIGEST_MIN veya daha fazla öğe birikmişse tek bir özet bildirim gönderilir;
+    kota tükenmişse sıfırlanma zamanına kadar hiçbir şey gönderilmez.
+    """
+    if settings is None:
+        return 0
+    reset = blocked_until()
+    if reset:
+        logging.info(f"Pushover kotası dolu; gönderim {time.strftime('%Y-%m-%d %H:%M', time.localtime(reset))} sonrasına ertelendi.")
+        return 0
+    due = metadata_store.claim_notifications(time.time(), SEND_LEASE)
+    if not due:
+        return 0
+
+    digest_min = getattr(settings, 'PUSHOVER_DIGEST_MIN', DEFAULT_DIGEST_MIN)
+    batches = [due] if digest_min and len(due) >= digest_min else [[item] for item in due]
+    retry_base = getattr(settings, 'PUSHOVER_RETRY_BASE', DEFAULT_RETRY_BASE)
+    retry_max = getattr(settings, 'PUSHOVER_RETRY_MAX', DEFAULT_RETRY_MAX)
+    max_attempts = getattr(settings, 'PUSHOVER_MAX_ATTEMPTS', DEFAULT_MAX_ATTEMPTS)
+
+    sent = 0
+    for index, batch in enumerate(batches):
+        if blocked_until():
+            # Kota bitti; alınıp gönderilmeyen öğeler süre dolmasını beklemeden kuyruğa geri bırakılır.
+            metadata_store.release_notifications([item["id"] for rest in batches[index:] for item in rest])
+            break
+        ids = [item["id"] for item in batch]
+        status, error = deliver(*_compose(batch))
+        metrics.inc(metrics.EVENTS, event=f"notification_{status}")
+        if status == SENT:
+            metadata_store.update_notifications(ids, "sent")
+            sent += len(batch)
+            logging.info(f"Pushover bildirimi gönderildi ({len(batch)} kayıt).")
+            continue
+        attempts = max(item["attempts"] for item in batch) + 1
+        if status == RETRY and attempts < max_attempts:
+            metrics.inc(metrics.RETRIES, endpoint="pushover", reason="queued")
+            delay = min(retry_base * (2 ** (attempts - 1)), retry_max) * random.uniform(0.8, 1.2)
+            metadata_store.update_notifications(ids, "queued", next_attempt_at=time.time() + delay, error=error)
+            logging.warning(f"{error}; {delay:.0f} sn sonra tekrar denenecek ({attempts}/{max_attempts - 1}).")
+        else:
+            metadata_store.update_notifications(ids, "failed", error=error)
+            logging.error(f"Bildirim gönderilemedi, vazgeçildi: {error}")
+    return sent
+
+
+class NotificationWorker(threading.Thread):
+    """
+    Kuyruğu arka planda düzenli aralıklarla boşaltan iş parçacığı.
+    """
+
+    def __init__(self, interval: Optional[float] = None):
+        super().__init__(name="pushover-queue", daemon=True)
+        self.interval = interval or getattr(settings, 'PUSHOVER_QUEUE_INTERVAL', DEFAULT_QUEUE_INTERVAL)
+        self._stop_event = threading.Event()
+        self._wake = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                drain_queue()
+            except Exception as e:
+                logging.error(f"Bildirim kuyruğu hatası: {e}", exc_info=True)
+            self._wake.wait(self.interval)
+            self._wake.clear()
+        metadata_store.close()
+
+    def wake(self) -> None:
+        """
+        Yeni öğe eklendiğinde beklemeden boşaltma turunu başlatır.
+        """
+        self._wake.set()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop_event.set()
+        self._wake.set()
+        self.join(timeout)
+
+
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
     print("Pushover Bildirim Testi Başlatıldı...")
     if settings is None:
         print("Pushover ayarları eksik; test atlanıyor.")
@@ -83,3 +303,4 @@ if __name__ == "__main__":
             "Bu sadece metin içeren test mesajıdır."
         )
         print("Test bildirimi gönderildi." if success_text else "Test bildirimi başarısız.")
+        print(f"Kota durumu: {rate_limit_status()}")
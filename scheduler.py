@@ -0,0 +1,114 @@
+import random
+import signal
+import logging
+import threading
+from datetime import datetime, time as dtime, timedelta
+from typing import Callable, Optional
+
+try:
+    import config as settings
+except ImportError:
+    logging.error("config.py bulunamadı. Varsayılan ayarlar kullanılıyor.")
+    settings = type('obj', (object,), {})()
+
+# Görev dönüş değerleri
+DONE = "done"          # Günün işi tamamlandı; ertesi güne kadar beklenir.
+PENDING = "pending"    # Yeni APOD henüz yayınlanmadı; yoklama aralığı kadar sonra tekrar denenir.
+FAILED = "failed"      # Bir aşama başarısız; üstel geri çekilmeyle tekrar denenir.
+
+DEFAULT_RUN_AT = "06:30"
+DEFAULT_POLL_INTERVAL = 900
+DEFAULT_RETRY_BASE = 60
+DEFAULT_RETRY_MAX = 3600
+DEFAULT_MAX_ATTEMPTS = 8
+
+
+def parse_run_at(value: str) -> dtime:
+    """
+    "SS:DD" biçimindeki saat ayarını çözümler.
+    """
+    hour, minute = value.strip().split(":")
+    return dtime(int(hour), int(minute))
+
+
+def next_run_at(now: datetime, run_at: dtime) -> datetime:
+    """
+    now'dan sonraki ilk çalıştırma zamanını döner (bugün geçtiyse yarın).
+    """
+    candidate = datetime.combine(now.date(), run_at)
+    if candidate <= now:
+        candidate += timedelta(days=1)
+    return candidate
+
+
+def retry_delay(attempt: int, base: float, maximum: float) -> float:
+    """
+    attempt. deneme için jitter eklenmiş üstel bekleme süresi.
+    """
+    delay = min(base * (2 ** (attempt - 1)), maximum)
+    return delay * random.uniform(0.8, 1.2)
+
+
+def install_signal_handlers(stop_event: threading.Event) -> None:
+    """
+    SIGTERM ve SIGINT geldiğinde döngünün temiz biçimde durmasını sağlar.
+    """
+    def _handle(signum, _frame):
+        logging.info(f"Sinyal alındı ({signal.Signals(signum).name}); servis durduruluyor...")
+        stop_event.set()
+
+    signal.signal(signal.SIGTERM, _handle)
+    signal.signal(signal.SIGINT, _handle)
+
+
+def run_daemon(
+    job: Callable[[], str],
+    stop_event: Optional[threading.Event] = None,
+    run_at: Optional[dtime] = None,
+    poll_interval: Optional[float] = None,
+    retry_base: Optional[float] = None,
+    retry_max: Optional[float] = None,
+    max_attempts: Optional[int] = None,
+    run_immediately: bool = True
+) -> None:
+    """
+    job'u her gün run_at saatinde çalıştırır. PENDING dönerse poll_interval aralıklarla
+    yoklar, FAILED dönerse üstel geri çekilmeyle max_attempts kadar tekrar dener.
+    stop_event set edilene kadar süreç içinde kalır; modüller ve HTTP bağlantıları sıcak kalır.
+    """
+    stop_event = stop_event or threading.Event()
+    run_at = run_at or parse_run_at(getattr(settings, 'DAEMON_RUN_AT', DEFAULT_RUN_AT))
+    poll_interval = poll_interval or getattr(settings, 'DAEMON_POLL_INTERVAL', DEFAULT_POLL_INTERVAL)
+    retry_base = retry_base or getattr(settings, 'DAEMON_RETRY_BASE', DEFAULT_RETRY_BASE)
+    retry_max = retry_max or getattr(settings, 'DAEMON_RETRY_MAX', DEFAULT_RETRY_MAX)
+    max_attempts = max_attempts or getattr(settings, 'DAEMON_MAX_ATTEMPTS', DEFAULT_MAX_ATTEMPTS)
+
+    logging.info(f"Zamanlayıcı başlatıldı: her gün {run_at.strftime('%H:%M')}, yoklama {poll_interval:.0f} sn.")
+    if not run_immediately:
+        wait = (next_run_at(datetime.now(), run_at) - datetime.now()).total_seconds()
+        stop_event.wait(max(wait, 0))
+
+    attempt = 0
+    while not stop_event.is_set():
+        try:
+            status = job()
+        except Exception as e:
+            logging.error(f"Zamanlanmış görev hatası: {e}", exc_info=True)
+            status = FAILED
+
+        if status == FAILED and attempt + 1 < max_attempts:
+            attempt += 1
+            delay = retry_delay(attempt, retry_base, retry_max)
+            logging.warning(f"Görev başarısız; {delay:.0f} sn sonra tekrar denenecek ({attempt}/{max_attempts - 1}).")
+        elif status == PENDING:
+            delay = poll_interval
+            logging.info(f"Yeni APOD henüz yok; {delay:.0f} sn sonra tekrar yoklanacak.")
+        else:
+            if status == FAILED:
+                logging.error("Görev tüm denemelerde başarısız; bir sonraki güne bırakıldı.")
+            attempt = 0
+            target = next_run_at(datetime.now(), run_at)
+            delay = (target - datetime.now()).total_seconds()
+            logging.info(f"Sonraki çalıştırma: {target.strftime('%Y-%m-%d %H:%M')}")
+        stop_event.wait(max(delay, 0))
+    logging.info("Zamanlayıcı durduruldu.")
@@ -0,0 +1,50 @@
+import os
+import sys
+import shutil
+import tempfile
+from pathlib import Path
+
+import pytest
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_DIR))
+
+# Modüller ayarları içe aktarıldıkları anda okuduğundan yollar test modülleri toplanmadan önce ortama
+# yazılır; dizinin kendisi oturum fikstürüyle oluşturulur ve oturum sonunda silinir.
+WORK_DIR = Path(tempfile.gettempdir()) / f"apod-tests-{os.getpid()}"
+TEST_ENV = {
+    "SAVE_DIR": str(WORK_DIR / "saved_images"),
+    "METADATA_DB": str(WORK_DIR / "apod.sqlite3"),
+    "THUMB_DIR": str(WORK_DIR / "saved_images" / "thumbs"),
+    "NOTIFY_DIR": str(WORK_DIR / "notify"),
+    "METRICS_FILE": str(WORK_DIR / "last_run.json"),
+    "STORAGE_BACKENDS": f"local:{WORK_DIR / 'storage'}",
+    "HTTP_RETRIES": "0",
+}
+os.environ.update(TEST_ENV)
+for _key in ("NASA_API_KEY", "PUSHOVER_USER_KEY", "PUSHOVER_APP_TOKEN"):
+    os.environ.setdefault(_key, "test")
+
+
+@pytest.fixture(scope="session", autouse=True)
+def work_dir():
+    os.environ.update(TEST_ENV)
+    WORK_DIR.mkdir(parents=True, exist_ok=True)
+    yield WORK_DIR
+    import metadata_store
+    metadata_store.close()
+    shutil.rmtree(WORK_DIR, ignore_errors=True)
+
+
+@pytest.fixture(autouse=True)
+def store(tmp_path, monkeypatch):
+    """
+    Her test kendi meta veri deposuyla çalışır; kuyruk ve kayıtlar testler arasında taşınmaz.
+    """
+    import config
+    import metadata_store
+
+    db_path = tmp_path / "apod.sqlite3"
+    monkeypatch.setattr(config, "METADATA_DB", str(db_path))
+    yield db_path
+    metadata_store.close()
@@ -0,0 +1,151 @@
+import os
+import re
+import sys
+import json
+import shutil
+import hashlib
+import threading
+import subprocess
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import apod
+import config
+from conftest import PROJECT_DIR
+
+RANGE_HEADER = re.compile(r"bytes=(\d+)-$")
+
+
+class RangeHandler(SimpleHTTPRequestHandler):
+    """
+    Dosyaları diskten akıtan, açık uçlu Range isteklerini 206 ile yanıtlayan sunucu.
+    """
+
+    def do_GET(self):
+        path = self.translate_path(self.path)
+        if not os.path.isfile(path):
+            self.send_error(404)
+            return
+        size = os.path.getsize(path)
+        match = RANGE_HEADER.match(self.headers.get("Range", ""))
+        start = int(match.group(1)) if match else 0
+        if start >= size and match:
+            self.send_response(416)
+            self.send_header("Content-Range", f"bytes */{size}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(206 if match else 200)
+        if match:
+            self.send_header("Content-Range", f"bytes {start}-{size - 1}/{size}")
+        self.send_header("Content-Type", "image/jpeg")
+        self.send_header("Content-Length", str(size - start))
+        self.end_headers()
+        with open(path, "rb") as file:
+            file.seek(start)
+            shutil.copyfileobj(file, self.wfile, 1024 * 1024)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server(tmp_path):
+    root = tmp_path / "www"
+    root.mkdir()
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), partial(RangeHandler, directory=str(root)))
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield root, f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _write_source(path, size_mb):
+    block = hashlib.sha256(path.name.encode()).digest() * (1024 * 1024 // 32)
+    with open(path, "wb") as file:
+        for _ in range(size_mb):
+            file.write(block)
+
+
+def _digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def test_partial_download_resumes_with_range(server, tmp_path):
+    root, base_url = server
+    _write_source(root / "resume.jpg", 3)
+    part_path = tmp_path / "resume.jpg.part"
+    with open(root / "resume.jpg", "rb") as source:
+        part_path.write_bytes(source.read(1024 * 1024 + 123))
+    headers = apod._stream_to_file(f"{base_url}/resume.jpg", part_path)
+    assert headers["Content-Range"].startswith("bytes 1048699-")
+    assert _digest(part_path) == _digest(root / "resume.jpg")
+
+
+# ru_maxrss exec sonrasında üst sürecin değerini korur; VmHWM ise yeni adres alanıyla sıfırlanır.
+RSS_SCRIPT = """
+import json, sys
+from pathlib import Path
+import apod
+
+def peak_kb():
+    with open("/proc/self/status") as status:
+        return next(int(line.split()[1]) for line in status if line.startswith("VmHWM:"))
+
+import http_client
+http_client.get_session()
+baseline = peak_kb()
+apod._stream_to_file(sys.argv[1], Path(sys.argv[2]))
+print(json.dumps({"delta_mb": (peak_kb() - baseline) / 1024, "size": Path(sys.argv[2]).stat().st_size}))
+"""
+
+
+def _stream_rss(url, part_path):
+    env = dict(os.environ, PYTHONPATH=str(PROJECT_DIR))
+    completed = subprocess.run([sys.executable, "-c", RSS_SCRIPT, url, str(part_path)],
+                               env=env, capture_output=True, text=True, check=True)
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/status"), reason="VmHWM yalnızca Linux'ta okunabilir")
+def test_peak_rss_is_flat_across_image_sizes(server, tmp_path):
+    root, base_url = server
+    deltas = {}
+    for size_mb in (4, 64, 256):
+        name = f"image_{size_mb}.jpg"
+        _write_source(root / name, size_mb)
+        result = _stream_rss(f"{base_url}/{name}", tmp_path / f"{name}.part")
+        assert result["size"] == size_mb * 1024 * 1024
+        deltas[size_mb] = result["delta_mb"]
+        (root / name).unlink()
+    # Parça boyutu 1 MB; tepe bellek indirilen dosyanın boyutuyla büyümemeli.
+    assert max(deltas.values()) < 16, deltas
+    assert deltas[256] - deltas[4] < 8, deltas
+
+
+def test_download_images_reports_each_record_in_order(server, tmp_path, monkeypatch):
+    root, base_url = server
+    monkeypatch.setattr(config, "SAVE_DIR", str(tmp_path / "saved"))
+    _write_source(root / "one.jpg", 1)
+    _write_source(root / "two.jpg", 2)
+    records = [
+        {"date": "2022-01-01", "title": "Bir", "media_type": "image", "url": f"{base_url}/one.jpg"},
+        {"date": "2022-01-02", "title": "Yok", "media_type": "image", "url": f"{base_url}/missing.jpg"},
+        {"date": "2022-01-03", "title": "Boş", "media_type": "image"},
+        {"date": "2022-01-04", "title": "İki", "media_type": "image", "hdurl": f"{base_url}/two.jpg"},
+    ]
+    results = apod.download_images(records, max_workers=3)
+
+    assert [r["date"] for r in results] == [r["date"] for r in records]
+    assert [bool(r["path"]) for r in results] == [True, False, False, True]
+    assert results[1]["url"] == f"{base_url}/missing.jpg" and results[1]["error"]
+    assert results[2]["url"] is None and results[2]["error"]
+    assert results[3]["url"] == f"{base_url}/two.jpg" and results[3]["error"] is None
+    assert _digest(results[3]["path"]) == _digest(root / "two.jpg")
@@ -0,0 +1,75 @@
+
+import pytest
+from PIL import Image
+
+import flask_server
+
+
+@pytest.fixture
+def client():
+    return flask_server.app.test_client()
+
+
+@pytest.fixture
+def images():
+    image_dir = flask_server.IMAGE_DIR
+    (image_dir / "optimized").mkdir(parents=True, exist_ok=True)
+    original = image_dir / "2024-03-07_Güneş Tutulması.jpg"
+    Image.new("RGB", (640, 480), (20, 60, 120)).save(original)
+    optimized = image_dir / "optimized" / "2024-03-07_Güneş Tutulması_optimized.jpg"
+    Image.new("RGB", (320, 240), (20, 60, 120)).save(optimized)
+    broken = image_dir / "2024-03-08_Bozuk.jpg"
+    broken.write_bytes(b"not an image")
+    yield {"original": original, "optimized": optimized, "broken": broken}
+    for path in (original, optimized, broken):
+        path.unlink(missing_ok=True)
+
+
+def _conditional(client, url):
+    first = client.get(url)
+    assert first.status_code == 200 and first.data
+    etag = first.headers["ETag"]
+    repeat = client.get(url, headers={"If-None-Match": etag})
+    return first, repeat
+
+
+def test_original_is_immutable_and_revalidates_without_body(client, images):
+    first, repeat = _conditional(client, f"/images/{images['original'].name}")
+    assert "immutable" in first.headers["Cache-Control"]
+    assert "max-age=31536000" in first.headers["Cache-Control"]
+    assert repeat.status_code == 304
+    assert repeat.data == b""
+
+
+def test_optimized_output_is_revalidated(client, images):
+    first, repeat = _conditional(client, f"/images/optimized/{images['optimized'].name}")
+    assert "immutable" not in first.headers["Cache-Control"]
+    assert "no-cache" in first.headers["Cache-Control"]
+    assert repeat.status_code == 304
+    assert repeat.data == b""
+
+
+def test_thumbnail_is_revalidated(client, images):
+    first, repeat = _conditional(client, f"/thumbs/{images['original'].name}")
+    assert first.mimetype.startswith("image/")
+    assert "immutable" not in first.headers["Cache-Control"]
+    assert "no-cache" in first.headers["Cache-Control"]
+    assert repeat.status_code == 304
+    assert repeat.data == b""
+
+
+def test_thumbnail_fallback_is_not_cached_as_immutable(client, images):
+    response = client.get(f"/thumbs/{images['broken'].name}")
+    assert response.status_code == 200
+    assert response.data == b"not an image"
+    assert "immutable" not in response.headers["Cache-Control"]
+    assert "no-cache" in response.headers["Cache-Control"]
+
+
+def test_changed_file_gets_new_etag(client, images):
+    url = f"/images/optimized/{images['optimized'].name}"
+    etag = client.get(url).headers["ETag"]
+    Image.new("RGB", (320, 240), (200, 10, 10)).save(images["optimized"])
+    response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
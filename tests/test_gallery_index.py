@@ -0,0 +1,64 @@
+import time
+import threading
+
+import pytest
+
+import metadata_store
+from gallery_index import GalleryIndex
+
+
+@pytest.fixture
+def gallery(tmp_path):
+    (tmp_path / "2023-05-01_Orion.jpg").write_bytes(b"jpeg")
+    index = GalleryIndex(tmp_path, check_interval=0.05)
+    yield index
+    index.stop()
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.02)
+    return predicate()
+
+
+def test_stage_and_notification_writes_do_not_trigger_rescan(gallery):
+    gallery.refresh()
+    signature = gallery._current_signature()
+    metadata_store.set_stage("2023-05-01", "smb", "done", "/depo/2023-05-01_Orion.jpg")
+    metadata_store.enqueue_notification("gallery-2023-05-01", "Orion", "mesaj")
+    assert gallery._current_signature() == signature
+
+
+def test_title_and_file_changes_trigger_rescan(gallery, tmp_path):
+    metadata_store.upsert_record({"date": "2023-05-01", "title": "Orion", "media_type": "image"})
+    gallery.refresh()
+    signature = gallery._current_signature()
+
+    metadata_store.upsert_record({"date": "2023-05-01", "title": "Orion", "media_type": "image"})
+    assert gallery._current_signature() == signature
+
+    metadata_store.record_file("2023-05-01", str(tmp_path / "2023-05-01_Orion.jpg"))
+    assert gallery._current_signature() != signature
+    gallery.refresh()
+    assert gallery.query()[0][0]["title"] == "Orion"
+
+    metadata_store.upsert_record({"date": "2023-05-01", "title": "Orion Bulutsusu", "media_type": "image"})
+    gallery.refresh()
+    assert gallery.query()[0][0]["title"] == "Orion Bulutsusu"
+
+
+def test_query_never_rebuilds_in_the_request_thread(gallery, tmp_path, monkeypatch):
+    rebuilt_in = []
+    rebuild = gallery._rebuild
+
+    def tracking_rebuild():
+        rebuilt_in.append(threading.current_thread().name)
+        rebuild()
+
+    monkeypatch.setattr(gallery, "_rebuild", tracking_rebuild)
+    assert gallery.query()[1] == 1
+
+    (tmp_path / "2023-05-02_Lyra.jpg").write_bytes(b"jpeg")
+    assert _wait_for(lambda: gallery.query()[1] == 2)
+    assert rebuilt_in and set(rebuilt_in) == {"gallery-index"}
@@ -0,0 +1,89 @@
+import os
+import sys
+import json
+import subprocess
+
+import pytest
+from PIL import Image, ImageChops
+
+import image_optimizer
+from conftest import PROJECT_DIR
+
+
+def _sample(size, mode="RGB"):
+    width, height = size
+    image = Image.merge("RGB", (
+        Image.linear_gradient("L").resize(size),
+        Image.effect_noise(size, 60).convert("L"),
+        Image.radial_gradient("L").resize(size),
+    ))
+    if mode == "RGBA":
+        image.putalpha(Image.linear_gradient("L").rotate(90).resize(size))
+    return image
+
+
+def test_striped_tiff_bands_match_reduce(tmp_path):
+    # 16 satırlık şeritler küçültme katı 3'ün katı değil; bantlar şerit sınırlarından bağımsız hizalanmalı.
+    path = tmp_path / "striped.tif"
+    _sample((600, 500)).save(path, tiffinfo={278: 16})
+    source = Image.open(path)
+    assert len(source.tile) > 1
+    target = (200, 166)
+    canvas_bytes = image_optimizer._working_bytes("RGB", (200, 167), target)
+    # Bant başına ~50 satır: şeritlerle çakışmayan sınırlar.
+    banded = image_optimizer._decode_raw_in_bands(source, target, canvas_bytes + 4 * 600 * 3 * 50)
+    assert banded is not None
+    reference = Image.open(path).reduce(3)
+    assert banded.size == reference.size
+    assert ImageChops.difference(banded, reference).getbbox() is None
+
+
+def test_alpha_reduce_in_bands_matches_reduce(monkeypatch):
+    image = _sample((600, 500), "RGBA")
+    monkeypatch.setattr(image_optimizer, "REDUCE_BAND_BYTES", 600 * 4 * 10)
+    assert ImageChops.difference(image_optimizer._reduce(image, 3), image.reduce(3)).getbbox() is None
+
+
+def test_canvas_over_limit_is_refused(tmp_path):
+    # Küçültme katı 1 olduğunda tuval kaynak boyutundadır; sınırı aşıyorsa bantlı okuma da reddedilmeli.
+    path = tmp_path / "raw.tif"
+    Image.new("RGB", (3000, 2000)).save(path)
+    with Image.open(path) as source, pytest.raises(MemoryError):
+        image_optimizer._load_bounded(source, image_optimizer._fit_size(source.size, (1920, 1080)), 4 * 1024 * 1024)
+
+
+# ru_maxrss exec sonrasında üst sürecin değerini korur; VmHWM ise yeni adres alanıyla sıfırlanır.
+RSS_SCRIPT = """
+import json, sys
+import image_optimizer
+
+def peak_kb():
+    with open("/proc/self/status") as status:
+        return next(int(line.split()[1]) for line in status if line.startswith("VmHWM:"))
+
+baseline = peak_kb()
+result = image_optimizer.optimize_image(sys.argv[1], output_dir=sys.argv[2])
+print(json.dumps({"ok": result is not None, "delta_mb": (peak_kb() - baseline) / 1024}))
+"""
+
+
+def _optimize_rss(path, output_dir, limit_mb):
+    env = dict(os.environ, IMAGE_MEMORY_LIMIT_MB=str(limit_mb), PYTHONPATH=str(PROJECT_DIR))
+    completed = subprocess.run([sys.executable, "-c", RSS_SCRIPT, str(path), str(output_dir)],
+                               env=env, capture_output=True, text=True, check=True)
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/status"), reason="VmHWM yalnızca Linux'ta okunabilir")
+@pytest.mark.parametrize("name, mode, save_options", [
+    ("huge_rgba.png", "RGBA", {"compress_level": 1}),
+    ("huge_raw.tif", "RGB", {}),
+])
+def test_peak_rss_stays_under_ceiling(tmp_path, name, mode, save_options):
+    # 6000x6000: RGBA PNG çözümlemesi ~137 MB, ham TIFF ~103 MB (bantlı yoldan okunur).
+    path = tmp_path / name
+    _sample((6000, 6000), mode).save(path, **save_options)
+    for limit_mb in (64, 160, 256):
+        result = _optimize_rss(path, tmp_path / "out", limit_mb)
+        assert result["delta_mb"] <= limit_mb, (limit_mb, result)
+    assert result["ok"]
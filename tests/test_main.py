@@ -0,0 +1,135 @@
+from datetime import date
+from pathlib import Path
+
+import pytest
+from PIL import Image
+
+import apod
+import config
+import content_store
+import image_optimizer
+import main
+import metadata_store
+import scheduler
+from benchmarks import StandIn
+
+
+@pytest.fixture
+def archive(tmp_path, monkeypatch):
+    save_dir = tmp_path / "saved_images"
+    save_dir.mkdir()
+    monkeypatch.setattr(config, "SAVE_DIR", str(save_dir))
+    monkeypatch.setattr(config, "THUMB_DIR", str(save_dir / "thumbs"))
+    monkeypatch.setattr(config, "CONTENT_STORE_DIR", str(save_dir / ".store"))
+    monkeypatch.setattr(config, "STORAGE_BACKENDS", f"local:{tmp_path / 'storage'}")
+    return save_dir
+
+
+def test_reoptimize_refreshes_thumbnail_and_storage_copy(archive, tmp_path):
+    source = archive / "2021-07-04_Samanyolu.png"
+    Image.new("RGB", (2400, 1600), (30, 40, 90)).save(source)
+    metadata_store.set_stage("2021-07-04", "thumbnail", "done", "/eski/thumb.jpg")
+    metadata_store.set_stage("2021-07-04", "smb", "done", "/eski/kopya.jpg")
+
+    assert main.run_reoptimize(workers=1) == 0
+
+    stages = metadata_store.get_stages("2021-07-04")
+    assert {stages[stage]["status"] for stage in ("optimize", "thumbnail", "smb")} == {"done"}
+    optimized = stages["optimize"]["output"]
+    assert metadata_store.get_record("2021-07-04")["optimized_path"] == optimized
+    stored = tmp_path / "storage" / "2021-07-04_Samanyolu_optimized.jpg"
+    assert stored.read_bytes() == open(optimized, "rb").read()
+    assert stages["thumbnail"]["output"].startswith(str(archive / "thumbs"))
+
+
+@pytest.fixture
+def stand_in(archive, tmp_path, monkeypatch):
+    corpus = tmp_path / "corpus"
+    corpus.mkdir()
+    Image.new("RGB", (1600, 1200), (120, 80, 40)).save(corpus / "nebula.jpg")
+    with StandIn(corpus) as server:
+        server.images = ["nebula.jpg"]
+        monkeypatch.setattr(apod, "APOD_API_URL", f"{server.base_url}/apod")
+        # Taklit sunucu tarihsiz istekte yerel günü döndürür.
+        monkeypatch.setattr(apod, "current_apod_date", date.today)
+        yield server
+
+
+def _forbid(monkeypatch, target, name):
+    def fail(*args, **kwargs):
+        raise AssertionError(f"{name} çağrılmamalıydı")
+    monkeypatch.setattr(target, name, fail)
+
+
+def _count_calls(monkeypatch, target, name):
+    calls = []
+    original = getattr(target, name)
+
+    def counting(*args, **kwargs):
+        calls.append(args)
+        return original(*args, **kwargs)
+    monkeypatch.setattr(target, name, counting)
+    return calls
+
+
+def test_stage_current_rules(tmp_path):
+    output = tmp_path / "cikti.jpg"
+    output.write_bytes(b"x")
+    done = {"status": "done", "output": str(output)}
+    assert main._stage_current({"smb": done}, "smb")
+    assert not main._stage_current({}, "smb")
+    assert not main._stage_current({"smb": {**done, "status": "failed"}}, "smb")
+    assert not main._stage_current({"smb": {**done, "status": "stale"}}, "smb")
+    assert main._stage_current({"notify": {"status": "done", "output": None}}, "notify")
+
+    gone = {"status": "done", "output": str(tmp_path / "silinmis.jpg")}
+    assert not main._stage_current({"smb": gone}, "smb")
+    # Orijinal temizlik aşamasında silindiyse indirme yine de güncel sayılır.
+    assert not main._stage_current({"download": gone}, "download")
+    assert main._stage_current({"download": gone, "cleanup": {"status": "done", "output": None}}, "download")
+
+
+def test_second_run_does_no_network_or_cpu_work(stand_in, monkeypatch):
+    assert main.run_today() == scheduler.DONE
+    assert stand_in.requests == 2
+    stages = metadata_store.get_stages(date.today().isoformat())
+    assert {stage for stage, entry in stages.items() if entry["status"] == "done"} >= {
+        "download", "optimize", "thumbnail", "smb", "notify"}
+
+    stand_in.requests = 0
+    _forbid(monkeypatch, apod, "save_image")
+    _forbid(monkeypatch, content_store, "optimize_cached")
+    _forbid(monkeypatch, image_optimizer, "create_thumbnail")
+    _forbid(monkeypatch, main, "save_to_backends")
+    assert main.run_today() == scheduler.DONE
+    assert stand_in.requests == 0
+
+
+def test_missing_storage_copy_reruns_only_storage(stand_in, monkeypatch):
+    assert main.run_today() == scheduler.DONE
+    today = date.today().isoformat()
+    Path(metadata_store.get_stages(today)["smb"]["output"]).unlink()
+
+    stand_in.requests = 0
+    _forbid(monkeypatch, apod, "save_image")
+    _forbid(monkeypatch, content_store, "optimize_cached")
+    _forbid(monkeypatch, image_optimizer, "create_thumbnail")
+    saves = _count_calls(monkeypatch, main, "save_to_backends")
+    assert main.run_today() == scheduler.DONE
+
+    stages = metadata_store.get_stages(today)
+    assert stand_in.requests == 0
+    assert len(saves) == 1
+    assert stages["smb"]["status"] == "done"
+    assert Path(stages["smb"]["output"]).is_file()
+
+
+def test_optimize_rerun_also_reruns_dependents(stand_in, monkeypatch):
+    assert main.run_today() == scheduler.DONE
+    today = date.today().isoformat()
+    Path(metadata_store.get_stages(today)["optimize"]["output"]).unlink()
+
+    thumbnails = _count_calls(monkeypatch, image_optimizer, "create_thumbnail")
+    saves = _count_calls(monkeypatch, main, "save_to_backends")
+    assert main.run_today() == scheduler.DONE
+    assert len(thumbnails) == 1 and len(saves) == 1
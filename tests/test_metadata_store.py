@@ -0,0 +1,70 @@
+import metadata_store
+
+
+def _record(date_str, title, explanation="", **extra):
+    metadata_store.upsert_record({"date": date_str, "title": title, "explanation": explanation,
+                                  "media_type": "image", **extra})
+
+
+def _dates(text, **kwargs):
+    results, total = metadata_store.search_records(text, **kwargs)
+    return [result["date"] for result in results], total
+
+
+def test_rowid_maps_back_to_record_date():
+    _record("1999-01-09", "Satürn Halkaları", "Cassini bölümü")
+    _record("2024-12-31", "Yılın Son Tutulması", "Ay gölgesi")
+    results, total = metadata_store.search_records("tutulması")
+    assert total == 1
+    assert results[0]["date"] == "2024-12-31"
+    assert results[0]["title"] == "Yılın Son Tutulması"
+    assert _dates("cassini") == (["1999-01-09"], 1)
+
+
+def test_prefix_and_diacritic_insensitive_match():
+    _record("2017-08-21", "Güneş Tutulması", "Tam tutulma sırasında taç görünür.")
+    assert _dates("gunes") == (["2017-08-21"], 1)
+    assert _dates("GÜN") == (["2017-08-21"], 1)
+    assert _dates("tutul tac") == (["2017-08-21"], 1)
+    assert _dates("gunes ay") == ([], 0)
+
+
+def test_snippet_highlights_and_title_ranks_first():
+    _record("2020-03-01", "Andromeda", "Komşu galaksimiz.")
+    _record("2020-03-02", "Gece Gökyüzü", "Andromeda çıplak gözle görülebilir.")
+    results, total = metadata_store.search_records("andromeda")
+    assert total == 2
+    assert [result["date"] for result in results] == ["2020-03-01", "2020-03-02"]
+    marked = f"{metadata_store.HIGHLIGHT_START}Andromeda{metadata_store.HIGHLIGHT_END}"
+    assert marked in results[1]["snippet"]
+
+
+def test_index_follows_updates_and_missing_flips():
+    _record("2010-05-05", "Orion Bulutsusu", "Yıldız doğum bölgesi")
+    _record("2010-05-05", "Kartal Bulutsusu", "Yaratılış sütunları")
+    assert _dates("orion") == ([], 0)
+    assert _dates("kartal") == (["2010-05-05"], 1)
+    assert _dates("doğum") == ([], 0)
+
+    _record("2010-05-05", "Kartal Bulutsusu", "Yaratılış sütunları", missing=True)
+    assert _dates("kartal") == ([], 0)
+    _record("2010-05-05", "Kartal Bulutsusu", "Yaratılış sütunları")
+    assert _dates("kartal") == (["2010-05-05"], 1)
+
+
+def test_paging_keeps_total():
+    for day in range(1, 6):
+        _record(f"2015-02-0{day}", f"Kuyruklu Yıldız {day}")
+    page, total = _dates("kuyruklu", limit=2, offset=2)
+    assert total == 5
+    assert len(page) == 2
+
+
+def test_like_fallback_without_fts(store, monkeypatch):
+    monkeypatch.setattr(metadata_store, "_no_fts", {str(store)})
+    _record("2019-04-10", "Kara Delik", "Olay ufku teleskobu")
+    _record("2019-04-11", "Kara Bulut", "Toz")
+    _record("2019-04-12", "Kayıp", "Kara", missing=True)
+    assert _dates("kara") == (["2019-04-11", "2019-04-10"], 2)
+    assert _dates("kara ufku") == (["2019-04-10"], 1)
+    assert _dates("  ") == ([], 0)
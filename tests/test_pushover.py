@@ -0,0 +1,60 @@
+import threading
+import time
+
+import metadata_store
+import pushover
+
+
+def _enqueue(count, prefix):
+    for number in range(count):
+        metadata_store.enqueue_notification(f"{prefix}-{number}", f"Başlık {number}", "mesaj")
+
+
+def test_concurrent_drains_send_each_item_once(monkeypatch):
+    _enqueue(6, "concurrent")
+    delivered = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(2)
+
+    def deliver(title, message, attachment_path=None):
+        # Gönderim sürerken diğer boşaltıcının kuyruğa bakmasına fırsat verilir.
+        time.sleep(0.2)
+        with lock:
+            delivered.append(message)
+        return pushover.SENT, None
+
+    monkeypatch.setattr(pushover, "deliver", deliver)
+
+    def drain():
+        barrier.wait()
+        pushover.drain_queue()
+        metadata_store.close()
+
+    threads = [threading.Thread(target=drain) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(delivered) == 1
+    assert metadata_store.pending_notifications() == 0
+    assert pushover.drain_queue() == 0
+
+
+def test_unsent_items_are_released_when_quota_runs_out(monkeypatch):
+    monkeypatch.setattr(pushover, "DEFAULT_DIGEST_MIN", 0)
+    monkeypatch.setattr(pushover.settings, "PUSHOVER_DIGEST_MIN", 0, raising=False)
+    _enqueue(3, "quota")
+    calls = []
+
+    def deliver(title, message, attachment_path=None):
+        calls.append(title)
+        return pushover.SENT, None
+
+    monkeypatch.setattr(pushover, "deliver", deliver)
+    monkeypatch.setattr(pushover, "blocked_until", lambda now=None: 1.0 if calls else None)
+
+    assert pushover.drain_queue() == 1
+    assert metadata_store.pending_notifications() == 2
+    monkeypatch.setattr(pushover, "blocked_until", lambda now=None: None)
+    assert pushover.drain_queue() == 2